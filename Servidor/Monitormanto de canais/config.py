@@ -4,7 +4,7 @@ Environment variables loader and validation
 """
 
 import os
-from typing import Optional
+from typing import List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
@@ -24,6 +24,10 @@ class Settings(BaseSettings):
         description="YouTube Data API v3 key",
         min_length=30
     )
+    youtube_api_keys: str = Field(
+        default="",
+        description="Extra comma-separated YouTube keys, pooled with youtube_api_key"
+    )
 
     # ============================================
     # Claude API (Anthropic)
@@ -37,6 +41,95 @@ class Settings(BaseSettings):
         default="claude-haiku-4-5-20251001",
         description="Claude model to use"
     )
+    claude_stage1_timeout: int = Field(
+        default=60,
+        description="Timeout of a Stage 1 (metadata pre-filter) Claude call (seconds)",
+        ge=5,
+        le=600
+    )
+    claude_stage2_timeout: int = Field(
+        default=180,
+        description="Timeout of a Stage 2 (full analysis) Claude call (seconds)",
+        ge=5,
+        le=600
+    )
+    claude_max_connections: int = Field(
+        default=20,
+        description="Max pooled HTTP connections to the Anthropic API",
+        ge=1,
+        le=100
+    )
+    claude_max_retries: int = Field(
+        default=2,
+        description="SDK retries on connection errors, 429 and 5xx",
+        ge=0,
+        le=10
+    )
+    claude_stage1_coalesce_enabled: bool = Field(
+        default=False,
+        description=(
+            "Pack Stage 1 work of concurrent scanners (same product) into one call; "
+            "adds the coalescing window to every call and disables streamed verdicts"
+        )
+    )
+    claude_stage1_coalesce_window_ms: int = Field(
+        default=150,
+        description="How long Stage 1 waits for other scanners before sending (ms)",
+        ge=0,
+        le=5000
+    )
+    claude_stage1_coalesce_max_videos: int = Field(
+        default=60,
+        description="Send a coalesced Stage 1 call early once it holds this many videos",
+        ge=1,
+        le=200
+    )
+    claude_stage2_chunk_token_budget: int = Field(
+        default=12000,
+        description="Max estimated prompt tokens of videos per Stage 2 call",
+        ge=1000,
+        le=150000
+    )
+    claude_stage2_chunk_max_videos: int = Field(
+        default=20,
+        description="Max videos per Stage 2 call (bounds the JSON answer size)",
+        ge=1,
+        le=100
+    )
+    claude_stage2_max_concurrent_chunks: int = Field(
+        default=4,
+        description="Max Stage 2 chunks sent to Claude in parallel per scanner",
+        ge=1,
+        le=20
+    )
+
+    # ============================================
+    # Claude HTTP backend (claude-code-api container)
+    # ============================================
+    claude_http_enabled: bool = Field(
+        default=False,
+        description="Use the claude-code-api container (HTTP) as Claude backend instead of the Anthropic SDK"
+    )
+    claude_api_url: str = Field(
+        default="http://liftlio-claude-api:10100",
+        description="claude-code-api base URL (container name for Docker-to-Docker)"
+    )
+    claude_http_max_connections: int = Field(
+        default=10,
+        description="Max pooled keep-alive connections to claude-code-api",
+        ge=1,
+        le=100
+    )
+    claude_http_stream_enabled: bool = Field(
+        default=True,
+        description="Stream verdicts from /chat/stream (falls back to /chat when missing)"
+    )
+    claude_http_keepalive_expiry: float = Field(
+        default=120.0,
+        description="Idle time before a pooled claude-code-api connection is closed (seconds)",
+        ge=1.0,
+        le=3600.0
+    )
 
     # ============================================
     # Supabase
@@ -51,6 +144,18 @@ class Settings(BaseSettings):
         description="Supabase anon/service key",
         min_length=100
     )
+    supabase_timeout: int = Field(
+        default=30,
+        description="Supabase RPC request timeout (seconds)",
+        ge=5,
+        le=120
+    )
+    supabase_max_connections: int = Field(
+        default=20,
+        description="Max pooled HTTP connections to Supabase PostgREST",
+        ge=1,
+        le=100
+    )
 
     # ============================================
     # Transcription API
@@ -85,12 +190,158 @@ class Settings(BaseSettings):
         ge=60,
         le=600
     )
+    transcript_batch_size: int = Field(
+        default=25,
+        description="Videos per /transcribe-batch request (1 = one /transcribe POST per video)",
+        ge=1,
+        le=200
+    )
+    batch_max_concurrent_scanners: int = Field(
+        default=5,
+        description="Max scanners qualified in parallel by /qualify-videos/batch",
+        ge=1,
+        le=50
+    )
+    pipeline_stage2_batch_size: int = Field(
+        default=5,
+        description="Stage 2 micro-batch size: videos sent to Claude as soon as this many transcripts arrive",
+        ge=1,
+        le=100
+    )
+    pipeline_stage2_batch_wait_ms: int = Field(
+        default=500,
+        description="Send a partial Stage 2 micro-batch when no transcript arrived for this long (ms)",
+        ge=0,
+        le=60000
+    )
     youtube_max_results: int = Field(
         default=20,
         description="Max videos to fetch from YouTube",
         ge=1,
         le=50
     )
+    youtube_timeout: int = Field(
+        default=30,
+        description="YouTube Data API request timeout (seconds)",
+        ge=5,
+        le=120
+    )
+    youtube_max_connections: int = Field(
+        default=20,
+        description="Max pooled HTTP connections to the YouTube Data API",
+        ge=1,
+        le=100
+    )
+    youtube_max_concurrent_batches: int = Field(
+        default=10,
+        description="Max 50-ID videos.list batches sent in parallel",
+        ge=1,
+        le=50
+    )
+    youtube_daily_quota: int = Field(
+        default=10000,
+        description="Daily YouTube Data API quota of each key (units)",
+        ge=1
+    )
+    youtube_quota_low_priority_reserve: float = Field(
+        default=0.3,
+        description="Budget fraction kept back from LOW priority calls (comments)",
+        ge=0.0,
+        le=1.0
+    )
+    youtube_quota_normal_priority_reserve: float = Field(
+        default=0.05,
+        description="Budget fraction kept back from NORMAL priority calls",
+        ge=0.0,
+        le=1.0
+    )
+
+    # ============================================
+    # Video Metadata Cache (SQLite)
+    # ============================================
+    video_cache_enabled: bool = Field(
+        default=True,
+        description="Cache videos.list results locally"
+    )
+    video_cache_path: str = Field(
+        default="data/video_cache.db",
+        description="SQLite file for the video metadata cache"
+    )
+    video_cache_metadata_ttl: int = Field(
+        default=7 * 24 * 3600,
+        description="TTL for title/description/tags/duration (seconds)",
+        ge=0
+    )
+    video_cache_statistics_ttl: int = Field(
+        default=3600,
+        description="TTL for view/like/comment counts (seconds)",
+        ge=0
+    )
+
+    # ============================================
+    # Similarity Pre-rank (before Claude Stage 1)
+    # ============================================
+    prerank_enabled: bool = Field(
+        default=False,
+        description="Reject videos unrelated to the product description before Stage 1"
+    )
+    prerank_model: str = Field(
+        default="",
+        description="sentence-transformers model (empty = hashing TF-IDF, no extra dependency)"
+    )
+    prerank_embedding_threshold: float = Field(
+        default=0.15,
+        description="Min cosine similarity to reach Stage 1 (embedding model; untuned placeholder)",
+        ge=0.0,
+        le=1.0
+    )
+    prerank_tfidf_threshold: float = Field(
+        default=0.02,
+        description="Min cosine similarity to reach Stage 1 (TF-IDF fallback; untuned placeholder)",
+        ge=0.0,
+        le=1.0
+    )
+
+    # ============================================
+    # Verdict Cache (SQLite)
+    # ============================================
+    verdict_cache_enabled: bool = Field(
+        default=True,
+        description="Reuse Claude Stage 1/Stage 2 verdicts for the same video, product and prompt"
+    )
+    verdict_cache_path: str = Field(
+        default="data/verdict_cache.db",
+        description="SQLite file for the verdict cache"
+    )
+    verdict_cache_ttl: int = Field(
+        default=30 * 24 * 3600,
+        description="TTL for cached verdicts (seconds)",
+        ge=0
+    )
+
+    # ============================================
+    # Project Context Cache (in-process)
+    # ============================================
+    project_cache_enabled: bool = Field(
+        default=True,
+        description="Cache project name/description/country per scanner"
+    )
+    project_cache_max_entries: int = Field(
+        default=1000,
+        description="Max scanners kept in the project cache (LRU)",
+        ge=1
+    )
+    project_cache_ttl: int = Field(
+        default=600,
+        description="TTL for cached project data (seconds)",
+        ge=0
+    )
+
+    @property
+    def youtube_api_key_list(self) -> List[str]:
+        """All configured YouTube keys (primary first, no duplicates)"""
+        extra = [key.strip() for key in self.youtube_api_keys.split(",")]
+        return list(dict.fromkeys([self.youtube_api_key] + [key for key in extra if key]))
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -106,7 +357,7 @@ class Settings(BaseSettings):
 try:
     settings = Settings()
     print(f"✅ Configuration loaded successfully")
-    print(f"   YouTube API: {'*' * 20}{settings.youtube_api_key[-10:]}")
+    print(f"   YouTube API: {'*' * 20}{settings.youtube_api_key[-10:]} ({len(settings.youtube_api_key_list)} key(s))")
     print(f"   Claude Model: {settings.claude_model}")
     print(f"   Supabase URL: {settings.supabase_url}")
     print(f"   Transcript API: {settings.transcript_api_url}")
@@ -0,0 +1,113 @@
+"""
+Prompt Chunking
+Token estimation and size-balanced chunk planning for Claude prompts
+"""
+
+import math
+from typing import Callable, List, Optional
+from models import VideoData
+from core.parsers import format_video_for_claude
+
+
+# Portuguese text averages ~3.5 characters per token
+CHARS_PER_TOKEN = 3.5
+
+
+def estimate_video_tokens(
+    video: VideoData,
+    format_video: Callable[[VideoData], str] = format_video_for_claude
+) -> int:
+    """
+    Estimate prompt tokens of a video
+
+    Args:
+        video: VideoData object (transcript included)
+        format_video: Formatter used in the prompt (Stage 2 format by default)
+
+    Returns:
+        Approximate token count
+    """
+    return math.ceil(len(format_video(video)) / CHARS_PER_TOKEN)
+
+
+def _assign_lpt(
+    tokens: List[int],
+    chunk_count: int,
+    token_budget: int,
+    max_videos: int
+) -> Optional[List[int]]:
+    """
+    Assign videos largest-first to the lightest chunk with room (LPT)
+
+    A chunk has room if it is under max_videos and the video fits in the
+    token budget (an empty chunk always takes it, even if oversized).
+
+    Returns:
+        Chunk index per video, or None if some video fits in no chunk
+    """
+    loads = [0] * chunk_count
+    sizes = [0] * chunk_count
+    assignment = [0] * len(tokens)
+
+    for index in sorted(range(len(tokens)), key=lambda i: tokens[i], reverse=True):
+        candidates = [
+            c for c in range(chunk_count)
+            if sizes[c] < max_videos
+            and (sizes[c] == 0 or loads[c] + tokens[index] <= token_budget)
+        ]
+        if not candidates:
+            return None
+        target = min(candidates, key=lambda c: loads[c])
+        assignment[index] = target
+        loads[target] += tokens[index]
+        sizes[target] += 1
+
+    return assignment
+
+
+def plan_chunks(
+    videos: List[VideoData],
+    token_budget: int,
+    max_videos: int,
+    format_video: Callable[[VideoData], str] = format_video_for_claude
+) -> List[List[VideoData]]:
+    """
+    Split videos into size-balanced chunks under a token budget
+
+    Starts from the minimum number of chunks that respects both limits and
+    assigns videos largest-first to the lightest chunk with room (LPT);
+    whenever a video fits in no chunk, one more chunk is opened and the
+    assignment is redone, so chunks stay under the budget and finish at
+    about the same time when run concurrently. A single video larger than
+    the budget gets a chunk of its own. Input order is kept inside each
+    chunk.
+
+    Args:
+        videos: Videos to analyze
+        token_budget: Max estimated prompt tokens per chunk
+        max_videos: Max videos per chunk (bounds the JSON answer size)
+        format_video: Formatter used in the prompt, for token estimates
+
+    Returns:
+        List of chunks (empty list if no videos)
+    """
+    if not videos:
+        return []
+
+    tokens = [estimate_video_tokens(video, format_video) for video in videos]
+    chunk_count = max(
+        math.ceil(sum(tokens) / token_budget),
+        math.ceil(len(videos) / max_videos)
+    )
+
+    # Terminates: with one chunk per video every video fits
+    assignment = _assign_lpt(tokens, chunk_count, token_budget, max_videos)
+    while assignment is None:
+        chunk_count += 1
+        assignment = _assign_lpt(tokens, chunk_count, token_budget, max_videos)
+
+    chunks: List[List[VideoData]] = [[] for _ in range(chunk_count)]
+    for index, video in enumerate(videos):
+        chunks[assignment[index]].append(video)
+
+    return [chunk for chunk in chunks if chunk]
@@ -3,10 +3,15 @@ Data Parsers
 Utilities for formatting data for Claude and merging video data
 """
 
-from typing import List, Dict
+import json
+from typing import List, Dict, Tuple
 from models import VideoData, ProjectData
 
 
+# Stage 2 verdict for videos of a failed Claude call (retried next scan)
+STAGE2_FAILED_REASON = "⚠️ SKIPPED｜ Falha na análise deste lote; tentar novamente"
+
+
 def format_video_for_claude(video: VideoData) -> str:
     """
     Format a single video for Claude prompt
@@ -57,13 +62,13 @@ def merge_video_data(
     Merge video data from different sources
 
     Combines:
-    - Basic video info from channel query
-    - Detailed video stats from video details query
+    - Basic video info and detailed video stats, both produced from the
+      same videos.list response by YouTubeService.get_videos_enriched()
     - Transcriptions from transcript API
 
     Args:
-        basic_videos: List of basic video dicts from get_channel_videos()
-        detailed_videos: List of VideoData from get_video_details()
+        basic_videos: List of basic video dicts (get_videos_enriched()[0])
+        detailed_videos: List of VideoData (get_videos_enriched()[1])
         transcripts: Dict mapping video_id -> transcription
 
     Returns:
@@ -115,3 +120,108 @@ def format_videos_for_prompt(videos: List[VideoData]) -> str:
 
 Lembre-se: responda APENAS com os IDs separados por vírgula ou "NOT".
 Nenhuma explicação ou texto adicional!"""
+
+
+class JSONVerdictParser:
+    """
+    Incremental parser for Claude's flat `{"video_id": "decision", ...}` answers
+
+    Text is fed as it streams in and each complete key/value pair is
+    returned as soon as its closing quote arrives, so callers can act on
+    early verdicts before the model finishes. Anything before the first
+    `{` (e.g. a ```json fence) and after the closing `}` is ignored.
+    Non-string values are returned as their raw JSON text.
+    """
+
+    def __init__(self):
+        self.state = "start"
+        self.key = ""
+        self._raw: List[str] = []
+        self._escape = False
+        self._depth = 0
+
+    @property
+    def done(self) -> bool:
+        """True once the closing brace of the object was read"""
+        return self.state == "done"
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """
+        Consume the next piece of the answer
+
+        Args:
+            text: Next streamed text chunk (any size, may split tokens)
+
+        Returns:
+            List of (video_id, decision) pairs completed by this chunk
+        """
+        pairs: List[Tuple[str, str]] = []
+
+        for char in text:
+            state = self.state
+
+            if state == "start":
+                if char == "{":
+                    self.state = "key"
+            elif state == "key":
+                if char == '"':
+                    self.state = "key_string"
+                elif char == "}":
+                    self.state = "done"
+            elif state in ("key_string", "value_string"):
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    decoded = self._decode()
+                    if state == "key_string":
+                        self.key = decoded
+                        self.state = "colon"
+                    else:
+                        pairs.append((self.key, decoded))
+                        self.state = "next"
+                    continue
+                self._raw.append(char)
+            elif state == "colon":
+                if char == ":":
+                    self.state = "value"
+            elif state == "value":
+                if char == '"':
+                    self.state = "value_string"
+                elif not char.isspace():
+                    self.state = "value_raw"
+                    self._depth = 0
+                    self._feed_raw(char, pairs)
+            elif state == "value_raw":
+                self._feed_raw(char, pairs)
+            elif state == "next":
+                if char == ",":
+                    self.state = "key"
+                elif char == "}":
+                    self.state = "done"
+
+        return pairs
+
+    def _feed_raw(self, char: str, pairs: List[Tuple[str, str]]):
+        """Collect a non-string value (number, bool, nested) until it ends"""
+        if self._depth == 0 and char in ",}":
+            pairs.append((self.key, "".join(self._raw).strip()))
+            self._raw = []
+            self.state = "key" if char == "," else "done"
+            return
+
+        if char in "{[":
+            self._depth += 1
+        elif char in "}]":
+            self._depth -= 1
+        self._raw.append(char)
+
+    def _decode(self) -> str:
+        """Decode the collected JSON string body (escapes included)"""
+        raw = "".join(self._raw)
+        self._raw = []
+        try:
+            return json.loads(f'"{raw}"')
+        except ValueError:
+            return raw
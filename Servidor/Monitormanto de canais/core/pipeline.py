@@ -0,0 +1,286 @@
+"""
+Qualification Pipeline
+Streams videos through Stage 1 → transcript → Stage 2 over async queues
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+
+from models import VideoData, ProjectData
+from core.parsers import STAGE2_FAILED_REASON
+from services.verdict_cache import VerdictCache
+
+
+# Tells a downstream stage that its producers are done
+_END = None
+
+
+class QualificationPipeline:
+    """
+    Pipelined Stage 1 → transcript → Stage 2 execution
+
+    Instead of barriers between stages (all Stage 1 verdicts, then all
+    transcripts, then Stage 2), each video moves on as soon as it can:
+
+    - every Stage 1 PASS is queued for transcript fetching right away
+    - `transcript_workers` fetch transcripts concurrently; with
+      `transcript_batch_size` > 1 a worker takes every PASS already
+      queued (up to that size) into one streamed batch request
+    - transcripts are collected into Stage 2 micro-batches, sent once a
+      batch holds `stage2_batch_size` videos or no transcript arrived
+      for `stage2_batch_wait` seconds
+
+    End-to-end latency then tracks the slowest single video path rather
+    than the sum of each stage's slowest call. A failed Stage 2 batch
+    marks its videos as SKIPPED (unless every batch failed).
+
+    With a VerdictCache, cached Stage 1 decisions skip the Stage 1 call
+    and PASS videos with a cached Stage 2 verdict skip both the
+    transcript fetch and Stage 2.
+    """
+
+    def __init__(
+        self,
+        claude,
+        transcript,
+        transcript_workers: int,
+        stage2_batch_size: int,
+        stage2_batch_wait: float,
+        verdict_cache: Optional[VerdictCache] = None,
+        transcript_batch_size: int = 1
+    ):
+        """
+        Initialize pipeline
+
+        Args:
+            claude: Claude service (pre_filter_stream + full_analysis)
+            transcript: Transcript service (get_transcript / stream_batch_transcripts)
+            transcript_workers: Concurrent transcript fetches
+            stage2_batch_size: Send a Stage 2 micro-batch at this many videos
+            stage2_batch_wait: Send a partial micro-batch after this idle time (seconds)
+            verdict_cache: Persistent cache of Claude verdicts (None disables it)
+            transcript_batch_size: Max videos per transcript batch request (1 = per video)
+        """
+        self.claude = claude
+        self.transcript = transcript
+        self.transcript_workers = transcript_workers
+        self.stage2_batch_size = stage2_batch_size
+        self.stage2_batch_wait = stage2_batch_wait
+        self.verdict_cache = verdict_cache
+        self.transcript_batch_size = transcript_batch_size
+
+    async def run(
+        self,
+        videos: List[VideoData],
+        project: ProjectData,
+        scanner_id: Optional[int] = None
+    ) -> Tuple[Dict[str, str], Dict[str, str], Dict[str, str]]:
+        """
+        Qualify videos through the pipelined stages
+
+        Args:
+            videos: Enriched videos without transcripts
+            project: ProjectData with product context
+            scanner_id: Scanner ID (Stage 1 section label)
+
+        Returns:
+            Tuple of (stage1 decisions, transcripts of PASS videos, stage2 reasoning)
+
+        Raises:
+            Exception: If Stage 1 fails or every Stage 2 batch failed
+        """
+        videos_by_id = {video.id: video for video in videos}
+        transcript_queue: asyncio.Queue = asyncio.Queue()
+        stage2_queue: asyncio.Queue = asyncio.Queue()
+
+        stage1_results: Dict[str, str] = {}
+        transcripts: Dict[str, str] = {}
+        stage2_results: Dict[str, str] = {}
+
+        cached_stage1: Dict[str, str] = {}
+        cached_stage2: Dict[str, str] = {}
+        if self.verdict_cache:
+            video_ids = list(videos_by_id)
+            cached_stage1 = await self.verdict_cache.lookup(
+                "stage1", video_ids, project, self.claude.stage1_prompt_version
+            )
+            cached_stage2 = await self.verdict_cache.lookup(
+                "stage2", video_ids, project, self.claude.stage2_prompt_version
+            )
+            if cached_stage1 or cached_stage2:
+                logger.info(
+                    f"💾 [PIPELINE] Verdict cache: {len(cached_stage1)} Stage 1, "
+                    f"{len(cached_stage2)} Stage 2 hits of {len(video_ids)} videos"
+                )
+
+        def route(video_id: str, decision: str):
+            stage1_results[video_id] = decision
+            if decision != "PASS":
+                return
+            if video_id in cached_stage2:
+                stage2_results[video_id] = cached_stage2[video_id]
+            else:
+                transcript_queue.put_nowait(video_id)
+
+        async def stage1():
+            try:
+                for video_id, decision in cached_stage1.items():
+                    route(video_id, decision)
+
+                uncached = [video for video in videos if video.id not in cached_stage1]
+                if not uncached:
+                    return
+
+                fresh: Dict[str, str] = {}
+                async for video_id, decision in self.claude.pre_filter_stream(
+                    videos=uncached,
+                    project=project,
+                    scanner_id=scanner_id
+                ):
+                    if video_id not in videos_by_id or video_id in stage1_results:
+                        continue
+                    fresh[video_id] = decision
+                    route(video_id, decision)
+
+                # Videos the model left out of a (truncated) answer go on as
+                # PASS but stay out of the cache: they were never judged
+                defaulted = [video.id for video in uncached if video.id not in stage1_results]
+                if defaulted:
+                    logger.warning(
+                        f"⚠️ [PIPELINE] {len(defaulted)} videos missing from the Stage 1 answer, defaulting to PASS"
+                    )
+                for video_id in defaulted:
+                    route(video_id, "PASS")
+
+                if self.verdict_cache:
+                    await self.verdict_cache.store(
+                        "stage1", fresh, project, self.claude.stage1_prompt_version
+                    )
+            finally:
+                for _ in range(self.transcript_workers):
+                    transcript_queue.put_nowait(_END)
+
+        def deliver(video_id: str, text: str):
+            transcripts[video_id] = text
+            stage2_queue.put_nowait(video_id)
+
+        async def fetch_transcripts():
+            try:
+                while True:
+                    video_id = await transcript_queue.get()
+                    if video_id is _END:
+                        return
+
+                    if self.transcript_batch_size == 1:
+                        deliver(video_id, await self.transcript.get_transcript(video_id))
+                        continue
+
+                    # Take the PASS videos that queued up meanwhile into the same request
+                    batch = [video_id]
+                    finished = False
+                    while len(batch) < self.transcript_batch_size and not transcript_queue.empty():
+                        queued = transcript_queue.get_nowait()
+                        if queued is _END:
+                            finished = True
+                            break
+                        batch.append(queued)
+
+                    async for fetched_id, text in self.transcript.stream_batch_transcripts(batch):
+                        if fetched_id in batch and fetched_id not in transcripts:
+                            deliver(fetched_id, text)
+                    for missing_id in batch:
+                        if missing_id not in transcripts:
+                            deliver(missing_id, "")
+
+                    if finished:
+                        return
+            finally:
+                stage2_queue.put_nowait(_END)
+
+        async def stage2():
+            batches: List[Tuple[List[VideoData], asyncio.Task]] = []
+            batch: List[VideoData] = []
+            producers = self.transcript_workers
+
+            def flush():
+                nonlocal batch
+                if batch:
+                    task = asyncio.create_task(self.claude.full_analysis(batch, project))
+                    batches.append((batch, task))
+                    batch = []
+
+            try:
+                while producers:
+                    try:
+                        video_id = await asyncio.wait_for(
+                            stage2_queue.get(),
+                            timeout=self.stage2_batch_wait if batch else None
+                        )
+                    except asyncio.TimeoutError:
+                        flush()
+                        continue
+
+                    if video_id is _END:
+                        producers -= 1
+                        continue
+
+                    video = videos_by_id[video_id]
+                    video.transcript = transcripts[video_id]
+                    batch.append(video)
+                    if len(batch) >= self.stage2_batch_size:
+                        flush()
+
+                flush()
+                if not batches:
+                    return
+
+                if len(batches) > 1:
+                    logger.info(
+                        f"🔀 [PIPELINE] Stage 2 ran as {len(batches)} micro-batches "
+                        f"({', '.join(str(len(b)) for b, _ in batches)} videos)"
+                    )
+
+                outcomes = await asyncio.gather(
+                    *[task for _, task in batches],
+                    return_exceptions=True
+                )
+            finally:
+                for _, task in batches:
+                    task.cancel()
+
+            errors = []
+            fresh: Dict[str, str] = {}
+            for (batch_videos, _), outcome in zip(batches, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error(f"❌ [PIPELINE] Stage 2 batch of {len(batch_videos)} videos failed: {outcome}")
+                    errors.append(outcome)
+                    for video in batch_videos:
+                        stage2_results[video.id] = STAGE2_FAILED_REASON
+                    continue
+                stage2_results.update(outcome)
+                # A verdict made without transcript is not worth reusing
+                fresh.update({
+                    video.id: outcome[video.id]
+                    for video in batch_videos
+                    if video.id in outcome and video.transcript
+                })
+
+            if self.verdict_cache:
+                await self.verdict_cache.store(
+                    "stage2", fresh, project, self.claude.stage2_prompt_version
+                )
+
+            if errors and len(errors) == len(batches):
+                raise errors[0]
+
+        tasks = [asyncio.create_task(stage1()), asyncio.create_task(stage2())]
+        tasks += [asyncio.create_task(fetch_transcripts()) for _ in range(self.transcript_workers)]
+
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return stage1_results, transcripts, stage2_results
@@ -0,0 +1,274 @@
+"""
+Pre-ranking
+Local similarity filter that rejects obvious mismatches before Claude Stage 1
+"""
+
+import asyncio
+import hashlib
+import math
+import re
+import unicodedata
+from typing import Dict, List, Tuple
+from loguru import logger
+
+from models import VideoData, ProjectData
+
+try:
+    # Optional: CPU sentence embeddings (pulls torch + numpy)
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+
+# Feature space of the hashing TF-IDF fallback
+HASH_DIMENSIONS = 2 ** 18
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]{3,}")
+
+# Frequent PT/EN words that carry no topic
+STOPWORDS = frozenset("""
+a o e de da do das dos em no na nos nas um uma uns umas para por com sem que
+se como mais menos muito pouco seu sua seus suas ele ela eles elas voce voces
+isso este esta esse essa aqui ali ate sobre entre tambem quando onde porque
+ser ter fazer pode vai sao foi era esta estao tem video videos canal inscreva
+the and for with you your this that from are was were have has not but all
+can will just what about how more out get our they them their its into than
+subscribe channel video videos like share follow link description http https www com
+""".split())
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case and strip accents (so 'vídeo' and 'video' match)"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    """Words with 3+ chars, without stopwords"""
+    return [
+        token for token in TOKEN_PATTERN.findall(normalize_text(text))
+        if token not in STOPWORDS
+    ]
+
+
+def _hash_token(token: str) -> int:
+    """Stable feature index (Python's hash() is salted per process)"""
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little") % HASH_DIMENSIONS
+
+
+def hashing_tfidf(documents: List[str]) -> List[Dict[int, float]]:
+    """
+    L2-normalized sparse TF-IDF vectors over hashed features
+
+    IDF is computed over the given documents (the project text plus
+    the batch of videos), so words every video shares weigh less.
+
+    Args:
+        documents: Texts to vectorize
+
+    Returns:
+        One sparse vector (feature -> weight) per document
+    """
+    term_counts: List[Dict[int, int]] = []
+    document_frequency: Dict[int, int] = {}
+
+    for document in documents:
+        counts: Dict[int, int] = {}
+        for token in tokenize(document):
+            feature = _hash_token(token)
+            counts[feature] = counts.get(feature, 0) + 1
+        for feature in counts:
+            document_frequency[feature] = document_frequency.get(feature, 0) + 1
+        term_counts.append(counts)
+
+    total = len(documents)
+    vectors = []
+
+    for counts in term_counts:
+        vector = {
+            feature: (1 + math.log(count)) * (math.log((1 + total) / (1 + document_frequency[feature])) + 1)
+            for feature, count in counts.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        vectors.append({feature: weight / norm for feature, weight in vector.items()} if norm else {})
+
+    return vectors
+
+
+def sparse_cosine(query: Dict[int, float], vectors: List[Dict[int, float]]) -> List[float]:
+    """Cosine similarity of one normalized sparse vector against many"""
+    return [
+        sum(weight * query[feature] for feature, weight in vector.items() if feature in query)
+        for vector in vectors
+    ]
+
+
+def video_text(video: VideoData) -> str:
+    """Title, description and tags of a video (the Stage 1 inputs)"""
+    return " ".join([video.title, video.description[:1000], " ".join(video.tags or [])])
+
+
+def project_text(project: ProjectData) -> str:
+    """Product name and description"""
+    return f"{project.nome_produto} {project.descricao_servico}"
+
+
+class VideoPreRanker:
+    """
+    CPU-only similarity filter ahead of Claude Stage 1
+
+    Scores each video (title + description + tags) against the product
+    description and rejects videos below `threshold` without any LLM
+    call. Uses a sentence-transformers model when `model_name` is set
+    and the package is installed (one batched encode + matrix product),
+    otherwise a hashing TF-IDF with sparse cosine similarity.
+
+    The TF-IDF fallback stays in pure Python on purpose: it is the path
+    with no extra dependency (numpy only comes with sentence-transformers),
+    and its dict vectors cost O(words per video), far below a dense
+    2^18-wide array per video.
+
+    The default thresholds (0.15 embedding, 0.02 TF-IDF) are placeholders,
+    not calibrated values: tune them per backend against Stage 1 verdicts
+    (stats() reports the reject ratio) before relying on them.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        embedding_threshold: float,
+        tfidf_threshold: float
+    ):
+        """
+        Initialize pre-ranker
+
+        Args:
+            model_name: sentence-transformers model ("" = TF-IDF only)
+            embedding_threshold: Min cosine similarity with the embedding model
+            tfidf_threshold: Min cosine similarity with the TF-IDF fallback
+        """
+        self.model_name = model_name
+        self.embedding_threshold = embedding_threshold
+        self.tfidf_threshold = tfidf_threshold
+        self._model = None
+
+        if model_name and SentenceTransformer is None:
+            logger.warning(
+                f"⚠️ sentence-transformers not installed, pre-ranking with "
+                f"hashing TF-IDF instead of {model_name}"
+            )
+
+        # Counters
+        self.scored = 0
+        self.rejected = 0
+
+    @property
+    def backend(self) -> str:
+        """Scoring backend in use ("embedding" or "tfidf")"""
+        return "embedding" if self.model_name and SentenceTransformer is not None else "tfidf"
+
+    @property
+    def threshold(self) -> float:
+        """Rejection threshold of the active backend"""
+        return self.embedding_threshold if self.backend == "embedding" else self.tfidf_threshold
+
+    def _embedding_scores(self, query: str, documents: List[str]) -> List[float]:
+        """Blocking embedding scores (runs in a worker thread)"""
+        if self._model is None:
+            logger.info(f"📥 Loading pre-ranking model {self.model_name}...")
+            self._model = SentenceTransformer(self.model_name, device="cpu")
+
+        embeddings = self._model.encode(
+            [query] + documents,
+            batch_size=64,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        )
+        return (embeddings[1:] @ embeddings[0]).tolist()
+
+    def _tfidf_scores(self, query: str, documents: List[str]) -> List[float]:
+        """Blocking TF-IDF scores (runs in a worker thread)"""
+        vectors = hashing_tfidf([query] + documents)
+        return sparse_cosine(vectors[0], vectors[1:])
+
+    async def score(self, videos: List[VideoData], project: ProjectData) -> List[float]:
+        """
+        Similarity of each video to the product description
+
+        Args:
+            videos: Videos with metadata
+            project: ProjectData with product context
+
+        Returns:
+            Cosine similarity per video, in input order
+        """
+        if not videos:
+            return []
+
+        scorer = self._embedding_scores if self.backend == "embedding" else self._tfidf_scores
+        return await asyncio.to_thread(
+            scorer,
+            project_text(project),
+            [video_text(video) for video in videos]
+        )
+
+    async def split(
+        self,
+        videos: List[VideoData],
+        project: ProjectData
+    ) -> Tuple[List[VideoData], Dict[str, str]]:
+        """
+        Separate clear mismatches from videos that go to Claude
+
+        Nothing is rejected when the product description has no usable
+        words (the score would be meaningless).
+
+        Args:
+            videos: Videos with metadata
+            project: ProjectData with product context
+
+        Returns:
+            Tuple (kept videos, video_id -> rejection reason)
+        """
+        if not videos or not tokenize(project_text(project)):
+            return videos, {}
+
+        scores = await self.score(videos, project)
+        threshold = self.threshold
+
+        kept: List[VideoData] = []
+        rejected: Dict[str, str] = {}
+        for video, score in zip(videos, scores):
+            if score < threshold:
+                rejected[video.id] = (
+                    f"Pré-ranking; similaridade {score:.2f} abaixo de {threshold:.2f}; "
+                    f"tema sem relação com o produto"
+                )
+            else:
+                kept.append(video)
+
+        self.scored += len(videos)
+        self.rejected += len(rejected)
+
+        if rejected:
+            logger.info(
+                f"🧮 [PRE-RANK] {len(rejected)}/{len(videos)} videos below "
+                f"{threshold:.2f} ({self.backend}), skipped before Stage 1"
+            )
+
+        return kept, rejected
+
+    def stats(self) -> Dict:
+        """
+        Get pre-ranking statistics
+
+        Returns:
+            Dict with backend, threshold, scored and rejected counts
+        """
+        return {
+            "backend": self.backend,
+            "threshold": self.threshold,
+            "scored": self.scored,
+            "rejected": self.rejected,
+            "reject_ratio": round(self.rejected / self.scored, 4) if self.scored else 0.0,
+        }
@@ -5,16 +5,21 @@ Main pipeline for qualifying YouTube videos using semantic analysis
 
 import asyncio
 import time
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional
 from loguru import logger
 
 from models import QualificationResult
 from core.validators import validate_scanner_id, validate_qualified_ids
 from core.parsers import merge_video_data
+from core.pipeline import QualificationPipeline
+from core.prerank import VideoPreRanker
 from services.supabase_service import get_supabase_service
 from services.youtube_service import get_youtube_service
 from services.transcript_service import get_transcript_service
 from services.claude_service import get_claude_service
+from services.claude_service_http import get_claude_service as get_claude_http_service
+from services.verdict_cache import VerdictCache
+from config import get_settings
 
 
 class VideoQualifier:
@@ -23,12 +28,13 @@ class VideoQualifier:
 
     Orchestrates:
     1. Data fetching from Supabase (channel + project)
-    2. YouTube video discovery
-    3. Video enrichment (details only - NO transcripts yet)
-    4. Claude Stage 1 pre-filter (metadata only)
-    5. Transcript fetching (ONLY for approved videos)
-    6. Claude Stage 2 semantic analysis (with transcripts)
-    7. Result compilation
+    2. YouTube video fetch + enrichment in one request (NO transcripts yet)
+    3. Merge of basic and detailed video data
+    4. Pipelined, without barriers between stages:
+       a. Claude Stage 1 pre-filter (metadata only)
+       b. Transcript fetching (ONLY for approved videos, as each one passes)
+       c. Claude Stage 2 semantic analysis (micro-batches, as transcripts arrive)
+    5. Result compilation
     """
 
     def __init__(self):
@@ -36,7 +42,49 @@ class VideoQualifier:
         self.supabase = get_supabase_service()
         self.youtube = get_youtube_service()
         self.transcript = get_transcript_service()
-        self.claude = get_claude_service()
+
+        settings = get_settings()
+
+        # Claude backend: claude-code-api container (HTTP) or Anthropic SDK
+        if settings.claude_http_enabled:
+            self.claude = get_claude_http_service()
+        else:
+            self.claude = get_claude_service()
+
+        # Persistent Claude verdicts (same video + product + prompt version)
+        self.verdict_cache: Optional[VerdictCache] = None
+        if settings.verdict_cache_enabled:
+            self.verdict_cache = VerdictCache(
+                path=settings.verdict_cache_path,
+                ttl=settings.verdict_cache_ttl
+            )
+            logger.info(
+                f"✅ Verdict cache enabled "
+                f"(path: {settings.verdict_cache_path}, TTL: {settings.verdict_cache_ttl}s)"
+            )
+
+        # Optional local similarity filter ahead of Claude Stage 1
+        self.prerank: Optional[VideoPreRanker] = None
+        if settings.prerank_enabled:
+            self.prerank = VideoPreRanker(
+                model_name=settings.prerank_model,
+                embedding_threshold=settings.prerank_embedding_threshold,
+                tfidf_threshold=settings.prerank_tfidf_threshold
+            )
+            logger.info(
+                f"✅ Pre-rank enabled (backend: {self.prerank.backend}, "
+                f"threshold: {self.prerank.threshold})"
+            )
+
+        self.pipeline = QualificationPipeline(
+            claude=self.claude,
+            transcript=self.transcript,
+            transcript_workers=settings.max_concurrent_transcripts,
+            transcript_batch_size=settings.transcript_batch_size,
+            stage2_batch_size=settings.pipeline_stage2_batch_size,
+            stage2_batch_wait=settings.pipeline_stage2_batch_wait_ms / 1000,
+            verdict_cache=self.verdict_cache
+        )
         logger.info("✅ VideoQualifier initialized")
 
     async def process(self, scanner_id: int) -> QualificationResult:
@@ -60,6 +108,7 @@ class VideoQualifier:
             "videos_without_transcript": 0,
             "videos_analyzed": 0,
             "videos_qualified": 0,
+            "prerank_rejected": 0,
             "stage1_rejected": 0,
             "transcripts_skipped": 0
         }
@@ -72,14 +121,11 @@ class VideoQualifier:
             validate_scanner_id(scanner_id)
 
             # ============================================
-            # STEP 2: Fetch Supabase data (parallel)
+            # STEP 2: Fetch Supabase data (single RPC)
             # ============================================
             logger.info("📡 Fetching canal and project data from Supabase...")
 
-            canal_data, project_data = await asyncio.gather(
-                self.supabase.get_canal_e_videos(scanner_id),
-                self.supabase.get_dados_projeto(scanner_id)
-            )
+            canal_data, project_data = await self.supabase.get_scanner_context(scanner_id)
 
             # ⚠️ VALIDATION: Check if product name is empty
             if not project_data.nome_produto or project_data.nome_produto.strip() == "":
@@ -104,7 +150,7 @@ class VideoQualifier:
             )
 
             # ============================================
-            # STEP 3: Fetch YouTube videos BY ID (from queue)
+            # STEP 3: Fetch YouTube videos BY ID + details (from queue)
             # ============================================
 
             # Check if there are videos in the queue
@@ -130,7 +176,8 @@ class VideoQualifier:
                 f"(channel: {canal_data.youtube_channel_id})..."
             )
 
-            basic_videos = await self.youtube.get_channel_videos(
+            # Fetch-once: basic dicts + details from a single videos.list
+            basic_videos, detailed_videos = await self.youtube.get_videos_enriched(
                 video_ids=canal_data.videos,
                 channel_id=canal_data.youtube_channel_id
             )
@@ -156,21 +203,13 @@ class VideoQualifier:
                     stats=stats
                 )
 
-            video_ids = [v["video_id"] for v in basic_videos]
-            logger.success(f"✅ Found {len(video_ids)} new videos")
-
-            # ============================================
-            # STEP 4: Fetch video details (NO transcripts yet!)
-            # ============================================
-            logger.info("📊 Fetching video details...")
-
-            # Fetch ONLY details (no transcripts)
-            detailed_videos = await self.youtube.get_video_details(video_ids)
-
-            logger.success(f"✅ Details fetched for {len(detailed_videos)} videos")
+            logger.success(
+                f"✅ Found {len(basic_videos)} new videos "
+                f"(details fetched in the same request)"
+            )
 
             # ============================================
-            # STEP 5: Merge data WITHOUT transcripts
+            # STEP 4: Merge data WITHOUT transcripts
             # ============================================
             logger.info("🔗 Merging video data (without transcripts)...")
 
@@ -184,16 +223,34 @@ class VideoQualifier:
                 logger.error("❌ No videos after merging data")
                 raise ValueError("Failed to merge video data")
 
-            logger.success(f"✅ {len(enriched_videos_no_transcript)} videos ready for Stage 1 pre-filter")
+            # Local similarity pre-rank: drop clear mismatches before any LLM call
+            videos_for_claude = enriched_videos_no_transcript
+            prerank_rejections = {}
+            if self.prerank:
+                videos_for_claude, prerank_rejections = await self.prerank.split(
+                    enriched_videos_no_transcript,
+                    project_data
+                )
+                stats["prerank_rejected"] = len(prerank_rejections)
+
+            logger.success(f"✅ {len(videos_for_claude)} videos ready for Stage 1 pre-filter")
 
             # ============================================
-            # STEP 6: Claude Stage 1 - Pre-filter (metadata only)
+            # STEP 5: Pipelined Stage 1 → transcripts → Stage 2
             # ============================================
-            logger.info("🧠 Running Claude Stage 1 pre-filter (metadata only)...")
+            # PASS videos go to transcript fetching as soon as Stage 1
+            # decides them, and Stage 2 starts on micro-batches as
+            # transcripts arrive (no barrier between stages)
+            logger.info(
+                f"🧠 Running pipelined qualification for "
+                f"{len(enriched_videos_no_transcript)} videos "
+                f"(Stage 1 → transcripts → Stage 2)..."
+            )
 
-            stage1_results = await self.claude._pre_filter_stage(
-                videos=enriched_videos_no_transcript,
-                project=project_data
+            stage1_results, transcripts, stage2_analysis_dict = await self.pipeline.run(
+                videos=videos_for_claude,
+                project=project_data,
+                scanner_id=scanner_id
             )
 
             # Separate approved and rejected videos
@@ -209,15 +266,18 @@ class VideoQualifier:
 
             # Update stats
             stats["stage1_rejected"] = len(rejected_video_ids)
-            stats["transcripts_skipped"] = len(rejected_video_ids)
+            stats["transcripts_skipped"] = len(rejected_video_ids) + len(prerank_rejections)
 
             logger.success(
                 f"✅ Stage 1 complete: {len(approved_video_ids)} approved, "
                 f"{len(rejected_video_ids)} rejected"
             )
 
-            # Store Stage 1 rejections in final results
-            final_analysis_dict = {}
+            # Store pre-rank and Stage 1 rejections in final results
+            final_analysis_dict = {
+                vid: f"❌ REJECTED: {reason}"
+                for vid, reason in prerank_rejections.items()
+            }
             for vid in rejected_video_ids:
                 decision = stage1_results[vid]
                 if decision.startswith("PRE_FILTER_REJECT:"):
@@ -227,14 +287,18 @@ class VideoQualifier:
                 final_analysis_dict[vid] = f"❌ REJECTED: {reject_reason}"
 
             # ============================================
-            # STEP 7: Early return if no videos passed Stage 1
+            # STEP 6: Early return if no videos passed Stage 1
             # ============================================
             if not approved_video_ids:
+                skipped_count = len(rejected_video_ids) + len(prerank_rejections)
                 logger.warning(
-                    f"❌ Claude Stage 1 rejected ALL {len(rejected_video_ids)} videos "
-                    f"(skipping {len(rejected_video_ids)} transcript fetches)"
+                    f"❌ Pre-rank/Stage 1 rejected ALL {skipped_count} videos "
+                    f"(skipping {skipped_count} transcript fetches)"
                 )
-                warnings.append(f"All {len(rejected_video_ids)} videos rejected in Stage 1 pre-filter")
+                if rejected_video_ids:
+                    warnings.append(f"All {len(rejected_video_ids)} videos rejected in Stage 1 pre-filter")
+                if prerank_rejections:
+                    warnings.append(f"{len(prerank_rejections)} videos rejected by similarity pre-rank")
 
                 # Update final stats
                 stats["videos_analyzed"] = len(enriched_videos_no_transcript)
@@ -266,16 +330,8 @@ class VideoQualifier:
                 return result
 
             # ============================================
-            # STEP 8: Fetch transcripts ONLY for approved videos
+            # STEP 7: Transcript stats (fetched ONLY for approved videos)
             # ============================================
-            logger.info(
-                f"📝 Fetching transcripts for {len(approved_video_ids)} approved videos "
-                f"(skipping {len(rejected_video_ids)} rejected)..."
-            )
-
-            transcripts = await self.transcript.get_batch_transcripts(approved_video_ids)
-
-            # Count transcripts
             videos_with_transcript = sum(1 for t in transcripts.values() if t)
             videos_without_transcript = len(transcripts) - videos_with_transcript
             stats["videos_with_transcript"] = videos_with_transcript
@@ -301,45 +357,14 @@ class VideoQualifier:
             )
 
             # ============================================
-            # STEP 9: Merge data WITH transcripts (only approved videos)
+            # STEP 8: Stage 2 results (approved videos with transcripts)
             # ============================================
-            logger.info("🔗 Merging approved videos with transcripts...")
-
-            # Filter basic_videos and detailed_videos to only approved IDs
-            approved_basic_videos = [
-                v for v in basic_videos
-                if v["video_id"] in approved_video_ids
-            ]
-
-            approved_detailed_videos = [
-                v for v in detailed_videos
-                if v["id"] in approved_video_ids
+            approved_set = set(approved_video_ids)
+            enriched_videos_with_transcript = [
+                v for v in enriched_videos_no_transcript
+                if v.id in approved_set
             ]
 
-            enriched_videos_with_transcript = merge_video_data(
-                basic_videos=approved_basic_videos,
-                detailed_videos=approved_detailed_videos,
-                transcripts=transcripts
-            )
-
-            if not enriched_videos_with_transcript:
-                logger.error("❌ No approved videos after merging with transcripts")
-                raise ValueError("Failed to merge approved videos with transcripts")
-
-            logger.success(f"✅ {len(enriched_videos_with_transcript)} approved videos ready for Stage 2 analysis")
-
-            # ============================================
-            # STEP 10: Claude Stage 2 - Full semantic analysis (with transcripts)
-            # ============================================
-            logger.info("🧠 Running Claude Stage 2 semantic analysis (with transcripts)...")
-
-            # semantic_analysis now handles Stage 2 internally
-            # It will receive videos WITH transcripts
-            stage2_analysis_dict = await self.claude.semantic_analysis(
-                videos=enriched_videos_with_transcript,
-                project=project_data
-            )
-
             # Validate that all video IDs in analysis exist
             available_set = set(v.id for v in enriched_videos_with_transcript)
             stage2_analysis_dict = {
@@ -373,7 +398,7 @@ class VideoQualifier:
             )
 
             # ============================================
-            # STEP 11: Compile result
+            # STEP 9: Compile result
             # ============================================
             execution_time = time.time() - start_time
 
@@ -423,6 +448,77 @@ class VideoQualifier:
             )
 
 
+    async def process_batch(
+        self,
+        scanner_ids: List[int],
+        max_concurrent: int
+    ) -> AsyncIterator[QualificationResult]:
+        """
+        Process many scanners with bounded concurrency
+
+        Results are yielded as each scanner finishes, so a slow scanner
+        does not hold back the others. Duplicate IDs are processed once
+        and project context is shared through the Supabase project cache.
+
+        Args:
+            scanner_ids: Scanner IDs from Supabase
+            max_concurrent: Max scanners processed at the same time
+
+        Yields:
+            QualificationResult per scanner, in completion order
+        """
+        unique_ids = list(dict.fromkeys(scanner_ids))
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        logger.info(
+            f"📦 Starting batch qualification: {len(unique_ids)} scanners "
+            f"(max {max_concurrent} concurrent)"
+        )
+
+        async def run(scanner_id: int) -> QualificationResult:
+            async with semaphore:
+                return await self.process(scanner_id)
+
+        tasks = [asyncio.create_task(run(scanner_id)) for scanner_id in unique_ids]
+
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # Client disconnected mid-stream: stop the remaining scanners
+            for task in tasks:
+                task.cancel()
+
+
+    def verdict_cache_stats(self) -> Dict:
+        """
+        Get verdict cache statistics
+
+        Returns:
+            Dict with hits/misses per stage (empty if cache disabled)
+        """
+        if not self.verdict_cache:
+            return {}
+        return self.verdict_cache.stats()
+
+    def prerank_stats(self) -> Dict:
+        """
+        Get pre-rank statistics
+
+        Returns:
+            Dict with backend, threshold and rejections (empty if disabled)
+        """
+        if not self.prerank:
+            return {}
+        return self.prerank.stats()
+
+    async def close(self):
+        """Close the Claude backend in use and the verdict cache"""
+        await self.claude.close()
+        if self.verdict_cache:
+            self.verdict_cache.close()
+
+
 # ============================================
 # Singleton instance
 # ============================================
@@ -6,10 +6,16 @@ FastAPI server for video qualification endpoints
 import sys
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from loguru import logger
 
-from models import QualifyRequest, QualificationResult, HealthResponse
+from models import QualifyRequest, QualifyBatchRequest, QualificationResult, HealthResponse
 from core.qualifier import get_video_qualifier
+from services.youtube_service import get_youtube_service
+from services.transcript_service import get_transcript_service
+from services.supabase_service import get_supabase_service
+from services.claude_service import get_claude_service
+from services.claude_service_http import get_claude_service as get_claude_http_service
 from config import get_settings
 
 
@@ -139,6 +145,103 @@ async def qualify_videos(request: QualifyRequest):
         )
 
 
+@app.post("/qualify-videos/batch")
+async def qualify_videos_batch(request: QualifyBatchRequest):
+    """
+    Qualify videos from many scanners in one request
+
+    Scanners run through the same pipeline as /qualify-videos with
+    bounded concurrency. Results are streamed as NDJSON (one
+    QualificationResult per line) in completion order. A failed scanner
+    yields a result with success=false instead of aborting the batch.
+
+    Args:
+        request: QualifyBatchRequest with scanner_ids
+
+    Returns:
+        StreamingResponse: application/x-ndjson stream of QualificationResult
+    """
+    logger.info(
+        f"📥 Received batch qualification request for "
+        f"{len(request.scanner_ids)} scanners"
+    )
+
+    qualifier = get_video_qualifier()
+    max_concurrent = get_settings().batch_max_concurrent_scanners
+
+    async def stream_results():
+        succeeded = failed = 0
+        async for result in qualifier.process_batch(request.scanner_ids, max_concurrent):
+            if result.success:
+                succeeded += 1
+            else:
+                failed += 1
+            yield result.model_dump_json() + "\n"
+
+        logger.success(
+            f"✅ Batch qualification finished: {succeeded} succeeded, {failed} failed"
+        )
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Runtime metrics endpoint
+
+    Returns:
+        dict: Cache and quota counters per component
+    """
+    youtube = get_youtube_service()
+    metrics = {
+        "youtube_quota": youtube.quota_stats(),
+        "youtube_cache": youtube.cache_stats(),
+        "project_cache": get_supabase_service().project_cache_stats(),
+        "verdict_cache": get_video_qualifier().verdict_cache_stats(),
+        "prerank": get_video_qualifier().prerank_stats()
+    }
+
+    # Stats of the Claude backend the qualifier uses
+    if get_settings().claude_http_enabled:
+        metrics["claude_http_pool"] = get_claude_http_service().pool_stats()
+    else:
+        metrics["claude_stage1"] = get_claude_service().stage1_stats()
+        metrics["claude_usage"] = get_claude_service().usage_stats()
+
+    return metrics
+
+
+@app.delete("/cache/project/{scanner_id}")
+async def invalidate_project_cache(scanner_id: int):
+    """
+    Drop cached project data of one scanner
+
+    Call after editing the project (name, description, country) so the
+    next qualification reads fresh data.
+
+    Args:
+        scanner_id: Scanner ID
+
+    Returns:
+        dict: Number of entries removed
+    """
+    removed = get_supabase_service().invalidate_project_cache(scanner_id)
+    return {"scanner_id": scanner_id, "invalidated": removed}
+
+
+@app.delete("/cache/project")
+async def clear_project_cache():
+    """
+    Drop all cached project data
+
+    Returns:
+        dict: Number of entries removed
+    """
+    removed = get_supabase_service().invalidate_project_cache()
+    return {"invalidated": removed}
+
+
 # ============================================
 # Startup/Shutdown Events
 # ============================================
@@ -156,12 +259,23 @@ async def startup_event():
     logger.info(f"   Log Level: {settings.log_level}")
     logger.info("=" * 60)
 
+    # Open keep-alive pool to claude-code-api before the first request
+    if settings.claude_http_enabled:
+        await get_claude_http_service().start()
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
     logger.info("🛑 Video Qualifier API Shutting down...")
 
+    # Release pooled HTTP connections
+    await get_youtube_service().close()
+    await get_transcript_service().close()
+    await get_supabase_service().close()
+    # Closes only the Claude backend it selected (HTTP or SDK)
+    await get_video_qualifier().close()
+
 
 # ============================================
 # Run Server (for local testing)
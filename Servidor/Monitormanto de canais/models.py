@@ -23,6 +23,30 @@ class QualifyRequest(BaseModel):
         }
 
 
+class QualifyBatchRequest(BaseModel):
+    """Request to qualify videos from many channel scanners at once"""
+    scanner_ids: List[int] = Field(
+        ...,
+        description="Scanner IDs from Supabase (duplicates are processed once)",
+        min_length=1,
+        max_length=500
+    )
+
+    @validator('scanner_ids')
+    def validate_scanner_ids(cls, v):
+        """Validate every scanner ID is positive"""
+        if any(scanner_id <= 0 for scanner_id in v):
+            raise ValueError("Scanner IDs must be positive integers")
+        return v
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "scanner_ids": [123, 456, 789]
+            }
+        }
+
+
 # ============================================
 # Response Models
 # ============================================
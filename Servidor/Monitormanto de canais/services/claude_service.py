@@ -3,19 +3,27 @@ Claude Service
 Handles semantic analysis using Claude Sonnet 4.5 with 2-stage filtering
 """
 
-from typing import List, Dict
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
+import asyncio
 import json
-from anthropic import Anthropic
+import httpx
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
 from loguru import logger
 
 from config import get_settings
 from models import VideoData, ProjectData
+from core.chunking import plan_chunks
+from core.parsers import STAGE2_FAILED_REASON, JSONVerdictParser
+from services.stage1_coalescer import Stage1Coalescer
+from services.verdict_cache import prompt_version
 
 
 # ============================================
 # STAGE 1: Pre-filter Prompt (no transcript)
 # ============================================
-STAGE1_PROMPT_TEMPLATE = """TAREFA: Pré-filtro rápido - Determinar se vídeos PODEM SER relevantes com base APENAS em metadados (título, descrição, tags).
+# Static instructions only: sent as a cached system block, the product
+# context goes in a separate block (PROJECT_CONTEXT_TEMPLATE) after it.
+STAGE1_SYSTEM_PROMPT = """TAREFA: Pré-filtro rápido - Determinar se vídeos PODEM SER relevantes com base APENAS em metadados (título, descrição, tags).
 
 REGRAS DE PRÉ-FILTRO:
 1. APROVAR (PASS) se houver QUALQUER INDICAÇÃO de que o vídeo pode abordar o nicho/função do produto
@@ -36,24 +44,21 @@ Retorne um objeto JSON onde cada chave é o video_id e o valor é:
 - "PRE_FILTER_REJECT: [motivo breve, max 80 chars]" se claramente irrelevante
 
 Exemplo:
-{{
+{
   "abc123": "PASS",
   "xyz789": "PRE_FILTER_REJECT: Vídeo sobre culinária; produto é SaaS B2B",
   "def456": "PASS"
-}}
+}
 
 ATENÇÃO: Use EXATAMENTE o prefixo "PRE_FILTER_REJECT:" (não use "REJECT:")
-Isso indica que o vídeo foi rejeitado no pré-filtro (Stage 1) antes da análise completa.
-
-Nome do produto ou serviço: {nome_produto}
-
-Descrição do produto ou serviço: {descricao_servico}"""
+Isso indica que o vídeo foi rejeitado no pré-filtro (Stage 1) antes da análise completa."""
 
 
 # ============================================
 # STAGE 2: Full Analysis Prompt (with transcript)
 # ============================================
-STAGE2_PROMPT_TEMPLATE = """TAREFA: Determinar se vídeos são EXTREMAMENTE relevantes para o produto/serviço descrito.
+# Static instructions only (see STAGE 1).
+STAGE2_SYSTEM_PROMPT = """TAREFA: Determinar se vídeos são EXTREMAMENTE relevantes para o produto/serviço descrito.
 
 REGRAS ESTRITAS DE AVALIAÇÃO:
 1. O vídeo DEVE abordar EXATAMENTE o mesmo nicho/função descrito na seção "Nome do produto ou serviço" abaixo
@@ -82,35 +87,171 @@ Formato da justificativa:
 - Se DADOS INSUFICIENTES para análise: "⚠️ SKIPPED: [problema encontrado - ex: transcrição vazia]"
 
 Exemplo de resposta válida:
-{{
+{
   "abc123": "✅ APPROVED: Vídeo sobre AI marketing B2B; target enterprise alinhado; menção natural possível",
   "xyz789": "❌ REJECTED: Público iniciante em marketing digital; produto é enterprise; mismatch de audiência",
   "def456": "⚠️ SKIPPED: Transcrição vazia; impossível avaliar conteúdo semântico"
-}}
+}
 
 IMPORTANTE:
-- Se NENHUM vídeo qualificado (todos rejected/skipped): retorne {{"result": "NOT"}}
+- Se NENHUM vídeo qualificado (todos rejected/skipped): retorne {"result": "NOT"}
 - Justificativas em PT-BR, objetivas, claras
 - Use ponto-e-vírgula (;) ao invés de vírgulas nas justificativas
 - Máximo 120 caracteres por justificativa
 - Retorne APENAS o JSON, sem markdown ou texto adicional
-- Use EXATAMENTE os prefixos: ✅ APPROVED, ❌ REJECTED, ⚠️ SKIPPED
+- Use EXATAMENTE os prefixos: ✅ APPROVED, ❌ REJECTED, ⚠️ SKIPPED"""
 
-Nome do produto ou serviço: {nome_produto}
+
+# ============================================
+# Per-project suffix (appended after the cached prefix)
+# ============================================
+PROJECT_CONTEXT_TEMPLATE = """Nome do produto ou serviço: {nome_produto}
 
 Descrição do produto ou serviço: {descricao_servico}"""
 
 
+# Per-video prompt builders (_format_video_light/_full, their truncation
+# limits, _build_stage1_user_prompt, the Stage 2 user prompt) are code, not
+# templates: bump these when editing them so cached verdicts are invalidated
+STAGE1_USER_PROMPT_VERSION = "1"
+STAGE2_USER_PROMPT_VERSION = "1"
+
+
 class ClaudeService:
     """Service for Claude AI semantic analysis with 2-stage filtering"""
 
     def __init__(self):
-        """Initialize Anthropic client"""
+        """Initialize async Anthropic client over a shared connection pool"""
         settings = get_settings()
-        self.client = Anthropic(api_key=settings.claude_api_key)
+        self.client = AsyncAnthropic(
+            api_key=settings.claude_api_key,
+            max_retries=settings.claude_max_retries,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.claude_max_connections,
+                    max_keepalive_connections=settings.claude_max_connections
+                )
+            )
+        )
+        self.stage1_timeout = settings.claude_stage1_timeout
+        self.stage2_timeout = settings.claude_stage2_timeout
         self.model = settings.claude_model
+
+        # Verdict cache keys: change with any prompt template, builder version or model edit
+        self.stage1_prompt_version = prompt_version(
+            STAGE1_SYSTEM_PROMPT, PROJECT_CONTEXT_TEMPLATE, STAGE1_USER_PROMPT_VERSION, self.model
+        )
+        self.stage2_prompt_version = prompt_version(
+            STAGE2_SYSTEM_PROMPT, PROJECT_CONTEXT_TEMPLATE, STAGE2_USER_PROMPT_VERSION, self.model
+        )
+
+        # Stage 2 chunking (token budget per call, chunks run in parallel)
+        self.stage2_chunk_token_budget = settings.claude_stage2_chunk_token_budget
+        self.stage2_chunk_max_videos = settings.claude_stage2_chunk_max_videos
+        self.stage2_max_concurrent_chunks = settings.claude_stage2_max_concurrent_chunks
+
+        # Packs Stage 1 work of concurrent scanners (same product) into one call
+        self.stage1_coalescer: Optional[Stage1Coalescer] = None
+        if settings.claude_stage1_coalesce_enabled:
+            self.stage1_coalescer = Stage1Coalescer(
+                runner=self._pre_filter_stage,
+                window=settings.claude_stage1_coalesce_window_ms / 1000,
+                max_videos=settings.claude_stage1_coalesce_max_videos
+            )
+
+        # Cumulative token usage (prompt cache effectiveness)
+        self.usage_totals = {
+            "calls": 0,
+            "input_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+            "output_tokens": 0,
+        }
+
         logger.info(f"✅ Claude AI client initialized (model: {self.model})")
 
+    def _build_system(self, static_prompt: str, project: ProjectData) -> List[Dict[str, Any]]:
+        """
+        Build system blocks: cached static instructions + project context
+
+        The static block is identical for every scanner, so it carries the
+        cache breakpoint; only the short project suffix is billed at the
+        full input rate on cache hits. The API only caches prefixes above
+        the model minimum (4096 tokens on Haiku 4.5), so with the current
+        prompts the breakpoint is a no-op until the static text grows.
+
+        Args:
+            static_prompt: STAGE1_SYSTEM_PROMPT or STAGE2_SYSTEM_PROMPT
+            project: ProjectData with product context
+
+        Returns:
+            List of system content blocks
+        """
+        return [
+            {
+                "type": "text",
+                "text": static_prompt,
+                "cache_control": {"type": "ephemeral"}
+            },
+            {
+                "type": "text",
+                "text": PROJECT_CONTEXT_TEMPLATE.format(
+                    nome_produto=project.nome_produto,
+                    descricao_servico=project.descricao_servico
+                )
+            }
+        ]
+
+    def _log_usage(self, stage: str, usage: Any):
+        """
+        Log token usage with prompt cache reads vs writes
+
+        Args:
+            stage: Log prefix (e.g., "STAGE 1")
+            usage: response.usage from the Messages API
+        """
+        input_tokens = usage.input_tokens
+        output_tokens = usage.output_tokens
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+
+        # Cache writes cost 1.25x, cache reads 0.1x the input rate
+        estimated_cost = (
+            (input_tokens + cache_write * 1.25 + cache_read * 0.1) / 1_000_000 * 3
+            + output_tokens / 1_000_000 * 15
+        )
+
+        self.usage_totals["calls"] += 1
+        self.usage_totals["input_tokens"] += input_tokens
+        self.usage_totals["cache_creation_input_tokens"] += cache_write
+        self.usage_totals["cache_read_input_tokens"] += cache_read
+        self.usage_totals["output_tokens"] += output_tokens
+
+        logger.info(
+            f"[{stage}] Tokens: {input_tokens:,} input + {output_tokens:,} output | "
+            f"cache read {cache_read:,} / write {cache_write:,} "
+            f"(~${estimated_cost:.4f})"
+        )
+
+    def usage_stats(self) -> Dict:
+        """
+        Get cumulative token usage
+
+        Returns:
+            Dict with token totals and prompt cache read ratio
+        """
+        totals = dict(self.usage_totals)
+        prompt_tokens = (
+            totals["input_tokens"]
+            + totals["cache_creation_input_tokens"]
+            + totals["cache_read_input_tokens"]
+        )
+        totals["cache_read_ratio"] = (
+            round(totals["cache_read_input_tokens"] / prompt_tokens, 4)
+            if prompt_tokens else 0.0
+        )
+        return totals
+
     def _format_video_light(self, video: VideoData) -> str:
         """
         Format a single video for Stage 1 (pre-filter) - NO TRANSCRIPT
@@ -153,50 +294,182 @@ Views: {video.view_count:,} | Likes: {video.like_count:,} | Comments: {video.com
 Tags: {', '.join(video.tags[:10]) if video.tags else 'N/A'}
 Transcrição: {transcript}..."""
 
-    async def _pre_filter_stage(
+    def _build_stage1_user_prompt(
         self,
         videos: List[VideoData],
-        project: ProjectData
+        groups: Optional[Dict[str, List[VideoData]]] = None
+    ) -> str:
+        """
+        Build the Stage 1 user prompt - metadata only, no transcript
+
+        Args:
+            videos: List of VideoData objects
+            groups: Optional section name -> videos (several scanners in one call)
+
+        Returns:
+            User prompt text
+        """
+        if groups and len(groups) > 1:
+            videos_text = "\n\n".join([
+                f"=== SEÇÃO: {section} ===\n" + "\n---\n".join([
+                    self._format_video_light(v) for v in section_videos
+                ])
+                for section, section_videos in groups.items()
+            ])
+            sections_note = (
+                "\nOs vídeos estão agrupados em seções (uma por scanner). "
+                "Retorne UM ÚNICO objeto JSON com os video_ids de TODAS as seções."
+            )
+        else:
+            videos_text = "\n---\n".join([
+                self._format_video_light(v) for v in videos
+            ])
+            sections_note = ""
+
+        return f"""VÍDEOS PARA PRÉ-FILTRO:
+
+{videos_text}
+
+Lembre-se: responda APENAS com o JSON no formato especificado.{sections_note}
+Para cada vídeo, retorne "PASS" ou "PRE_FILTER_REJECT: motivo breve"."""
+
+    async def pre_filter(
+        self,
+        videos: List[VideoData],
+        project: ProjectData,
+        scanner_id: Optional[int] = None
     ) -> Dict[str, str]:
         """
-        STAGE 1: Pre-filter videos using metadata only (no transcript)
+        STAGE 1 entry point: coalesced with concurrent scanners when enabled
 
         Args:
             videos: List of VideoData objects
             project: ProjectData with product context
+            scanner_id: Scanner ID (section label in batched prompts)
 
         Returns:
             Dict mapping video_id -> "PASS" or "PRE_FILTER_REJECT: motivo"
+            (videos the model left out are missing)
 
         Raises:
             Exception: If Claude API fails
         """
+        if not self.stage1_coalescer:
+            return await self._pre_filter_stage(videos, project)
+
+        label = f"scanner {scanner_id}" if scanner_id else None
+        return await self.stage1_coalescer.submit(videos, project, label)
+
+    async def pre_filter_stream(
+        self,
+        videos: List[VideoData],
+        project: ProjectData,
+        scanner_id: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        STAGE 1 as (video_id, decision) pairs for the qualification pipeline
+
+        Without coalescing, verdicts are parsed from the streamed answer and
+        yielded as soon as each one is complete, so transcript fetches for
+        PASS videos start before the model finishes. A coalesced call is
+        shared with other scanners, so its verdicts are yielded together
+        once it returns. Videos the model left out are not yielded; the
+        caller defaults them.
+
+        Args:
+            videos: List of VideoData objects
+            project: ProjectData with product context
+            scanner_id: Scanner ID (section label in batched prompts)
+
+        Yields:
+            (video_id, "PASS" or "PRE_FILTER_REJECT: motivo") pairs
+
+        Raises:
+            Exception: If Claude API fails
+        """
+        if self.stage1_coalescer:
+            decisions = await self.pre_filter(videos, project, scanner_id)
+            for video_id, decision in decisions.items():
+                yield video_id, decision
+            return
+
+        logger.info(f"🔍 [STAGE 1] Streaming pre-filter of {len(videos)} videos...")
+
+        pending = {video.id for video in videos}
+        parser = JSONVerdictParser()
+
         try:
-            logger.info(f"🔍 [STAGE 1] Pre-filtering {len(videos)} videos (metadata only)...")
+            async with self.client.messages.stream(
+                model=self.model,
+                max_tokens=max(800, 40 * len(videos)),
+                timeout=self.stage1_timeout,
+                system=self._build_system(STAGE1_SYSTEM_PROMPT, project),
+                messages=[
+                    {"role": "user", "content": self._build_stage1_user_prompt(videos)}
+                ]
+            ) as stream:
+                async for text in stream.text_stream:
+                    for video_id, decision in parser.feed(text):
+                        if video_id in pending:
+                            pending.discard(video_id)
+                            yield video_id, decision
 
-            # Format system prompt with product context
-            system_prompt = STAGE1_PROMPT_TEMPLATE.format(
-                nome_produto=project.nome_produto,
-                descricao_servico=project.descricao_servico
-            )
+                final_message = await stream.get_final_message()
+                self._log_usage("STAGE 1", final_message.usage)
 
-            # Format videos for user prompt (WITHOUT transcript)
-            videos_text = "\n---\n".join([
-                self._format_video_light(v) for v in videos
-            ])
+        except Exception as e:
+            logger.error(f"❌ [STAGE 1] Error in streaming pre-filter: {e}")
+            raise
 
-            user_prompt = f"""VÍDEOS PARA PRÉ-FILTRO:
+        if not parser.done:
+            logger.warning("⚠️ Streamed Claude answer ended before the JSON object was closed")
 
-{videos_text}
+    def stage1_stats(self) -> Dict:
+        """
+        Get Stage 1 coalescing statistics
 
-Lembre-se: responda APENAS com o JSON no formato especificado.
-Para cada vídeo, retorne "PASS" ou "PRE_FILTER_REJECT: motivo breve"."""
+        Returns:
+            Dict with requests vs Claude calls (empty if coalescing disabled)
+        """
+        if not self.stage1_coalescer:
+            return {}
+        return self.stage1_coalescer.stats()
+
+    async def _pre_filter_stage(
+        self,
+        videos: List[VideoData],
+        project: ProjectData,
+        groups: Optional[Dict[str, List[VideoData]]] = None
+    ) -> Dict[str, str]:
+        """
+        STAGE 1: Pre-filter videos using metadata only (no transcript)
+
+        Args:
+            videos: List of VideoData objects
+            project: ProjectData with product context
+            groups: Optional section name -> videos (several scanners in one
+                call); `videos` must then hold all of them
+
+        Returns:
+            Dict mapping video_id -> "PASS" or "PRE_FILTER_REJECT: motivo"
+
+        Raises:
+            Exception: If Claude API fails
+        """
+        try:
+            logger.info(f"🔍 [STAGE 1] Pre-filtering {len(videos)} videos (metadata only)...")
+
+            # Cached static instructions + product context
+            system_prompt = self._build_system(STAGE1_SYSTEM_PROMPT, project)
+
+            user_prompt = self._build_stage1_user_prompt(videos, groups)
 
             # Call Claude API
             logger.debug("Sending Stage 1 request to Claude API...")
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model=self.model,
-                max_tokens=800,  # Stage 1 needs fewer tokens
+                max_tokens=max(800, 40 * len(videos)),  # Stage 1 needs fewer tokens (~40/video)
+                timeout=self.stage1_timeout,
                 system=system_prompt,
                 messages=[
                     {"role": "user", "content": user_prompt}
@@ -229,14 +502,7 @@ Para cada vídeo, retorne "PASS" ou "PRE_FILTER_REJECT: motivo breve"."""
                 )
 
                 # Log tokens used
-                input_tokens = response.usage.input_tokens
-                output_tokens = response.usage.output_tokens
-                estimated_cost = (input_tokens / 1_000_000 * 3) + (output_tokens / 1_000_000 * 15)
-
-                logger.info(
-                    f"[STAGE 1] Tokens: {input_tokens:,} input + {output_tokens:,} output "
-                    f"(~${estimated_cost:.4f})"
-                )
+                self._log_usage("STAGE 1", response.usage)
 
                 return result_dict
 
@@ -249,6 +515,175 @@ Para cada vídeo, retorne "PASS" ou "PRE_FILTER_REJECT: motivo breve"."""
             logger.error(f"❌ [STAGE 1] Error in pre-filter: {e}")
             raise
 
+    async def _analysis_stage(
+        self,
+        videos: List[VideoData],
+        project: ProjectData,
+        chunk_label: str = ""
+    ) -> Dict[str, str]:
+        """
+        STAGE 2: Full analysis of one chunk of videos (with transcript)
+
+        Args:
+            videos: Videos approved by Stage 1 (with transcripts)
+            project: ProjectData with product context
+            chunk_label: Log suffix (e.g., " chunk 2/3")
+
+        Returns:
+            Dict mapping video_id -> sanitized reasoning
+            (empty if Claude answered NOT or the JSON was invalid)
+
+        Raises:
+            Exception: If Claude API fails
+        """
+        logger.info(f"🔍 [STAGE 2{chunk_label}] Analyzing {len(videos)} videos with full context...")
+
+        # Cached static instructions + product context
+        system_prompt = self._build_system(STAGE2_SYSTEM_PROMPT, project)
+
+        # Format videos for user prompt (WITH transcript)
+        videos_text = "\n---\n".join([
+            self._format_video_full(v) for v in videos
+        ])
+
+        user_prompt = f"""VÍDEOS PARA ANÁLISE:
+
+{videos_text}
+
+Lembre-se: responda APENAS com o JSON no formato especificado.
+Para cada vídeo, forneça uma justificativa clara em PT-BR usando os prefixos ✅ APPROVED, ❌ REJECTED ou ⚠️ SKIPPED."""
+
+        # Call Claude API
+        logger.debug("Sending Stage 2 request to Claude API...")
+        response = await self.client.messages.create(
+            model=self.model,
+            max_tokens=1500,  # Increased for detailed reasoning
+            timeout=self.stage2_timeout,
+            system=system_prompt,
+            messages=[
+                {"role": "user", "content": user_prompt}
+            ]
+        )
+
+        # Extract response
+        result = response.content[0].text.strip()
+
+        logger.debug(f"Stage 2 raw response: {result[:200]}...")
+
+        # Log tokens used (for cost tracking)
+        self._log_usage(f"STAGE 2{chunk_label}", response.usage)
+
+        # Parse JSON response
+        try:
+            # Remove markdown code blocks if present
+            if result.startswith("```"):
+                result = result.split("```")[1]
+                if result.startswith("json"):
+                    result = result[4:]
+                result = result.strip()
+
+            stage2_dict = json.loads(result)
+
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ [STAGE 2{chunk_label}] Failed to parse Claude JSON response: {e}")
+            logger.error(f"Raw response was: {result}")
+            return {}
+
+        # Check if response is "NOT" (no videos qualified)
+        if "result" in stage2_dict and stage2_dict["result"] == "NOT":
+            logger.info(f"❌ [STAGE 2{chunk_label}] No videos qualified (all rejected/skipped)")
+            return {}
+
+        # Sanitize reasoning values (remove problematic characters)
+        clean_results = {}
+        for video_id, reasoning in stage2_dict.items():
+            # Replace commas and colons that could break CSV format
+            clean_reasoning = reasoning.replace(',', ';').replace(':', '｜', 1)
+            # Replace any additional colons with semicolon
+            clean_reasoning = clean_reasoning.replace(':', ';')
+            # Truncate to 120 chars max
+            clean_reasoning = clean_reasoning[:120]
+            clean_results[video_id] = clean_reasoning
+
+        return clean_results
+
+    async def full_analysis(
+        self,
+        videos: List[VideoData],
+        project: ProjectData
+    ) -> Dict[str, str]:
+        """
+        STAGE 2 entry point: token-budget chunks analyzed concurrently
+
+        Videos are split into size-balanced chunks under the configured
+        token budget, chunks run in parallel (bounded) and their JSON
+        answers are merged, so latency stays flat as the queue grows.
+        A failed chunk marks its videos as SKIPPED instead of failing
+        the whole scanner (unless every chunk failed).
+
+        Args:
+            videos: Videos approved by Stage 1 (with transcripts)
+            project: ProjectData with product context
+
+        Returns:
+            Dict mapping video_id -> reasoning (e.g., "✅ APPROVED: motivo...")
+
+        Raises:
+            Exception: If every chunk failed
+        """
+        chunks = plan_chunks(
+            videos,
+            token_budget=self.stage2_chunk_token_budget,
+            max_videos=self.stage2_chunk_max_videos,
+            format_video=self._format_video_full
+        )
+        if not chunks:
+            return {}
+
+        if len(chunks) > 1:
+            logger.info(
+                f"✂️ [STAGE 2] {len(videos)} videos split into {len(chunks)} chunks "
+                f"({', '.join(str(len(chunk)) for chunk in chunks)} videos)"
+            )
+
+        semaphore = asyncio.Semaphore(self.stage2_max_concurrent_chunks)
+
+        async def run_chunk(index: int, chunk: List[VideoData]) -> Dict[str, str]:
+            label = f" chunk {index + 1}/{len(chunks)}" if len(chunks) > 1 else ""
+            async with semaphore:
+                return await self._analysis_stage(chunk, project, label)
+
+        chunk_results = await asyncio.gather(
+            *[run_chunk(i, chunk) for i, chunk in enumerate(chunks)],
+            return_exceptions=True
+        )
+
+        final_results = {}
+        errors = []
+        for chunk, chunk_result in zip(chunks, chunk_results):
+            if isinstance(chunk_result, Exception):
+                logger.error(f"❌ [STAGE 2] Chunk of {len(chunk)} videos failed: {chunk_result}")
+                errors.append(chunk_result)
+                for video in chunk:
+                    final_results[video.id] = STAGE2_FAILED_REASON
+                continue
+            final_results.update(chunk_result)
+
+        if errors and len(errors) == len(chunks):
+            raise errors[0]
+
+        # Count final results
+        approved_count = sum(1 for r in final_results.values() if "✅ APPROVED" in r)
+        rejected_count = sum(1 for r in final_results.values() if "❌ REJECTED" in r)
+        skipped_count = sum(1 for r in final_results.values() if "⚠️ SKIPPED" in r)
+
+        logger.success(
+            f"✅ [STAGE 2] Full analysis complete: "
+            f"{approved_count} approved, {rejected_count} rejected, {skipped_count} skipped"
+        )
+
+        return final_results
+
     async def semantic_analysis(
         self,
         videos: List[VideoData],
@@ -309,107 +744,31 @@ Para cada vídeo, retorne "PASS" ou "PRE_FILTER_REJECT: motivo breve"."""
             # ============================================
             # STAGE 2: Full analysis (WITH transcript)
             # ============================================
-            logger.info(f"🔍 [STAGE 2] Analyzing {len(approved_videos)} videos with full context...")
-
-            # Format system prompt with product context
-            system_prompt = STAGE2_PROMPT_TEMPLATE.format(
-                nome_produto=project.nome_produto,
-                descricao_servico=project.descricao_servico
-            )
+            final_results.update(await self.full_analysis(approved_videos, project))
 
-            # Format videos for user prompt (WITH transcript)
-            videos_text = "\n---\n".join([
-                self._format_video_full(v) for v in approved_videos
-            ])
+            approved_count = sum(1 for r in final_results.values() if "✅ APPROVED" in r)
+            rejected_count = sum(1 for r in final_results.values() if "❌ REJECTED" in r)
+            skipped_count = sum(1 for r in final_results.values() if "⚠️ SKIPPED" in r)
 
-            user_prompt = f"""VÍDEOS PARA ANÁLISE:
-
-{videos_text}
-
-Lembre-se: responda APENAS com o JSON no formato especificado.
-Para cada vídeo, forneça uma justificativa clara em PT-BR usando os prefixos ✅ APPROVED, ❌ REJECTED ou ⚠️ SKIPPED."""
-
-            # Call Claude API
-            logger.debug("Sending Stage 2 request to Claude API...")
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1500,  # Increased for detailed reasoning
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": user_prompt}
-                ]
+            # Summary
+            logger.success(
+                f"🎯 2-STAGE ANALYSIS COMPLETE: "
+                f"{approved_count} approved | {rejected_count} rejected | {skipped_count} skipped"
             )
 
-            # Extract response
-            result = response.content[0].text.strip()
-
-            logger.debug(f"Stage 2 raw response: {result[:200]}...")
-
-            # Parse JSON response
-            try:
-                # Remove markdown code blocks if present
-                if result.startswith("```"):
-                    result = result.split("```")[1]
-                    if result.startswith("json"):
-                        result = result[4:]
-                    result = result.strip()
-
-                stage2_dict = json.loads(result)
-
-                # Check if response is "NOT" (no videos qualified)
-                if "result" in stage2_dict and stage2_dict["result"] == "NOT":
-                    logger.info("❌ [STAGE 2] No videos qualified (all rejected/skipped)")
-                    return final_results
-
-                # Sanitize reasoning values (remove problematic characters)
-                for video_id, reasoning in stage2_dict.items():
-                    # Replace commas and colons that could break CSV format
-                    clean_reasoning = reasoning.replace(',', ';').replace(':', '｜', 1)
-                    # Replace any additional colons with semicolon
-                    clean_reasoning = clean_reasoning.replace(':', ';')
-                    # Truncate to 120 chars max
-                    clean_reasoning = clean_reasoning[:120]
-                    final_results[video_id] = clean_reasoning
-
-                # Count final results
-                approved_count = sum(1 for r in final_results.values() if "✅ APPROVED" in r)
-                rejected_count = sum(1 for r in final_results.values() if "❌ REJECTED" in r)
-                skipped_count = sum(1 for r in final_results.values() if "⚠️ SKIPPED" in r)
-
-                logger.success(
-                    f"✅ [STAGE 2] Full analysis complete: "
-                    f"{approved_count} approved, {rejected_count} rejected, {skipped_count} skipped"
-                )
-
-                # Log tokens used (for cost tracking)
-                input_tokens = response.usage.input_tokens
-                output_tokens = response.usage.output_tokens
-                estimated_cost = (input_tokens / 1_000_000 * 3) + (output_tokens / 1_000_000 * 15)
-
-                logger.info(
-                    f"[STAGE 2] Tokens: {input_tokens:,} input + {output_tokens:,} output "
-                    f"(~${estimated_cost:.4f})"
-                )
-
-                # Summary
-                logger.success(
-                    f"🎯 2-STAGE ANALYSIS COMPLETE: "
-                    f"{approved_count} approved | {rejected_count} rejected | {skipped_count} skipped"
-                )
-
-                return final_results
-
-            except json.JSONDecodeError as e:
-                logger.error(f"❌ [STAGE 2] Failed to parse Claude JSON response: {e}")
-                logger.error(f"Raw response was: {result}")
-                # Return Stage 1 results if Stage 2 fails
-                return final_results
+            return final_results
 
         except Exception as e:
             logger.error(f"❌ Error in 2-stage analysis: {e}")
             raise
 
 
+    async def close(self):
+        """Close HTTP connection pool"""
+        await self.client.close()
+        logger.info("Claude AI client closed")
+
+
 # ============================================
 # Singleton instance
 # ============================================
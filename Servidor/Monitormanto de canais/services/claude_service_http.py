@@ -4,13 +4,18 @@ Handles semantic analysis using Claude via HTTP API (no Anthropic SDK required)
 Uses the claude-code-api container at port 10200
 """
 
-from typing import List, Dict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+import asyncio
 import json
+import time
 import httpx
 from loguru import logger
 
 from config import get_settings
 from models import VideoData, ProjectData
+from core.parsers import JSONVerdictParser
+from services.verdict_cache import prompt_version
 
 
 # ============================================
@@ -161,27 +166,149 @@ IMPORTANTE:
 # ============================================
 # API Configuration
 # ============================================
-import os
-# Container name for Docker-to-Docker communication, fallback to external IP
-CLAUDE_API_URL = os.environ.get("CLAUDE_API_URL", "http://liftlio-claude-api:10100")
 STAGE1_MODEL = "haiku"   # Fast/cheap for pre-filter
 STAGE2_MODEL = "opus"    # Most capable for full analysis
 
+# Per-video prompt builders (_format_video_light/_full, their truncation
+# limits, _build_stage1_prompt, _build_stage2_prompt) are code, not
+# templates: bump these when editing them so cached verdicts are invalidated
+STAGE1_USER_PROMPT_VERSION = "1"
+STAGE2_USER_PROMPT_VERSION = "1"
+
+
+# ============================================
+# Streaming (SSE) helpers
+# ============================================
+async def iter_sse_text(response: httpx.Response) -> AsyncIterator[str]:
+    """
+    Yield text deltas from a claude-code-api `/chat/stream` SSE response
+
+    Accepts `data:` payloads that are JSON events with a `text`, `delta`
+    or `content` string, JSON strings, or plain text. Stops at `[DONE]`
+    or a `done`/`end` event.
+
+    Args:
+        response: Open streaming response
+
+    Yields:
+        Text chunks in generation order
+
+    Raises:
+        Exception: If the stream reports an error event
+    """
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+
+        try:
+            event = json.loads(data)
+        except ValueError:
+            yield data
+            continue
+
+        if isinstance(event, str):
+            yield event
+            continue
+        if not isinstance(event, dict):
+            continue
+
+        if event.get("type") == "error" or event.get("success") is False:
+            raise Exception(f"API returned error: {event.get('error', 'Unknown error')}")
+        if event.get("type") in ("done", "end"):
+            return
+
+        for field in ("text", "delta", "content"):
+            if isinstance(event.get(field), str):
+                yield event[field]
+                break
+
 
 class ClaudeServiceHTTP:
-    """Service for Claude AI semantic analysis via HTTP API (no SDK required)"""
+    """
+    Service for Claude AI semantic analysis via HTTP API (no SDK required)
+
+    All calls share one long-lived httpx.AsyncClient, so connections to
+    the claude-code-api container are kept alive and reused instead of
+    reconnecting for every Stage 1 / Stage 2 request. Calls beyond
+    `max_connections` wait for a free slot; pool_stats() reports how
+    often and how long, to right-size the pool.
+    """
 
-    def __init__(self):
-        """Initialize HTTP client"""
+    def __init__(
+        self,
+        api_url: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None
+    ):
+        """
+        Initialize HTTP client settings (the pool is opened by start())
+
+        Args:
+            api_url: claude-code-api base URL (default: settings)
+            max_connections: Max pooled connections (default: settings)
+            keepalive_expiry: Idle seconds before a connection is dropped (default: settings)
+        """
         settings = get_settings()
-        self.api_url = CLAUDE_API_URL
+        self.api_url = api_url or settings.claude_api_url
+        self.max_connections = max_connections or settings.claude_http_max_connections
+        self.keepalive_expiry = keepalive_expiry or settings.claude_http_keepalive_expiry
         self.stage1_model = STAGE1_MODEL
         self.stage2_model = STAGE2_MODEL
+        self.stage1_prompt_version = prompt_version(
+            STAGE1_PROMPT_TEMPLATE, STAGE1_USER_PROMPT_VERSION, self.stage1_model
+        )
+        self.stage2_prompt_version = prompt_version(
+            STAGE2_PROMPT_TEMPLATE, STAGE2_USER_PROMPT_VERSION, self.stage2_model
+        )
+        self.stream_enabled = settings.claude_http_stream_enabled
+        self.client: Optional[httpx.AsyncClient] = None
+
+        # One slot per pooled connection: waiting here means the pool is saturated
+        self._slots = asyncio.Semaphore(self.max_connections)
+
+        # Pool counters
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.waiting = 0
+        self.requests_waited = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
         logger.info(f"✅ Claude HTTP client initialized")
         logger.info(f"   API URL: {self.api_url}")
         logger.info(f"   Stage 1 model: {self.stage1_model}")
         logger.info(f"   Stage 2 model: {self.stage2_model}")
 
+    async def start(self):
+        """Open the keep-alive connection pool (called at FastAPI startup)"""
+        if self.client is not None:
+            return
+
+        self.client = httpx.AsyncClient(
+            base_url=self.api_url,
+            timeout=120.0,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=self.keepalive_expiry
+            )
+        )
+        logger.info(f"🔌 Claude HTTP pool opened ({self.max_connections} connections)")
+
+    async def close(self):
+        """Close the connection pool (called at FastAPI shutdown)"""
+        if self.client is None:
+            return
+
+        await self.client.aclose()
+        self.client = None
+        logger.info("Claude HTTP client closed")
+
     async def _call_claude(
         self,
         prompt: str,
@@ -204,15 +331,16 @@ class ClaudeServiceHTTP:
         Raises:
             Exception: If API call fails
         """
-        async with httpx.AsyncClient(timeout=timeout) as client:
+        async with self._slot():
             try:
-                response = await client.post(
-                    f"{self.api_url}/chat",
+                response = await self.client.post(
+                    "/chat",
                     json={
                         "message": prompt,
                         "model": model,
                         "maxTurns": max_turns
-                    }
+                    },
+                    timeout=timeout
                 )
                 response.raise_for_status()
 
@@ -230,6 +358,135 @@ class ClaudeServiceHTTP:
                 logger.error(f"Error calling Claude API: {e}")
                 raise
 
+    async def _stream_claude(
+        self,
+        prompt: str,
+        model: str = "haiku",
+        max_turns: int = 1,
+        timeout: float = 120.0
+    ) -> AsyncIterator[str]:
+        """
+        Call Claude API via HTTP and yield the answer text as it is generated
+
+        Uses the SSE endpoint `/chat/stream`. If the container does not
+        expose it (404/405) or streaming is disabled, the whole `/chat`
+        answer is yielded as a single chunk instead.
+
+        Args:
+            prompt: The prompt to send (system + user combined)
+            model: Model to use (haiku, sonnet, opus)
+            max_turns: Maximum conversation turns
+            timeout: Request timeout in seconds
+
+        Yields:
+            Response text chunks
+
+        Raises:
+            Exception: If API call fails
+        """
+        if self.stream_enabled:
+            async with self._slot():
+                async with self.client.stream(
+                    "POST",
+                    "/chat/stream",
+                    json={
+                        "message": prompt,
+                        "model": model,
+                        "maxTurns": max_turns
+                    },
+                    timeout=timeout
+                ) as response:
+                    if response.status_code in (404, 405):
+                        # Older claude-code-api image: remember and use /chat
+                        self.stream_enabled = False
+                        logger.warning("⚠️ /chat/stream not available, falling back to /chat")
+                    else:
+                        response.raise_for_status()
+                        async for text in iter_sse_text(response):
+                            yield text
+                        return
+
+        yield await self._call_claude(prompt, model, max_turns, timeout)
+
+    async def stream_verdicts(
+        self,
+        prompt: str,
+        model: str = "haiku",
+        timeout: float = 120.0
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Stream a JSON verdict answer as (video_id, decision) pairs
+
+        Args:
+            prompt: Prompt asking for a flat `{"video_id": "decision"}` JSON object
+            model: Model to use (haiku, sonnet, opus)
+            timeout: Request timeout in seconds
+
+        Yields:
+            (video_id, decision) pairs as soon as each one is complete
+        """
+        parser = JSONVerdictParser()
+
+        async for text in self._stream_claude(prompt, model, max_turns=1, timeout=timeout):
+            for pair in parser.feed(text):
+                yield pair
+
+        if not parser.done:
+            logger.warning("⚠️ Streamed Claude answer ended before the JSON object was closed")
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one pooled connection slot, recording queue wait and in-flight calls"""
+        # Scripts that never ran the startup hook still get a pool
+        await self.start()
+
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self._record_wait(time.monotonic() - queued_at)
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def _record_wait(self, waited: float):
+        """Update pool wait counters after a call got its slot"""
+        self.requests += 1
+        # Sub-millisecond waits are just scheduling, not saturation
+        if waited >= 0.001:
+            self.requests_waited += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def pool_stats(self) -> Dict:
+        """
+        Get connection pool saturation statistics
+
+        Returns:
+            Dict with in-flight calls, queue length and slot wait times
+        """
+        return {
+            "open": self.client is not None,
+            "max_connections": self.max_connections,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "utilization": round(self.in_flight / self.max_connections, 4),
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "requests_waited": self.requests_waited,
+            "wait_ratio": round(self.requests_waited / self.requests, 4) if self.requests else 0.0,
+            "avg_wait_ms": round(self.wait_total / self.requests_waited * 1000, 1) if self.requests_waited else 0.0,
+            "max_wait_ms": round(self.wait_max * 1000, 1),
+        }
+
     def _format_video_light(self, video: VideoData) -> str:
         """
         Format a single video for Stage 1 (pre-filter) - NO TRANSCRIPT
@@ -272,47 +529,37 @@ Views: {video.view_count:,} | Likes: {video.like_count:,} | Comments: {video.com
 Tags: {', '.join(video.tags[:10]) if video.tags else 'N/A'}
 Transcrição: {transcript}..."""
 
-    async def _pre_filter_stage(
-        self,
-        videos: List[VideoData],
-        project: ProjectData
-    ) -> Dict[str, str]:
+    def _build_stage1_prompt(self, videos: List[VideoData], project: ProjectData) -> str:
         """
-        STAGE 1: Pre-filter videos using metadata only (no transcript)
+        Build the Stage 1 (pre-filter) prompt - metadata only, no transcript
 
         Args:
             videos: List of VideoData objects
             project: ProjectData with product context
 
         Returns:
-            Dict mapping video_id -> "PASS" or "PRE_FILTER_REJECT: motivo"
-
-        Raises:
-            Exception: If Claude API fails
+            Combined system + user prompt for the HTTP API
         """
-        try:
-            logger.info(f"🔍 [STAGE 1] Pre-filtering {len(videos)} videos (metadata only)...")
+        # Format system prompt with product context
+        system_prompt = STAGE1_PROMPT_TEMPLATE.format(
+            nome_produto=project.nome_produto,
+            descricao_servico=project.descricao_servico
+        )
 
-            # Format system prompt with product context
-            system_prompt = STAGE1_PROMPT_TEMPLATE.format(
-                nome_produto=project.nome_produto,
-                descricao_servico=project.descricao_servico
-            )
-
-            # Format videos for user prompt (WITHOUT transcript)
-            videos_text = "\n---\n".join([
-                self._format_video_light(v) for v in videos
-            ])
+        # Format videos for user prompt (WITHOUT transcript)
+        videos_text = "\n---\n".join([
+            self._format_video_light(v) for v in videos
+        ])
 
-            user_prompt = f"""VÍDEOS PARA PRÉ-FILTRO:
+        user_prompt = f"""VÍDEOS PARA PRÉ-FILTRO:
 
 {videos_text}
 
 Lembre-se: responda APENAS com o JSON no formato especificado.
 Para cada vídeo, retorne "PASS" ou "PRE_FILTER_REJECT: motivo breve"."""
 
-            # Combine prompts for HTTP API (Claude Code format)
-            full_prompt = f"""TASK: Video Pre-filter Analysis. Return ONLY JSON object, nothing else.
+        # Combine prompts for HTTP API (Claude Code format)
+        return f"""TASK: Video Pre-filter Analysis. Return ONLY JSON object, nothing else.
 
 {system_prompt}
 
@@ -320,6 +567,29 @@ Para cada vídeo, retorne "PASS" ou "PRE_FILTER_REJECT: motivo breve"."""
 
 OUTPUT: Return ONLY the JSON object with video decisions. No markdown, no explanation, just the JSON."""
 
+    async def _pre_filter_stage(
+        self,
+        videos: List[VideoData],
+        project: ProjectData
+    ) -> Dict[str, str]:
+        """
+        STAGE 1: Pre-filter videos using metadata only (no transcript)
+
+        Args:
+            videos: List of VideoData objects
+            project: ProjectData with product context
+
+        Returns:
+            Dict mapping video_id -> "PASS" or "PRE_FILTER_REJECT: motivo"
+
+        Raises:
+            Exception: If Claude API fails
+        """
+        try:
+            logger.info(f"🔍 [STAGE 1] Pre-filtering {len(videos)} videos (metadata only)...")
+
+            full_prompt = self._build_stage1_prompt(videos, project)
+
             # Call Claude API via HTTP
             logger.debug(f"Sending Stage 1 request to Claude API ({self.stage1_model})...")
             result = await self._call_claude(
@@ -362,6 +632,159 @@ OUTPUT: Return ONLY the JSON object with video decisions. No markdown, no explan
             logger.error(f"❌ [STAGE 1] Error in pre-filter: {e}")
             raise
 
+    async def pre_filter_stream(
+        self,
+        videos: List[VideoData],
+        project: ProjectData,
+        scanner_id: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        STAGE 1 in streaming mode: yield each verdict as soon as Claude writes it
+
+        Lets the qualifier start transcript fetches for PASS videos before
+        the whole answer is generated. Keys that are not video IDs of this
+        batch (e.g. {"result": "NOT"}) are dropped, and videos the model
+        left out are not yielded; the caller defaults them.
+
+        Args:
+            videos: List of VideoData objects
+            project: ProjectData with product context
+            scanner_id: Scanner ID (unused; same interface as ClaudeService)
+
+        Yields:
+            (video_id, "PASS" or "PRE_FILTER_REJECT: motivo") pairs
+
+        Raises:
+            Exception: If Claude API fails
+        """
+        logger.info(f"🔍 [STAGE 1] Streaming pre-filter of {len(videos)} videos...")
+
+        pending = {video.id for video in videos}
+        prompt = self._build_stage1_prompt(videos, project)
+
+        async for video_id, decision in self.stream_verdicts(prompt, self.stage1_model, timeout=120.0):
+            if video_id in pending:
+                pending.discard(video_id)
+                yield video_id, decision
+
+    def _build_stage2_prompt(self, videos: List[VideoData], project: ProjectData) -> str:
+        """
+        Build the Stage 2 (full analysis) prompt - with transcript
+
+        Args:
+            videos: List of VideoData objects (with transcripts)
+            project: ProjectData with product context
+
+        Returns:
+            Combined system + user prompt for the HTTP API
+        """
+        # Format system prompt with product context
+        system_prompt = STAGE2_PROMPT_TEMPLATE.format(
+            nome_produto=project.nome_produto,
+            descricao_servico=project.descricao_servico
+        )
+
+        # Format videos for user prompt (WITH transcript)
+        videos_text = "\n---\n".join([
+            self._format_video_full(v) for v in videos
+        ])
+
+        user_prompt = f"""VÍDEOS PARA ANÁLISE:
+
+{videos_text}
+
+Lembre-se: responda APENAS com o JSON no formato especificado.
+Para cada vídeo, forneça uma justificativa clara em PT-BR usando os prefixos ✅ APPROVED, ❌ REJECTED ou ⚠️ SKIPPED."""
+
+        # Combine prompts for HTTP API (Claude Code format)
+        return f"""TASK: Video Relevance Analysis. Return ONLY JSON object, nothing else.
+
+{system_prompt}
+
+{user_prompt}
+
+OUTPUT: Return ONLY the JSON object with video analysis results. No markdown, no explanation, just the JSON."""
+
+    async def full_analysis(
+        self,
+        videos: List[VideoData],
+        project: ProjectData
+    ) -> Dict[str, str]:
+        """
+        STAGE 2: Full analysis with transcript (same interface as ClaudeService)
+
+        Args:
+            videos: Videos approved by Stage 1 (with transcripts)
+            project: ProjectData with product context
+
+        Returns:
+            Dict mapping video_id -> reasoning (e.g., "✅ APPROVED｜ motivo...")
+            Returns empty dict if no videos qualified
+
+        Raises:
+            Exception: If Claude API fails or response is invalid
+        """
+        if not videos:
+            return {}
+
+        logger.info(f"🔍 [STAGE 2] Analyzing {len(videos)} videos with full context (model: {self.stage2_model})...")
+
+        full_prompt = self._build_stage2_prompt(videos, project)
+
+        # Call Claude API via HTTP (using OPUS for Stage 2)
+        logger.debug(f"Sending Stage 2 request to Claude API ({self.stage2_model})...")
+        result = await self._call_claude(
+            prompt=full_prompt,
+            model=self.stage2_model,
+            max_turns=1,
+            timeout=180.0  # Longer timeout for Opus
+        )
+
+        logger.debug(f"Stage 2 raw response: {result[:200]}...")
+
+        # Parse JSON response
+        try:
+            # Remove markdown code blocks if present
+            if result.startswith("```"):
+                result = result.split("```")[1]
+                if result.startswith("json"):
+                    result = result[4:]
+                result = result.strip()
+
+            stage2_dict = json.loads(result)
+
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ [STAGE 2] Failed to parse Claude JSON response: {e}")
+            logger.error(f"Raw response was: {result}")
+            raise
+
+        # Check if response is "NOT" (no videos qualified)
+        if "result" in stage2_dict and stage2_dict["result"] == "NOT":
+            logger.info("❌ [STAGE 2] No videos qualified (all rejected/skipped)")
+            return {}
+
+        # Sanitize reasoning values (remove problematic characters)
+        results = {}
+        for video_id, reasoning in stage2_dict.items():
+            # Replace commas and colons that could break CSV format
+            clean_reasoning = reasoning.replace(',', ';').replace(':', '｜', 1)
+            # Replace any additional colons with semicolon
+            clean_reasoning = clean_reasoning.replace(':', ';')
+            # Truncate to 120 chars max
+            clean_reasoning = clean_reasoning[:120]
+            results[video_id] = clean_reasoning
+
+        approved_count = sum(1 for r in results.values() if "✅ APPROVED" in r)
+        rejected_count = sum(1 for r in results.values() if "❌ REJECTED" in r)
+        skipped_count = sum(1 for r in results.values() if "⚠️ SKIPPED" in r)
+
+        logger.success(
+            f"✅ [STAGE 2] Full analysis complete: "
+            f"{approved_count} approved, {rejected_count} rejected, {skipped_count} skipped"
+        )
+
+        return results
+
     async def semantic_analysis(
         self,
         videos: List[VideoData],
@@ -422,95 +845,24 @@ OUTPUT: Return ONLY the JSON object with video decisions. No markdown, no explan
             # ============================================
             # STAGE 2: Full analysis (WITH transcript) - OPUS
             # ============================================
-            logger.info(f"🔍 [STAGE 2] Analyzing {len(approved_videos)} videos with full context (model: {self.stage2_model})...")
-
-            # Format system prompt with product context
-            system_prompt = STAGE2_PROMPT_TEMPLATE.format(
-                nome_produto=project.nome_produto,
-                descricao_servico=project.descricao_servico
-            )
-
-            # Format videos for user prompt (WITH transcript)
-            videos_text = "\n---\n".join([
-                self._format_video_full(v) for v in approved_videos
-            ])
-
-            user_prompt = f"""VÍDEOS PARA ANÁLISE:
-
-{videos_text}
-
-Lembre-se: responda APENAS com o JSON no formato especificado.
-Para cada vídeo, forneça uma justificativa clara em PT-BR usando os prefixos ✅ APPROVED, ❌ REJECTED ou ⚠️ SKIPPED."""
-
-            # Combine prompts for HTTP API (Claude Code format)
-            full_prompt = f"""TASK: Video Relevance Analysis. Return ONLY JSON object, nothing else.
-
-{system_prompt}
-
-{user_prompt}
-
-OUTPUT: Return ONLY the JSON object with video analysis results. No markdown, no explanation, just the JSON."""
-
-            # Call Claude API via HTTP (using OPUS for Stage 2)
-            logger.debug(f"Sending Stage 2 request to Claude API ({self.stage2_model})...")
-            result = await self._call_claude(
-                prompt=full_prompt,
-                model=self.stage2_model,
-                max_turns=1,
-                timeout=180.0  # Longer timeout for Opus
-            )
-
-            logger.debug(f"Stage 2 raw response: {result[:200]}...")
-
-            # Parse JSON response
             try:
-                # Remove markdown code blocks if present
-                if result.startswith("```"):
-                    result = result.split("```")[1]
-                    if result.startswith("json"):
-                        result = result[4:]
-                    result = result.strip()
-
-                stage2_dict = json.loads(result)
-
-                # Check if response is "NOT" (no videos qualified)
-                if "result" in stage2_dict and stage2_dict["result"] == "NOT":
-                    logger.info("❌ [STAGE 2] No videos qualified (all rejected/skipped)")
-                    return final_results
-
-                # Sanitize reasoning values (remove problematic characters)
-                for video_id, reasoning in stage2_dict.items():
-                    # Replace commas and colons that could break CSV format
-                    clean_reasoning = reasoning.replace(',', ';').replace(':', '｜', 1)
-                    # Replace any additional colons with semicolon
-                    clean_reasoning = clean_reasoning.replace(':', ';')
-                    # Truncate to 120 chars max
-                    clean_reasoning = clean_reasoning[:120]
-                    final_results[video_id] = clean_reasoning
-
-                # Count final results
-                approved_count = sum(1 for r in final_results.values() if "✅ APPROVED" in r)
-                rejected_count = sum(1 for r in final_results.values() if "❌ REJECTED" in r)
-                skipped_count = sum(1 for r in final_results.values() if "⚠️ SKIPPED" in r)
-
-                logger.success(
-                    f"✅ [STAGE 2] Full analysis complete: "
-                    f"{approved_count} approved, {rejected_count} rejected, {skipped_count} skipped"
-                )
+                final_results.update(await self.full_analysis(approved_videos, project))
+            except json.JSONDecodeError:
+                # Return Stage 1 results if Stage 2 fails
+                return final_results
 
-                # Summary
-                logger.success(
-                    f"🎯 2-STAGE ANALYSIS COMPLETE: "
-                    f"{approved_count} approved | {rejected_count} rejected | {skipped_count} skipped"
-                )
+            # Count final results
+            approved_count = sum(1 for r in final_results.values() if "✅ APPROVED" in r)
+            rejected_count = sum(1 for r in final_results.values() if "❌ REJECTED" in r)
+            skipped_count = sum(1 for r in final_results.values() if "⚠️ SKIPPED" in r)
 
-                return final_results
+            # Summary
+            logger.success(
+                f"🎯 2-STAGE ANALYSIS COMPLETE: "
+                f"{approved_count} approved | {rejected_count} rejected | {skipped_count} skipped"
+            )
 
-            except json.JSONDecodeError as e:
-                logger.error(f"❌ [STAGE 2] Failed to parse Claude JSON response: {e}")
-                logger.error(f"Raw response was: {result}")
-                # Return Stage 1 results if Stage 2 fails
-                return final_results
+            return final_results
 
         except Exception as e:
             logger.error(f"❌ Error in 2-stage analysis: {e}")
@@ -0,0 +1,122 @@
+"""
+Project Context Cache
+In-process LRU cache with TTL for ProjectData keyed by scanner ID
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from loguru import logger
+
+from models import ProjectData
+
+
+class ProjectContextCache:
+    """
+    LRU + TTL cache of validated ProjectData objects
+
+    Project name, description and country rarely change, so repeated
+    scans of the same scanner reuse the cached object instead of a
+    Supabase round-trip and a new Pydantic validation. Entries expire
+    after `ttl` seconds, the least recently used entry is evicted when
+    `max_entries` is reached, and edits can be pushed immediately via
+    invalidate().
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Max scanners kept in memory
+            ttl: Entry lifetime in seconds
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, Tuple[ProjectData, float]]" = OrderedDict()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, scanner_id: int) -> Optional[ProjectData]:
+        """
+        Get cached project data
+
+        Args:
+            scanner_id: Scanner ID
+
+        Returns:
+            ProjectData or None if missing/expired
+        """
+        entry = self._entries.get(scanner_id)
+
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            if entry is not None:
+                del self._entries[scanner_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(scanner_id)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, scanner_id: int, project_data: ProjectData):
+        """
+        Store project data
+
+        Args:
+            scanner_id: Scanner ID
+            project_data: Validated project data
+        """
+        self._entries[scanner_id] = (project_data, time.monotonic())
+        self._entries.move_to_end(scanner_id)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, scanner_id: Optional[int] = None) -> int:
+        """
+        Drop cached entries
+
+        Args:
+            scanner_id: Scanner to drop (None clears the whole cache)
+
+        Returns:
+            Number of entries removed
+        """
+        if scanner_id is None:
+            removed = len(self._entries)
+            self._entries.clear()
+        else:
+            removed = 1 if self._entries.pop(scanner_id, None) else 0
+
+        self.invalidations += removed
+        logger.info(
+            f"🧹 Project cache invalidated "
+            f"({'all' if scanner_id is None else f'scanner {scanner_id}'}): "
+            f"{removed} entries"
+        )
+        return removed
+
+    def stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict with size, hits, misses, hit_ratio, evictions and invalidations
+        """
+        total = self.hits + self.misses
+
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,195 @@
+"""
+Stage 1 Coalescer
+Micro-batches Claude Stage 1 pre-filter work from concurrent scanners
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Coroutine, Dict, List, Optional, Set, Tuple
+from loguru import logger
+
+from models import VideoData, ProjectData
+
+
+# (videos, project, groups) -> video_id -> "PASS" / "PRE_FILTER_REJECT: ..."
+Stage1Runner = Callable[
+    [List[VideoData], ProjectData, Dict[str, List[VideoData]]],
+    Awaitable[Dict[str, str]]
+]
+
+
+class _PendingBatch:
+    """Stage 1 work collected for one prompt during the coalescing window"""
+
+    def __init__(self, project: ProjectData):
+        self.project = project
+        self.groups: Dict[str, List[VideoData]] = {}
+        self.futures: Dict[str, asyncio.Future] = {}
+        self.video_count = 0
+        self.sent = False
+        self.timer: Optional[asyncio.Task] = None
+
+    def cancel_callers(self):
+        """Cancel callers still waiting (batch will never be answered)"""
+        for future in self.futures.values():
+            if not future.done():
+                future.cancel()
+
+
+class Stage1Coalescer:
+    """
+    Request coalescer for Claude Stage 1 pre-filter calls
+
+    Scanners that share the same product prompt and submit within
+    `window` seconds are packed into a single Claude call, one section
+    per scanner. The JSON answer is keyed by video ID and is split back
+    to each caller; videos the model left out default to PASS (Stage 1
+    is permissive by design). A batch is sent early once it holds
+    `max_videos` videos.
+
+    Trade-off: every Stage 1 call waits up to `window` for company and
+    gets its verdicts only when the whole batched answer is back, so the
+    streaming pre-filter is not used while coalescing is on.
+    """
+
+    def __init__(
+        self,
+        runner: Stage1Runner,
+        window: float,
+        max_videos: int
+    ):
+        """
+        Initialize coalescer
+
+        Args:
+            runner: Coroutine that runs one (possibly multi-section) Stage 1 call
+            window: Seconds to wait for other scanners before sending
+            max_videos: Send immediately once a batch reaches this size
+        """
+        self.runner = runner
+        self.window = window
+        self.max_videos = max_videos
+        self._pending: Dict[Tuple[str, str], _PendingBatch] = {}
+        self._sequence = 0
+        # Strong references: the loop only keeps weak ones to running tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Counters
+        self.requests = 0
+        self.calls = 0
+        self.videos = 0
+
+    async def submit(
+        self,
+        videos: List[VideoData],
+        project: ProjectData,
+        label: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Queue Stage 1 work and wait for its share of the batched answer
+
+        Args:
+            videos: Videos of one scanner
+            project: ProjectData with product context
+            label: Section name (e.g., "scanner 123")
+
+        Returns:
+            Dict mapping video_id -> "PASS" or "PRE_FILTER_REJECT: motivo"
+            (videos the model left out are missing)
+
+        Raises:
+            Exception: If the batched Claude call fails
+        """
+        key = (project.nome_produto, project.descricao_servico)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _PendingBatch(project)
+            self._pending[key] = batch
+            batch.timer = self._spawn(self._flush_later(key, batch))
+            batch.timer.add_done_callback(lambda _: self._abandon(key, batch))
+
+        self._sequence += 1
+        section = f"{label or 'grupo'} #{self._sequence}"
+        future = asyncio.get_running_loop().create_future()
+
+        batch.groups[section] = videos
+        batch.futures[section] = future
+        batch.video_count += len(videos)
+        self.requests += 1
+
+        if batch.video_count >= self.max_videos:
+            self._start_flush(key, batch)
+
+        decisions = await future
+        return {video.id: decisions[video.id] for video in videos if video.id in decisions}
+
+    def _spawn(self, coro: Coroutine) -> asyncio.Task:
+        """Start a background task and keep it referenced until it finishes"""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _start_flush(self, key: Tuple[str, str], batch: _PendingBatch):
+        """Close the batch to new work and send it"""
+        if batch.sent:
+            return
+        batch.sent = True
+        if self._pending.get(key) is batch:
+            del self._pending[key]
+        if batch.timer is not None and batch.timer is not asyncio.current_task():
+            batch.timer.cancel()
+        flush = self._spawn(self._flush(batch))
+        # Flush cancelled (even before it started): callers must not hang
+        flush.add_done_callback(lambda _: batch.cancel_callers())
+
+    def _abandon(self, key: Tuple[str, str], batch: _PendingBatch):
+        """Timer ended without sending (cancelled at shutdown): release callers"""
+        if batch.sent:
+            return
+        if self._pending.get(key) is batch:
+            del self._pending[key]
+        batch.cancel_callers()
+
+    async def _flush_later(self, key: Tuple[str, str], batch: _PendingBatch):
+        """Send the batch once the coalescing window closes"""
+        await asyncio.sleep(self.window)
+        self._start_flush(key, batch)
+
+    async def _flush(self, batch: _PendingBatch):
+        """Run one Claude call for every section and resolve the callers"""
+        all_videos = [video for videos in batch.groups.values() for video in videos]
+        self.calls += 1
+        self.videos += len(all_videos)
+
+        if len(batch.groups) > 1:
+            logger.info(
+                f"📦 [STAGE 1] Coalesced {len(batch.groups)} scanners "
+                f"({len(all_videos)} videos) into one call"
+            )
+
+        try:
+            decisions = await self.runner(all_videos, batch.project, batch.groups)
+        except Exception as e:
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future in batch.futures.values():
+            if not future.done():
+                future.set_result(decisions)
+
+    def stats(self) -> Dict:
+        """
+        Get coalescer statistics
+
+        Returns:
+            Dict with requests, Claude calls and batching ratios
+        """
+        return {
+            "requests": self.requests,
+            "calls": self.calls,
+            "calls_saved": max(0, self.requests - self.calls),
+            "avg_requests_per_call": round(self.requests / self.calls, 2) if self.calls else 0.0,
+            "avg_videos_per_call": round(self.videos / self.calls, 2) if self.calls else 0.0,
+        }
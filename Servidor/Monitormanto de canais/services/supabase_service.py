@@ -3,26 +3,144 @@ Supabase Service
 Handles Supabase RPC calls for channel and project data
 """
 
-from typing import Dict, Any
-from supabase import create_client, Client
+import asyncio
+from typing import Dict, Any, Optional, Tuple
+import httpx
 from loguru import logger
 
 from config import get_settings
 from models import CanalData, ProjectData
+from services.project_cache import ProjectContextCache
+
+
+class SupabaseRPCError(Exception):
+    """Error response returned by PostgREST for an RPC call"""
+
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(f"Supabase RPC error {status} ({code}): {message}")
+        self.status = status
+        self.code = code
+        self.message = message
 
 
 class SupabaseService:
-    """Service for Supabase database operations"""
+    """
+    Service for Supabase database operations
+
+    RPCs are sent straight to PostgREST (`/rest/v1/rpc/<function>`)
+    through one shared httpx.AsyncClient, so concurrent calls overlap
+    on keep-alive connections instead of blocking the event loop.
+    """
 
     def __init__(self):
-        """Initialize Supabase client"""
+        """Initialize pooled PostgREST client"""
         settings = get_settings()
-        self.client: Client = create_client(
-            settings.supabase_url,
-            settings.supabase_key
+        self.client = httpx.AsyncClient(
+            base_url=f"{settings.supabase_url.rstrip('/')}/rest/v1",
+            headers={
+                "apikey": settings.supabase_key,
+                "Authorization": f"Bearer {settings.supabase_key}",
+                "Content-Type": "application/json",
+            },
+            timeout=settings.supabase_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.supabase_max_connections,
+                max_keepalive_connections=settings.supabase_max_connections
+            )
         )
+        # Flips to False once PostgREST reports obter_contexto_scanner missing
+        self.combined_rpc_available = True
+
+        # Project context rarely changes: skip its RPC on repeated scans
+        self.project_cache: Optional[ProjectContextCache] = None
+        if settings.project_cache_enabled:
+            self.project_cache = ProjectContextCache(
+                max_entries=settings.project_cache_max_entries,
+                ttl=settings.project_cache_ttl
+            )
         logger.info("✅ Supabase client initialized")
 
+    async def _rpc(self, function: str, params: Dict[str, Any]) -> Any:
+        """
+        Call a Postgres function through PostgREST
+
+        Args:
+            function: Function name
+            params: Named function arguments
+
+        Returns:
+            Decoded JSON response
+
+        Raises:
+            SupabaseRPCError: If PostgREST returns an error status
+            httpx.HTTPError: On transport errors or timeouts
+        """
+        response = await self.client.post(f"/rpc/{function}", json=params)
+
+        if response.status_code >= 400:
+            code = "unknown"
+            message = response.text[:200]
+            try:
+                error = response.json()
+                code = error.get("code") or code
+                message = error.get("message", message)
+            except ValueError:
+                pass
+            raise SupabaseRPCError(response.status_code, code, message)
+
+        return response.json()
+
+    def _parse_canal_data(self, data: Any) -> CanalData:
+        """
+        Build CanalData from an RPC row
+
+        Args:
+            data: RPC response (dict or single-row list) with
+                youtube_channel_id and videos_para_scann (CSV)
+
+        Returns:
+            CanalData object
+        """
+        if isinstance(data, list) and len(data) > 0:
+            data = data[0]
+
+        # Get channel ID
+        canal_id = data.get("youtube_channel_id", "")
+
+        # Get videos_para_scann (queue to process)
+        videos_para_scann = data.get("videos_para_scann", "")
+
+        # Convert CSV to list
+        if videos_para_scann and isinstance(videos_para_scann, str):
+            video_ids = [v.strip() for v in videos_para_scann.split(",") if v.strip()]
+        else:
+            video_ids = []
+
+        return CanalData(
+            youtube_channel_id=canal_id,
+            videos=video_ids
+        )
+
+    def _parse_project_data(self, data: Any) -> ProjectData:
+        """
+        Build ProjectData from an RPC row
+
+        Args:
+            data: RPC response (dict or single-row list) with
+                nome_produto_servico, descricao_servico and pais
+
+        Returns:
+            ProjectData object
+        """
+        if isinstance(data, list) and len(data) > 0:
+            data = data[0]
+
+        return ProjectData(
+            nome_produto=data.get("nome_produto_servico", ""),
+            descricao_servico=data.get("descricao_servico", ""),
+            pais=data.get("pais", "BR")
+        )
+
     async def get_canal_e_videos(self, scanner_id: int) -> CanalData:
         """
         Get channel data and video IDs TO PROCESS from Supabase
@@ -47,35 +165,15 @@ class SupabaseService:
             logger.info(f"Fetching canal data for scanner {scanner_id}")
 
             # Call Supabase RPC
-            response = self.client.rpc(
+            data = await self._rpc(
                 'obter_canal_e_videos',
                 {'canal_id': scanner_id}
-            ).execute()
+            )
 
-            if not response.data:
+            if not data:
                 raise ValueError(f"No data returned for scanner {scanner_id}")
 
-            # Parse response
-            data = response.data
-            if isinstance(data, list) and len(data) > 0:
-                data = data[0]
-
-            # Get channel ID
-            canal_id = data.get("youtube_channel_id", "")
-
-            # Get videos_para_scann (queue to process)
-            videos_para_scann = data.get("videos_para_scann", "")
-
-            # Convert CSV to list
-            if videos_para_scann and isinstance(videos_para_scann, str):
-                video_ids = [v.strip() for v in videos_para_scann.split(",") if v.strip()]
-            else:
-                video_ids = []
-
-            result = CanalData(
-                youtube_channel_id=canal_id,
-                videos=video_ids
-            )
+            result = self._parse_canal_data(data)
 
             logger.success(
                 f"✅ Canal data fetched: {result.youtube_channel_id}, "
@@ -91,9 +189,30 @@ class SupabaseService:
         """
         Get project/product data from Supabase
 
-        Calls RPC: obter_dados_projeto_por_canal
+        Calls RPC: obter_dados_projeto_por_canal (skipped on project cache hit)
         Returns: ProjectData with product name, description, and country
 
+        Args:
+            scanner_id: Scanner ID from Supabase table
+
+        Returns:
+            ProjectData object
+
+        Raises:
+            Exception: If RPC fails or data is invalid
+        """
+        if self.project_cache:
+            cached = self.project_cache.get(scanner_id)
+            if cached:
+                logger.info(f"💾 Project data cache hit for scanner {scanner_id}")
+                return cached
+
+        return await self._fetch_dados_projeto(scanner_id)
+
+    async def _fetch_dados_projeto(self, scanner_id: int) -> ProjectData:
+        """
+        Fetch project data from Supabase and store it in the project cache
+
         Args:
             scanner_id: Scanner ID from Supabase table
 
@@ -107,24 +226,17 @@ class SupabaseService:
             logger.info(f"Fetching project data for scanner {scanner_id}")
 
             # Call Supabase RPC
-            response = self.client.rpc(
+            data = await self._rpc(
                 'obter_dados_projeto_por_canal',
                 {'canal_id': scanner_id}
-            ).execute()
+            )
 
-            if not response.data:
+            if not data:
                 raise ValueError(f"No project data returned for scanner {scanner_id}")
 
-            # Parse response
-            data = response.data
-            if isinstance(data, list) and len(data) > 0:
-                data = data[0]
-
-            result = ProjectData(
-                nome_produto=data.get("nome_produto_servico", ""),
-                descricao_servico=data.get("descricao_servico", ""),
-                pais=data.get("pais", "BR")
-            )
+            result = self._parse_project_data(data)
+            if self.project_cache:
+                self.project_cache.set(scanner_id, result)
 
             logger.success(
                 f"✅ Project data fetched: {result.nome_produto} ({result.pais})"
@@ -135,6 +247,104 @@ class SupabaseService:
             logger.error(f"❌ Error fetching project data: {e}")
             raise
 
+    async def get_scanner_context(self, scanner_id: int) -> Tuple[CanalData, ProjectData]:
+        """
+        Get channel queue and project data in a single round-trip
+
+        Calls RPC: obter_contexto_scanner
+        Falls back to obter_canal_e_videos + obter_dados_projeto_por_canal
+        (in parallel) while the combined function is not deployed. On a
+        project cache hit only the channel queue is fetched.
+
+        Args:
+            scanner_id: Scanner ID from Supabase table
+
+        Returns:
+            Tuple (CanalData, ProjectData)
+
+        Raises:
+            Exception: If RPC fails or data is invalid
+        """
+        if self.project_cache:
+            cached = self.project_cache.get(scanner_id)
+            if cached:
+                logger.info(f"💾 Project data cache hit for scanner {scanner_id}")
+                return await self.get_canal_e_videos(scanner_id), cached
+
+        if self.combined_rpc_available:
+            try:
+                logger.info(f"Fetching scanner context for scanner {scanner_id}")
+
+                data = await self._rpc(
+                    'obter_contexto_scanner',
+                    {'canal_id': scanner_id}
+                )
+
+                if not data:
+                    raise ValueError(f"No data returned for scanner {scanner_id}")
+
+                canal_data = self._parse_canal_data(data)
+                project_data = self._parse_project_data(data)
+                if self.project_cache:
+                    self.project_cache.set(scanner_id, project_data)
+
+                logger.success(
+                    f"✅ Scanner context fetched: {canal_data.youtube_channel_id}, "
+                    f"{len(canal_data.videos)} videos to process, "
+                    f"product {project_data.nome_produto} ({project_data.pais})"
+                )
+                return canal_data, project_data
+
+            except SupabaseRPCError as e:
+                # PGRST202: function not found in the schema cache
+                if e.status != 404 and e.code != "PGRST202":
+                    logger.error(f"❌ Error fetching scanner context: {e}")
+                    raise
+                self.combined_rpc_available = False
+                logger.warning(
+                    "⚠️ obter_contexto_scanner not deployed, "
+                    "falling back to two RPC calls"
+                )
+            except Exception as e:
+                logger.error(f"❌ Error fetching scanner context: {e}")
+                raise
+
+        canal_data, project_data = await asyncio.gather(
+            self.get_canal_e_videos(scanner_id),
+            self._fetch_dados_projeto(scanner_id)  # cache already missed above
+        )
+        return canal_data, project_data
+
+    def invalidate_project_cache(self, scanner_id: Optional[int] = None) -> int:
+        """
+        Drop cached project data after the project was edited
+
+        Args:
+            scanner_id: Scanner to drop (None clears the whole cache)
+
+        Returns:
+            Number of entries removed
+        """
+        if not self.project_cache:
+            return 0
+        return self.project_cache.invalidate(scanner_id)
+
+    def project_cache_stats(self) -> Dict:
+        """
+        Get project cache statistics
+
+        Returns:
+            Dict with hit ratio and size (empty if cache disabled)
+        """
+        if not self.project_cache:
+            return {}
+        return self.project_cache.stats()
+
+    async def close(self):
+        """Close HTTP connection pool"""
+        await self.client.aclose()
+        logger.info("Supabase client closed")
+
 
 # ============================================
 # Singleton instance
@@ -4,7 +4,8 @@ Handles video transcription using own VPS API
 """
 
 import asyncio
-from typing import List, Dict, Optional
+import json
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 import httpx
 from loguru import logger
 
@@ -20,11 +21,14 @@ class TranscriptService:
         self.api_url = settings.transcript_api_url
         self.timeout = settings.transcript_timeout
         self.max_concurrent = settings.max_concurrent_transcripts
+        self.batch_size = settings.transcript_batch_size
+        # Turned off when the API has no /transcribe-batch (older deploy)
+        self.batch_enabled = True
         self.client = httpx.AsyncClient(timeout=self.timeout)
         logger.info(
             f"✅ Transcript API client initialized "
             f"(url: {self.api_url}, timeout: {self.timeout}s, "
-            f"max_concurrent: {self.max_concurrent})"
+            f"max_concurrent: {self.max_concurrent}, batch_size: {self.batch_size})"
         )
 
     async def get_transcript(self, video_id: str) -> str:
@@ -80,14 +84,97 @@ class TranscriptService:
             logger.error(f"❌ Error getting transcript for {video_id}: {e}")
             return ""
 
+    async def _stream_single_transcripts(
+        self,
+        video_ids: List[str]
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        One /transcribe POST per video, yielded as each completes
+
+        Uses semaphore to limit concurrent requests
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async def fetch_with_semaphore(video_id: str) -> Tuple[str, str]:
+            """Fetch with concurrency limit"""
+            async with semaphore:
+                return video_id, await self.get_transcript(video_id)
+
+        tasks = [asyncio.create_task(fetch_with_semaphore(vid)) for vid in video_ids]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def stream_batch_transcripts(
+        self,
+        video_ids: List[str]
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Get transcriptions for many videos with one /transcribe-batch call
+
+        The API answers cache hits with one bulk query, fetches the misses
+        concurrently and streams one NDJSON line per video as it finishes.
+        Videos the stream did not deliver (API error, older API without
+        the endpoint) fall back to one /transcribe POST each.
+
+        Args:
+            video_ids: List of YouTube video IDs
+
+        Yields:
+            Tuples (video_id, transcription), each video exactly once
+        """
+        pending = list(dict.fromkeys(video_ids))
+        if not pending:
+            return
+
+        if self.batch_enabled and len(pending) > 1:
+            try:
+                async with self.client.stream(
+                    "POST",
+                    f"{self.api_url}/transcribe-batch",
+                    json={"videos": pending}
+                ) as response:
+                    if response.status_code in (404, 405):
+                        self.batch_enabled = False
+                        logger.warning(
+                            "⚠️ Transcript API has no /transcribe-batch, "
+                            "falling back to one request per video"
+                        )
+                    else:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if not line.strip():
+                                continue
+                            # Line: {"transcription": "...", "video_id": "...", "contem": true, ...}
+                            data = json.loads(line)
+                            video_id = data.get("video_id", "")
+                            if video_id not in pending:
+                                continue
+                            pending.remove(video_id)
+                            yield video_id, data.get("transcription", "") or ""
+
+            except (httpx.HTTPError, json.JSONDecodeError) as e:
+                logger.error(
+                    f"❌ Batch transcript request failed ({len(pending)} videos "
+                    f"left, fetching one by one): {e}"
+                )
+
+        if pending:
+            async for result in self._stream_single_transcripts(pending):
+                yield result
+
     async def get_batch_transcripts(
         self,
         video_ids: List[str]
     ) -> Dict[str, str]:
         """
-        Get transcriptions for multiple videos in parallel
+        Get transcriptions for multiple videos
 
-        Uses semaphore to limit concurrent requests
+        Sends /transcribe-batch requests of `batch_size` videos, all chunks
+        in parallel (one /transcribe POST per video when batch_size is 1)
 
         Args:
             video_ids: List of YouTube video IDs
@@ -98,40 +185,25 @@ class TranscriptService:
         try:
             logger.info(
                 f"Fetching transcripts for {len(video_ids)} videos "
-                f"(max {self.max_concurrent} concurrent)"
+                f"(batches of {self.batch_size}, max {self.max_concurrent} concurrent)"
             )
 
-            # Semaphore to limit concurrent requests
-            semaphore = asyncio.Semaphore(self.max_concurrent)
-
-            async def fetch_with_semaphore(video_id: str) -> tuple[str, str]:
-                """Fetch with concurrency limit"""
-                async with semaphore:
-                    transcript = await self.get_transcript(video_id)
-                    return (video_id, transcript)
-
-            # Fetch all in parallel (but limited by semaphore)
-            tasks = [fetch_with_semaphore(vid) for vid in video_ids]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Process results
-            transcripts = {}
-            successful = 0
-            failed = 0
-
-            for result in results:
-                if isinstance(result, Exception):
-                    logger.error(f"Task failed with exception: {result}")
-                    failed += 1
-                    continue
-
-                video_id, transcript = result
-                transcripts[video_id] = transcript
-
-                if transcript:
-                    successful += 1
-                else:
-                    failed += 1
+            if self.batch_size == 1:
+                streams = [self._stream_single_transcripts(video_ids)]
+            else:
+                streams = [
+                    self.stream_batch_transcripts(video_ids[i:i + self.batch_size])
+                    for i in range(0, len(video_ids), self.batch_size)
+                ]
+
+            async def collect(stream: AsyncIterator[Tuple[str, str]]) -> List[Tuple[str, str]]:
+                return [item async for item in stream]
+
+            chunks = await asyncio.gather(*(collect(stream) for stream in streams))
+            transcripts = {video_id: text for chunk in chunks for video_id, text in chunk}
+
+            successful = sum(1 for text in transcripts.values() if text)
+            failed = len(transcripts) - successful
 
             logger.success(
                 f"✅ Transcripts fetched: {successful} successful, "
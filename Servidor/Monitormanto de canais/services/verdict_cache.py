@@ -0,0 +1,219 @@
+"""
+Verdict Cache
+Persistent SQLite cache of Claude Stage 1 / Stage 2 decisions per video and project
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+from loguru import logger
+
+from models import ProjectData
+
+
+# Only final decisions are cached (SKIPPED means "try again")
+CACHEABLE_PREFIXES = {
+    "stage1": ("PASS", "PRE_FILTER_REJECT", "REJECT"),
+    "stage2": ("✅ APPROVED", "❌ REJECTED"),
+}
+
+
+def prompt_version(*parts: str) -> str:
+    """
+    Fingerprint of everything that shapes a stage's answer
+
+    Args:
+        *parts: Prompt templates, model name...
+
+    Returns:
+        Short hex digest (changes whenever any part changes)
+    """
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def verdict_key(
+    stage: str,
+    video_id: str,
+    project: ProjectData,
+    version: str
+) -> str:
+    """
+    Content-addressed key of one decision
+
+    Args:
+        stage: "stage1" or "stage2"
+        video_id: YouTube video ID
+        project: ProjectData (product name + description are in the prompt)
+        version: Prompt version of the stage
+
+    Returns:
+        SHA-256 hex digest
+    """
+    raw = "\x1f".join([stage, version, video_id, project.nome_produto, project.descricao_servico])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """
+    Local cache of Claude verdicts
+
+    Keys hash the video ID, the product prompt context and the prompt
+    version of the stage, so editing a prompt template, switching model
+    or changing the product description misses automatically instead of
+    returning decisions made under other instructions. Entries also
+    expire after `ttl` seconds.
+    """
+
+    def __init__(self, path: str, ttl: int):
+        """
+        Open (or create) the SQLite cache
+
+        Args:
+            path: SQLite database file path
+            ttl: Verdict lifetime in seconds
+        """
+        self.path = path
+        self.ttl = ttl
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS verdicts (
+                verdict_key TEXT PRIMARY KEY,
+                stage TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                verdict TEXT NOT NULL,
+                cached_at REAL NOT NULL
+            )
+            """
+        )
+        # Old prompt versions are never read again: drop expired rows
+        self._conn.execute("DELETE FROM verdicts WHERE cached_at < ?", (time.time() - ttl,))
+        self._conn.commit()
+
+        # Counters per stage
+        self.hits = {stage: 0 for stage in CACHEABLE_PREFIXES}
+        self.misses = {stage: 0 for stage in CACHEABLE_PREFIXES}
+
+    def _lookup(self, stage: str, keys: Dict[str, str]) -> Dict[str, str]:
+        """Blocking lookup (runs in a worker thread)"""
+        oldest = time.time() - self.ttl
+        by_key = {key: video_id for video_id, key in keys.items()}
+        found = {}
+
+        with self._lock:
+            # SQLite limits bound parameters, query in chunks
+            key_list = list(by_key)
+            for i in range(0, len(key_list), 500):
+                chunk = key_list[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = self._conn.execute(
+                    f"SELECT verdict_key, verdict FROM verdicts "
+                    f"WHERE verdict_key IN ({placeholders}) AND cached_at >= ?",
+                    chunk + [oldest]
+                )
+                for key, verdict in cursor.fetchall():
+                    found[by_key[key]] = verdict
+
+        self.hits[stage] += len(found)
+        self.misses[stage] += len(keys) - len(found)
+        return found
+
+    async def lookup(
+        self,
+        stage: str,
+        video_ids: List[str],
+        project: ProjectData,
+        version: str
+    ) -> Dict[str, str]:
+        """
+        Look up cached verdicts
+
+        Args:
+            stage: "stage1" or "stage2"
+            video_ids: List of YouTube video IDs
+            project: ProjectData with product context
+            version: Prompt version of the stage
+
+        Returns:
+            Dict mapping video_id -> cached verdict (only fresh hits)
+        """
+        if not video_ids:
+            return {}
+
+        keys = {video_id: verdict_key(stage, video_id, project, version) for video_id in video_ids}
+        return await asyncio.to_thread(self._lookup, stage, keys)
+
+    def _store(self, rows: List[tuple]):
+        """Blocking write (runs in a worker thread)"""
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO verdicts (verdict_key, stage, video_id, verdict, cached_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(verdict_key) DO UPDATE SET
+                    verdict = excluded.verdict,
+                    cached_at = excluded.cached_at
+                """,
+                rows
+            )
+            self._conn.commit()
+
+    async def store(
+        self,
+        stage: str,
+        verdicts: Dict[str, str],
+        project: ProjectData,
+        version: str
+    ):
+        """
+        Store final verdicts (SKIPPED and unknown formats are ignored)
+
+        Args:
+            stage: "stage1" or "stage2"
+            verdicts: Dict mapping video_id -> verdict
+            project: ProjectData with product context
+            version: Prompt version of the stage
+        """
+        now = time.time()
+        rows = [
+            (verdict_key(stage, video_id, project, version), stage, video_id, verdict, now)
+            for video_id, verdict in verdicts.items()
+            if verdict.startswith(CACHEABLE_PREFIXES[stage])
+        ]
+
+        if rows:
+            await asyncio.to_thread(self._store, rows)
+
+    def stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict with hits, misses and hit_ratio per stage
+        """
+        stats = {}
+        for stage in CACHEABLE_PREFIXES:
+            total = self.hits[stage] + self.misses[stage]
+            stats[stage] = {
+                "hits": self.hits[stage],
+                "misses": self.misses[stage],
+                "hit_ratio": round(self.hits[stage] / total, 4) if total else 0.0,
+            }
+        return stats
+
+    def close(self):
+        """Close SQLite connection"""
+        with self._lock:
+            self._conn.close()
+        logger.info("Verdict cache closed")
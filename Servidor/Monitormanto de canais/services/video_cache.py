@@ -0,0 +1,238 @@
+"""
+Video Metadata Cache
+Persistent SQLite cache of YouTube videos.list items with TTL tiers
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Tuple
+from loguru import logger
+
+
+class VideoMetadataCache:
+    """
+    Local cache of videos.list items keyed by video ID
+
+    Two TTL tiers:
+    - metadata (snippet + contentDetails): title, description, tags,
+      duration... rarely change, so they live long
+    - statistics (views, likes, comments): change fast, short TTL
+
+    A video is a full hit only when both tiers are fresh. When only the
+    statistics expired, callers refresh just that part and keep the
+    cached metadata.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        metadata_ttl: int,
+        statistics_ttl: int
+    ):
+        """
+        Open (or create) the SQLite cache
+
+        Args:
+            path: SQLite database file path
+            metadata_ttl: TTL in seconds for snippet + contentDetails
+            statistics_ttl: TTL in seconds for statistics
+        """
+        self.path = path
+        self.metadata_ttl = metadata_ttl
+        self.statistics_ttl = statistics_ttl
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS video_metadata (
+                video_id TEXT PRIMARY KEY,
+                metadata TEXT NOT NULL,
+                metadata_cached_at REAL NOT NULL,
+                statistics TEXT,
+                statistics_cached_at REAL
+            )
+            """
+        )
+        self._conn.commit()
+
+        # Counters
+        self.hits = 0
+        self.stale_statistics = 0
+        self.misses = 0
+        self.quota_units_saved = 0
+
+    def _lookup(
+        self,
+        video_ids: List[str],
+        require_statistics: bool
+    ) -> Tuple[Dict[str, Dict], Dict[str, Dict], List[str]]:
+        """Blocking lookup (runs in a worker thread)"""
+        now = time.time()
+        rows = {}
+
+        with self._lock:
+            # SQLite limits bound parameters, query in chunks
+            for i in range(0, len(video_ids), 500):
+                chunk = video_ids[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = self._conn.execute(
+                    f"SELECT video_id, metadata, metadata_cached_at, "
+                    f"statistics, statistics_cached_at "
+                    f"FROM video_metadata WHERE video_id IN ({placeholders})",
+                    chunk
+                )
+                for row in cursor.fetchall():
+                    rows[row[0]] = row
+
+        fresh = {}
+        stale = {}
+        missing = []
+
+        for video_id in video_ids:
+            row = rows.get(video_id)
+
+            if not row or now - row[2] > self.metadata_ttl:
+                missing.append(video_id)
+                continue
+
+            item = json.loads(row[1])
+            if row[3] is not None:
+                item["statistics"] = json.loads(row[3])
+
+            statistics_fresh = (
+                row[4] is not None and now - row[4] <= self.statistics_ttl
+            )
+
+            if statistics_fresh or not require_statistics:
+                fresh[video_id] = item
+            else:
+                stale[video_id] = item
+
+        self.hits += len(fresh)
+        self.stale_statistics += len(stale)
+        self.misses += len(missing)
+
+        return fresh, stale, missing
+
+    async def lookup(
+        self,
+        video_ids: List[str],
+        require_statistics: bool = True
+    ) -> Tuple[Dict[str, Dict], Dict[str, Dict], List[str]]:
+        """
+        Look up cached videos.list items
+
+        Args:
+            video_ids: List of YouTube video IDs
+            require_statistics: If False, expired statistics still count as
+                a hit (caller only needs snippet/contentDetails)
+
+        Returns:
+            Tuple (fresh, stale_statistics, missing):
+            - fresh: video_id -> full item (both tiers valid)
+            - stale_statistics: video_id -> item whose statistics expired
+              (still included, usable as fallback)
+            - missing: IDs not cached or with expired metadata
+        """
+        return await asyncio.to_thread(self._lookup, video_ids, require_statistics)
+
+    def _store(self, items: List[Dict]):
+        """Blocking write (runs in a worker thread)"""
+        now = time.time()
+
+        with self._lock:
+            for item in items:
+                video_id = item.get("id")
+                if not video_id:
+                    continue
+
+                metadata = {
+                    key: value for key, value in item.items()
+                    if key != "statistics"
+                }
+
+                if "snippet" in item:
+                    self._conn.execute(
+                        """
+                        INSERT INTO video_metadata
+                            (video_id, metadata, metadata_cached_at,
+                             statistics, statistics_cached_at)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(video_id) DO UPDATE SET
+                            metadata = excluded.metadata,
+                            metadata_cached_at = excluded.metadata_cached_at,
+                            statistics = COALESCE(excluded.statistics, statistics),
+                            statistics_cached_at = COALESCE(
+                                excluded.statistics_cached_at, statistics_cached_at
+                            )
+                        """,
+                        (
+                            video_id,
+                            json.dumps(metadata),
+                            now,
+                            json.dumps(item["statistics"]) if "statistics" in item else None,
+                            now if "statistics" in item else None
+                        )
+                    )
+                elif "statistics" in item:
+                    # Statistics-only refresh: keep cached metadata
+                    self._conn.execute(
+                        """
+                        UPDATE video_metadata
+                        SET statistics = ?, statistics_cached_at = ?
+                        WHERE video_id = ?
+                        """,
+                        (json.dumps(item["statistics"]), now, video_id)
+                    )
+
+            self._conn.commit()
+
+    async def store(self, items: List[Dict]):
+        """
+        Store videos.list items
+
+        Items with a snippet refresh the metadata tier (and statistics if
+        present). Items with only statistics refresh the statistics tier.
+
+        Args:
+            items: Raw videos.list items
+        """
+        if items:
+            await asyncio.to_thread(self._store, items)
+
+    def record_quota_saved(self, units: int):
+        """Add API quota units avoided thanks to the cache"""
+        self.quota_units_saved += units
+
+    def stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict with hits, stale_statistics, misses, hit_ratio and quota_units_saved
+        """
+        total = self.hits + self.stale_statistics + self.misses
+
+        return {
+            "hits": self.hits,
+            "stale_statistics": self.stale_statistics,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "quota_units_saved": self.quota_units_saved,
+        }
+
+    def close(self):
+        """Close SQLite connection"""
+        with self._lock:
+            self._conn.close()
+        logger.info("Video metadata cache closed")
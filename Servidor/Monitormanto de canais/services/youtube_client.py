@@ -0,0 +1,131 @@
+"""
+YouTube API Client
+Async YouTube Data API v3 client over a pooled HTTP transport
+"""
+
+from typing import Dict, Any
+import httpx
+from loguru import logger
+
+from services.youtube_quota import KeyPool, QuotaPriority
+
+
+YOUTUBE_API_BASE_URL = "https://www.googleapis.com/youtube/v3"
+
+
+class YouTubeAPIError(Exception):
+    """Error response returned by the YouTube Data API"""
+
+    def __init__(self, status: int, reason: str, message: str):
+        super().__init__(f"YouTube API error {status} ({reason}): {message}")
+        self.status = status
+        self.reason = reason
+        self.message = message
+
+
+class YouTubeAPIClient:
+    """
+    Non-blocking YouTube Data API v3 client
+
+    Every request goes through one shared httpx.AsyncClient, so TCP/TLS
+    connections to googleapis.com are kept alive and reused across
+    concurrent scanners instead of blocking the event loop. The API key
+    of each request is taken from a KeyPool.
+    """
+
+    def __init__(
+        self,
+        key_pool: KeyPool,
+        timeout: float = 30.0,
+        max_connections: int = 20
+    ):
+        """
+        Initialize pooled HTTP client
+
+        Args:
+            key_pool: YouTube API keys with their quota ledgers
+            timeout: Per-request timeout in seconds
+            max_connections: Max simultaneous connections in the pool
+        """
+        self.key_pool = key_pool
+        self.client = httpx.AsyncClient(
+            base_url=YOUTUBE_API_BASE_URL,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+
+    def _parse_error(self, response: httpx.Response) -> YouTubeAPIError:
+        """
+        Build YouTubeAPIError from an error response
+
+        Args:
+            response: HTTP response with status >= 400
+
+        Returns:
+            YouTubeAPIError with status, reason and message
+        """
+        reason = "unknown"
+        message = response.text[:200]
+
+        try:
+            error = response.json().get("error", {})
+            message = error.get("message", message)
+            errors = error.get("errors", [])
+            if errors:
+                reason = errors[0].get("reason", reason)
+        except ValueError:
+            pass
+
+        return YouTubeAPIError(response.status_code, reason, message)
+
+    async def list(
+        self,
+        resource: str,
+        priority: QuotaPriority = QuotaPriority.NORMAL,
+        **params: Any
+    ) -> Dict:
+        """
+        Call a `<resource>.list` endpoint
+
+        The least-loaded key is charged before the request. If that key
+        answers quotaExceeded it is quarantined and the call is retried
+        on the next available key.
+
+        Args:
+            resource: API resource (videos, channels, search, commentThreads)
+            priority: Quota priority (low priority calls are shed first)
+            **params: Query parameters (part, id, maxResults, ...)
+
+        Returns:
+            Decoded JSON response
+
+        Raises:
+            QuotaBudgetExceeded: If no key can afford the call
+            YouTubeAPIError: If the API returns an error status
+            httpx.HTTPError: On transport errors or timeouts
+        """
+        while True:
+            api_key = self.key_pool.acquire(resource, priority)
+
+            response = await self.client.get(
+                f"/{resource}",
+                params={**params, "key": api_key}
+            )
+
+            if response.status_code < 400:
+                return response.json()
+
+            error = self._parse_error(response)
+            if error.reason not in ("quotaExceeded", "dailyLimitExceeded"):
+                raise error
+
+            # Quarantine the key; acquire() raises once every key is out
+            self.key_pool.mark_exhausted(api_key)
+
+    async def close(self):
+        """Close HTTP connection pool"""
+        await self.client.aclose()
+        logger.info("YouTube API client closed")
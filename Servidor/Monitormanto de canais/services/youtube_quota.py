@@ -0,0 +1,395 @@
+"""
+YouTube Quota Ledger
+Tracks YouTube Data API v3 quota usage per key and sheds low-priority calls
+"""
+
+from datetime import datetime, timedelta, tzinfo
+from enum import IntEnum
+from typing import Dict, List, Optional
+from loguru import logger
+
+from config import get_settings
+
+
+class _PacificFallback(tzinfo):
+    """
+    US Pacific time without tz database: UTC-8, UTC-7 under US DST
+
+    DST runs from the second Sunday of March to the first Sunday of
+    November, both at 2:00 local time.
+    """
+
+    @staticmethod
+    def _dst_bounds(year: int):
+        """Naive local start/end of DST (2:00 on day 8-14 of March / 1-7 of November, a Sunday)"""
+        start = datetime(year, 3, 14, 2) - timedelta(days=(datetime(year, 3, 14).weekday() + 1) % 7)
+        end = datetime(year, 11, 7, 2) - timedelta(days=(datetime(year, 11, 7).weekday() + 1) % 7)
+        return start, end
+
+    def utcoffset(self, dt: Optional[datetime]) -> timedelta:
+        return timedelta(hours=-8) + self.dst(dt)
+
+    def dst(self, dt: Optional[datetime]) -> timedelta:
+        if dt is None:
+            return timedelta(0)
+        start, end = self._dst_bounds(dt.year)
+        local = dt.replace(tzinfo=None)
+        # fold=1: second pass through the repeated hour, already standard time
+        if dt.fold and end - timedelta(hours=1) <= local < end:
+            return timedelta(0)
+        return timedelta(hours=1) if start <= local < end else timedelta(0)
+
+    def tzname(self, dt: Optional[datetime]) -> str:
+        return "PDT" if self.dst(dt) else "PST"
+
+    def fromutc(self, dt: datetime) -> datetime:
+        # Bounds in UTC: DST starts at 2:00 PST and ends at 2:00 PDT
+        start, end = self._dst_bounds(dt.year)
+        utc = dt.replace(tzinfo=None)
+        if start + timedelta(hours=8) <= utc < end + timedelta(hours=7):
+            return dt + timedelta(hours=-7)
+        local = dt + timedelta(hours=-8)
+        repeated = end + timedelta(hours=7) <= utc < end + timedelta(hours=8)
+        return local.replace(fold=1) if repeated else local
+
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE: tzinfo = ZoneInfo("America/Los_Angeles")
+except Exception as e:
+    # Missing tz database (e.g. slim image without tzdata): a naive local
+    # clock would move the quota day, so keep Pacific time by rule
+    QUOTA_TIMEZONE = _PacificFallback()
+    logger.warning(f"⚠️ America/Los_Angeles unavailable ({e}), quota day uses a fixed UTC-8/UTC-7 rule")
+
+
+# Documented unit cost per `<resource>.list` call
+# https://developers.google.com/youtube/v3/determine_quota_cost
+QUOTA_COSTS = {
+    "search": 100,
+    "videos": 1,
+    "channels": 1,
+    "commentThreads": 1,
+}
+
+
+class QuotaPriority(IntEnum):
+    """Priority of an API call when the daily budget runs low"""
+    LOW = 0      # Nice to have (e.g., comment samples)
+    NORMAL = 1   # Regular work (e.g., searches, channel details)
+    HIGH = 2     # Critical path (e.g., qualifier videos.list)
+
+
+class QuotaBudgetExceeded(Exception):
+    """Raised when a call is shed to protect the remaining daily quota"""
+
+
+def quota_day_start(now: Optional[datetime] = None) -> datetime:
+    """
+    Start of the current quota day
+
+    YouTube resets quotas at midnight Pacific Time.
+
+    Args:
+        now: Reference time (defaults to current time)
+
+    Returns:
+        Timezone-aware datetime of the last reset
+    """
+    now = now or datetime.now(QUOTA_TIMEZONE)
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_quota_reset(now: Optional[datetime] = None) -> datetime:
+    """
+    Time of the next daily quota reset (midnight Pacific Time)
+
+    Args:
+        now: Reference time (defaults to current time)
+
+    Returns:
+        Timezone-aware datetime of the next reset
+    """
+    return quota_day_start(now) + timedelta(days=1)
+
+
+class QuotaLedger:
+    """
+    Daily quota ledger for one YouTube API key
+
+    Every call is charged its documented unit cost before it is sent.
+    As the remaining budget shrinks below the reserve of a priority,
+    calls of that priority are shed (QuotaBudgetExceeded) so the rest
+    of the day keeps quota for the critical path. HIGH priority calls
+    are only refused after the API itself reported quotaExceeded.
+    """
+
+    def __init__(
+        self,
+        daily_limit: int,
+        low_priority_reserve: float = 0.3,
+        normal_priority_reserve: float = 0.05
+    ):
+        """
+        Initialize ledger
+
+        Args:
+            daily_limit: Daily quota of the key (units)
+            low_priority_reserve: Fraction of the daily limit below which
+                LOW priority calls are shed
+            normal_priority_reserve: Fraction of the daily limit below which
+                NORMAL priority calls are shed
+        """
+        self.daily_limit = daily_limit
+        self.reserves = {
+            QuotaPriority.LOW: int(daily_limit * low_priority_reserve),
+            QuotaPriority.NORMAL: int(daily_limit * normal_priority_reserve),
+            QuotaPriority.HIGH: 0,
+        }
+        self._reset(quota_day_start())
+
+    def _reset(self, day_start: datetime):
+        """Start a new quota day"""
+        self.day_start = day_start
+        self.used = 0
+        self.exhausted = False
+        self.calls: Dict[str, int] = {}
+        self.units: Dict[str, int] = {}
+        self.shed: Dict[str, int] = {}
+
+    def _roll_day(self):
+        """Reset counters when the quota day changed"""
+        day_start = quota_day_start()
+        if day_start != self.day_start:
+            self._reset(day_start)
+
+    @property
+    def remaining(self) -> int:
+        """Remaining units for today"""
+        self._roll_day()
+        if self.exhausted:
+            return 0
+        return max(0, self.daily_limit - self.used)
+
+    def can_afford(
+        self,
+        resource: str,
+        priority: QuotaPriority = QuotaPriority.NORMAL
+    ) -> bool:
+        """
+        Check if a call fits the budget for its priority
+
+        Args:
+            resource: API resource (search, videos, channels, commentThreads)
+            priority: Call priority
+
+        Returns:
+            True if the call would be allowed
+        """
+        remaining = self.remaining
+
+        if self.exhausted:
+            return False
+        if priority == QuotaPriority.HIGH:
+            return True
+
+        cost = QUOTA_COSTS.get(resource, 1)
+        return remaining - cost >= self.reserves[priority]
+
+    def charge(
+        self,
+        resource: str,
+        priority: QuotaPriority = QuotaPriority.NORMAL
+    ) -> int:
+        """
+        Charge a call against today's budget
+
+        Args:
+            resource: API resource (search, videos, channels, commentThreads)
+            priority: Call priority
+
+        Returns:
+            Units charged
+
+        Raises:
+            QuotaBudgetExceeded: If the call is shed
+        """
+        cost = QUOTA_COSTS.get(resource, 1)
+
+        if not self.can_afford(resource, priority):
+            self.shed[resource] = self.shed.get(resource, 0) + 1
+            raise QuotaBudgetExceeded(
+                f"{resource}.list shed (priority {priority.name}, "
+                f"{self.remaining} units left)"
+            )
+
+        self.used += cost
+        self.calls[resource] = self.calls.get(resource, 0) + 1
+        self.units[resource] = self.units.get(resource, 0) + cost
+        return cost
+
+    def mark_exhausted(self):
+        """Record a quotaExceeded response: refuse all calls until reset"""
+        self._roll_day()
+        if not self.exhausted:
+            logger.error(
+                f"🚨 YouTube quota exhausted "
+                f"(ledger used {self.used}/{self.daily_limit}); "
+                f"pausing calls until {next_quota_reset().isoformat()}"
+            )
+        self.exhausted = True
+
+    def snapshot(self) -> Dict:
+        """
+        Get ledger metrics
+
+        Returns:
+            Dict with used/remaining budget, per-resource calls and shed counts
+        """
+        remaining = self.remaining
+
+        return {
+            "daily_limit": self.daily_limit,
+            "used": self.used,
+            "remaining": remaining,
+            "remaining_ratio": round(remaining / self.daily_limit, 4) if self.daily_limit else 0.0,
+            "exhausted": self.exhausted,
+            "calls": dict(self.calls),
+            "units": dict(self.units),
+            "shed": dict(self.shed),
+            "resets_at": next_quota_reset().isoformat(),
+        }
+
+
+class KeyPool:
+    """
+    Pool of YouTube API keys, one quota ledger per key
+
+    Each call goes to the key with the most remaining quota that can
+    afford it. A key that answered quotaExceeded is quarantined (its
+    ledger refuses every call) until the next daily reset.
+    """
+
+    def __init__(
+        self,
+        api_keys: List[str],
+        daily_limit: int,
+        low_priority_reserve: float = 0.3,
+        normal_priority_reserve: float = 0.05
+    ):
+        """
+        Initialize key pool
+
+        Args:
+            api_keys: YouTube Data API v3 keys (duplicates are ignored)
+            daily_limit: Daily quota of each key (units)
+            low_priority_reserve: See QuotaLedger
+            normal_priority_reserve: See QuotaLedger
+        """
+        keys = list(dict.fromkeys(key for key in api_keys if key))
+        if not keys:
+            raise ValueError("KeyPool needs at least one API key")
+
+        self.ledgers: Dict[str, QuotaLedger] = {
+            key: QuotaLedger(daily_limit, low_priority_reserve, normal_priority_reserve)
+            for key in keys
+        }
+        self.shed: Dict[str, int] = {}
+
+    @staticmethod
+    def key_label(api_key: str) -> str:
+        """Masked key used in logs and metrics"""
+        return f"...{api_key[-6:]}"
+
+    @property
+    def remaining(self) -> int:
+        """Remaining units across all keys"""
+        return sum(ledger.remaining for ledger in self.ledgers.values())
+
+    def acquire(
+        self,
+        resource: str,
+        priority: QuotaPriority = QuotaPriority.NORMAL
+    ) -> str:
+        """
+        Pick the least-loaded key able to afford a call and charge it
+
+        Args:
+            resource: API resource (search, videos, channels, commentThreads)
+            priority: Call priority
+
+        Returns:
+            API key to use for the call
+
+        Raises:
+            QuotaBudgetExceeded: If no key can afford the call
+        """
+        candidates = [
+            (ledger.remaining, key)
+            for key, ledger in self.ledgers.items()
+            if ledger.can_afford(resource, priority)
+        ]
+
+        if not candidates:
+            self.shed[resource] = self.shed.get(resource, 0) + 1
+            raise QuotaBudgetExceeded(
+                f"{resource}.list shed (priority {priority.name}, "
+                f"{self.remaining} units left across {len(self.ledgers)} keys)"
+            )
+
+        _, api_key = max(candidates)
+        self.ledgers[api_key].charge(resource, priority)
+        return api_key
+
+    def mark_exhausted(self, api_key: str):
+        """Quarantine a key that answered quotaExceeded until the reset"""
+        ledger = self.ledgers.get(api_key)
+        if ledger:
+            logger.warning(f"⚠️ Quarantining YouTube key {self.key_label(api_key)}")
+            ledger.mark_exhausted()
+
+    def snapshot(self) -> Dict:
+        """
+        Get pool metrics
+
+        Returns:
+            Dict with pooled totals, pool-level shed counts and per-key ledgers
+        """
+        keys = {
+            self.key_label(key): ledger.snapshot()
+            for key, ledger in self.ledgers.items()
+        }
+        daily_limit = sum(ledger.daily_limit for ledger in self.ledgers.values())
+        remaining = self.remaining
+
+        return {
+            "keys_total": len(keys),
+            "keys_available": sum(1 for key in keys.values() if not key["exhausted"]),
+            "daily_limit": daily_limit,
+            "remaining": remaining,
+            "remaining_ratio": round(remaining / daily_limit, 4) if daily_limit else 0.0,
+            "shed": dict(self.shed),
+            "resets_at": next_quota_reset().isoformat(),
+            "keys": keys,
+        }
+
+
+# ============================================
+# Singleton instance
+# ============================================
+_key_pool: KeyPool | None = None
+
+
+def get_key_pool() -> KeyPool:
+    """Get YouTube key pool singleton"""
+    global _key_pool
+    if _key_pool is None:
+        settings = get_settings()
+        _key_pool = KeyPool(
+            api_keys=settings.youtube_api_key_list,
+            daily_limit=settings.youtube_daily_quota,
+            low_priority_reserve=settings.youtube_quota_low_priority_reserve,
+            normal_priority_reserve=settings.youtube_quota_normal_priority_reserve
+        )
+        logger.info(f"🔑 YouTube key pool: {len(_key_pool.ledgers)} key(s)")
+    return _key_pool
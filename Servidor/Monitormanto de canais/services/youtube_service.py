@@ -3,15 +3,22 @@ YouTube Service
 Handles YouTube Data API v3 operations
 """
 
+import asyncio
+import math
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 from loguru import logger
 
 from config import get_settings
 from models import VideoData
+from services.youtube_client import YouTubeAPIClient, YouTubeAPIError
+from services.video_cache import VideoMetadataCache
+from services.youtube_quota import QuotaPriority, get_key_pool
+
+
+# Parts cached per video (videos.list costs 1 unit regardless of parts)
+FULL_VIDEO_PARTS = "snippet,statistics,contentDetails"
 
 
 class YouTubeService:
@@ -20,9 +27,33 @@ class YouTubeService:
     def __init__(self):
         """Initialize YouTube API client"""
         settings = get_settings()
-        self.youtube = build('youtube', 'v3', developerKey=settings.youtube_api_key)
+        self.client = YouTubeAPIClient(
+            key_pool=get_key_pool(),
+            timeout=settings.youtube_timeout,
+            max_connections=settings.youtube_max_connections
+        )
         self.max_results = settings.youtube_max_results
-        logger.info("✅ YouTube API client initialized")
+        self.max_concurrent_batches = settings.youtube_max_concurrent_batches
+
+        # Local metadata cache (skips the API entirely on hits)
+        self.cache: Optional[VideoMetadataCache] = None
+        if settings.video_cache_enabled:
+            self.cache = VideoMetadataCache(
+                path=settings.video_cache_path,
+                metadata_ttl=settings.video_cache_metadata_ttl,
+                statistics_ttl=settings.video_cache_statistics_ttl
+            )
+            logger.info(
+                f"✅ Video metadata cache enabled "
+                f"(path: {settings.video_cache_path}, "
+                f"metadata TTL: {settings.video_cache_metadata_ttl}s, "
+                f"statistics TTL: {settings.video_cache_statistics_ttl}s)"
+            )
+        logger.info(
+            f"✅ YouTube API client initialized "
+            f"(max_connections: {settings.youtube_max_connections}, "
+            f"max_concurrent_batches: {self.max_concurrent_batches})"
+        )
 
     def _get_date_filter(self, filter_name: str) -> Optional[str]:
         """
@@ -92,6 +123,221 @@ class YouTubeService:
             logger.warning(f"Error formatting duration '{duration}': {e}")
             return duration
 
+    def _parse_basic_video(self, item: Dict) -> Dict:
+        """
+        Build the basic video dict (queue view) from a videos.list item
+
+        Args:
+            item: Raw API item with at least the snippet part
+
+        Returns:
+            Dict with video_id, title, description, published_at, thumbnail_url
+        """
+        snippet = item.get("snippet", {})
+
+        return {
+            "video_id": item.get("id", ""),
+            "title": snippet.get("title", ""),
+            "description": snippet.get("description", ""),
+            "published_at": snippet.get("publishedAt", ""),
+            "thumbnail_url": (
+                snippet.get("thumbnails", {})
+                .get("default", {})
+                .get("url", "")
+            ),
+        }
+
+    def _parse_video_details(self, item: Dict) -> VideoData:
+        """
+        Build VideoData from a videos.list item
+
+        Args:
+            item: Raw API item with snippet, statistics and contentDetails
+
+        Returns:
+            VideoData object (transcript empty)
+        """
+        snippet = item.get("snippet", {})
+        statistics = item.get("statistics", {})
+        content_details = item.get("contentDetails", {})
+
+        return VideoData(
+            id=item.get("id", ""),
+            title=snippet.get("title", ""),
+            description=snippet.get("description", ""),
+            published_at=snippet.get("publishedAt", ""),
+            channel_title=snippet.get("channelTitle"),
+            duration=self._format_duration(
+                content_details.get("duration", "")
+            ),
+            view_count=int(statistics.get("viewCount", 0)),
+            like_count=int(statistics.get("likeCount", 0)),
+            comment_count=int(statistics.get("commentCount", 0)),
+            tags=snippet.get("tags", []),
+            thumbnail_url=(
+                snippet.get("thumbnails", {})
+                .get("high", {})
+                .get("url", "")
+            ),
+            transcript=""  # Will be filled by transcript service
+        )
+
+    async def _fetch_video_items(
+        self,
+        video_ids: List[str],
+        part: str
+    ) -> List[Dict]:
+        """
+        Fetch raw `videos.list` items for many IDs in parallel 50-ID batches
+
+        All batches are sent at once (bounded by max_concurrent_batches).
+        A failed batch only drops its own videos; the call fails only when
+        EVERY batch fails.
+
+        Args:
+            video_ids: List of YouTube video IDs
+            part: Comma-separated resource parts (e.g., "snippet,statistics")
+
+        Returns:
+            List of API items in the same order as video_ids
+            (IDs not returned by the API are skipped)
+
+        Raises:
+            Exception: Error of the first batch if all batches failed
+        """
+        unique_ids = list(dict.fromkeys(video_ids))
+
+        # Split in batches of 50 (API limit)
+        batch_size = 50
+        batches = [
+            unique_ids[i:i + batch_size]
+            for i in range(0, len(unique_ids), batch_size)
+        ]
+
+        semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+
+        async def fetch_batch(batch: List[str]) -> List[Dict]:
+            """Fetch one batch with concurrency limit"""
+            async with semaphore:
+                # Qualifier video lookups are the critical path
+                response = await self.client.list(
+                    "videos",
+                    priority=QuotaPriority.HIGH,
+                    part=part,
+                    id=",".join(batch)
+                )
+                return response.get("items", [])
+
+        logger.debug(
+            f"Sending {len(batches)} batches in parallel "
+            f"(max {self.max_concurrent_batches} concurrent)"
+        )
+        results = await asyncio.gather(
+            *[fetch_batch(batch) for batch in batches],
+            return_exceptions=True
+        )
+
+        # Merge batch results, keeping failures per batch
+        items_by_id = {}
+        errors = []
+
+        for index, (batch, result) in enumerate(zip(batches, results), 1):
+            if isinstance(result, Exception):
+                logger.warning(
+                    f"⚠️ Batch {index}/{len(batches)} failed "
+                    f"({len(batch)} videos skipped): {result}"
+                )
+                errors.append(result)
+                continue
+
+            for item in result:
+                items_by_id[item.get("id", "")] = item
+
+        if errors and len(errors) == len(batches):
+            raise errors[0]
+
+        return [items_by_id[vid] for vid in unique_ids if vid in items_by_id]
+
+    async def _get_video_items(
+        self,
+        video_ids: List[str],
+        part: str
+    ) -> List[Dict]:
+        """
+        Get videos.list items, serving them from the metadata cache first
+
+        - Full hits skip the API entirely
+        - Videos whose statistics expired refresh only part=statistics
+        - Misses are fetched with all parts and stored
+
+        Args:
+            video_ids: List of YouTube video IDs
+            part: Parts needed by the caller (e.g., "snippet")
+
+        Returns:
+            List of API items in the same order as video_ids
+
+        Raises:
+            Exception: If every API batch failed
+        """
+        if not self.cache:
+            return await self._fetch_video_items(video_ids, part)
+
+        unique_ids = list(dict.fromkeys(video_ids))
+        fresh, stale, missing = await self.cache.lookup(
+            unique_ids,
+            require_statistics="statistics" in part
+        )
+
+        # Stale items are kept as fallback if the refresh fails
+        items_by_id = {**stale, **fresh}
+
+        if missing:
+            fetched = await self._fetch_video_items(missing, FULL_VIDEO_PARTS)
+            await self.cache.store(fetched)
+            items_by_id.update({item["id"]: item for item in fetched})
+
+        if stale:
+            try:
+                refreshed = await self._fetch_video_items(list(stale), "statistics")
+                await self.cache.store(refreshed)
+                for item in refreshed:
+                    items_by_id[item["id"]]["statistics"] = item.get("statistics", {})
+            except Exception as e:
+                logger.warning(f"⚠️ Statistics refresh failed, using cached values: {e}")
+
+        # 1 quota unit per 50-ID videos.list call
+        calls_without_cache = math.ceil(len(unique_ids) / 50)
+        calls_made = math.ceil(len(missing) / 50) + math.ceil(len(stale) / 50)
+        self.cache.record_quota_saved(max(0, calls_without_cache - calls_made))
+
+        logger.debug(
+            f"Video cache: {len(fresh)} hits, {len(stale)} stale statistics, "
+            f"{len(missing)} misses"
+        )
+
+        return [items_by_id[vid] for vid in unique_ids if vid in items_by_id]
+
+    def quota_stats(self) -> Dict:
+        """
+        Get YouTube key pool metrics
+
+        Returns:
+            Dict with pooled used/remaining budget and per-key counters
+        """
+        return self.client.key_pool.snapshot()
+
+    def cache_stats(self) -> Dict:
+        """
+        Get metadata cache statistics
+
+        Returns:
+            Dict with hit ratio and quota saved (empty if cache disabled)
+        """
+        if not self.cache:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.stats()}
+
     async def get_channel_videos(
         self,
         video_ids: List[str],
@@ -127,35 +373,9 @@ class YouTubeService:
                 f"(channel: {channel_id or 'unknown'})"
             )
 
-            all_videos = []
-
-            # Process in batches of 50 (API limit)
-            batch_size = 50
-            for i in range(0, len(video_ids), batch_size):
-                batch = video_ids[i:i + batch_size]
-                logger.debug(f"Processing batch {i//batch_size + 1}: {len(batch)} videos")
-
-                response = self.youtube.videos().list(
-                    part="snippet",
-                    id=",".join(batch)
-                ).execute()
+            items = await self._get_video_items(video_ids, part="snippet")
 
-                for item in response.get("items", []):
-                    snippet = item.get("snippet", {})
-
-                    video_data = {
-                        "video_id": item.get("id", ""),
-                        "title": snippet.get("title", ""),
-                        "description": snippet.get("description", ""),
-                        "published_at": snippet.get("publishedAt", ""),
-                        "thumbnail_url": (
-                            snippet.get("thumbnails", {})
-                            .get("default", {})
-                            .get("url", "")
-                        ),
-                    }
-
-                    all_videos.append(video_data)
+            all_videos = [self._parse_basic_video(item) for item in items]
 
             logger.success(
                 f"✅ Fetched {len(all_videos)} videos by ID "
@@ -170,9 +390,9 @@ class YouTubeService:
 
             return all_videos
 
-        except HttpError as e:
+        except YouTubeAPIError as e:
             logger.error(f"❌ YouTube API error: {e}")
-            if e.resp.status == 403:
+            if e.status == 403:
                 logger.error("Quota exceeded or invalid API key!")
             raise
         except Exception as e:
@@ -195,61 +415,89 @@ class YouTubeService:
         try:
             logger.info(f"Fetching details for {len(video_ids)} videos")
 
-            all_details = []
-
-            # Process in batches of 50 (API limit)
-            batch_size = 50
-            for i in range(0, len(video_ids), batch_size):
-                batch = video_ids[i:i + batch_size]
-                logger.debug(f"Processing batch {i//batch_size + 1}: {len(batch)} videos")
+            items = await self._get_video_items(video_ids, part=FULL_VIDEO_PARTS)
 
-                response = self.youtube.videos().list(
-                    part="snippet,statistics,contentDetails",
-                    id=",".join(batch)
-                ).execute()
-
-                for item in response.get("items", []):
-                    snippet = item.get("snippet", {})
-                    statistics = item.get("statistics", {})
-                    content_details = item.get("contentDetails", {})
-
-                    video_data = VideoData(
-                        id=item.get("id", ""),
-                        title=snippet.get("title", ""),
-                        description=snippet.get("description", ""),
-                        published_at=snippet.get("publishedAt", ""),
-                        channel_title=snippet.get("channelTitle"),
-                        duration=self._format_duration(
-                            content_details.get("duration", "")
-                        ),
-                        view_count=int(statistics.get("viewCount", 0)),
-                        like_count=int(statistics.get("likeCount", 0)),
-                        comment_count=int(statistics.get("commentCount", 0)),
-                        tags=snippet.get("tags", []),
-                        thumbnail_url=(
-                            snippet.get("thumbnails", {})
-                            .get("high", {})
-                            .get("url", "")
-                        ),
-                        transcript=""  # Will be filled by transcript service
-                    )
-
-                    all_details.append(video_data)
+            all_details = [self._parse_video_details(item) for item in items]
 
             logger.success(
                 f"✅ Fetched details for {len(all_details)} videos"
             )
             return all_details
 
-        except HttpError as e:
+        except YouTubeAPIError as e:
             logger.error(f"❌ YouTube API error getting details: {e}")
-            if e.resp.status == 403:
+            if e.status == 403:
                 logger.error("Quota exceeded!")
             raise
         except Exception as e:
             logger.error(f"❌ Error fetching video details: {e}")
             raise
 
+    async def get_videos_enriched(
+        self,
+        video_ids: List[str],
+        channel_id: Optional[str] = None
+    ) -> Tuple[List[Dict], List[VideoData]]:
+        """
+        Fetch-once enrichment: basic dicts AND VideoData from one videos.list
+
+        Replaces calling get_channel_videos() followed by get_video_details()
+        on the same IDs, which cost two round-trips and twice the quota.
+
+        Args:
+            video_ids: List of video IDs to fetch (from videos_para_scann)
+            channel_id: Optional channel ID (only for logging)
+
+        Returns:
+            Tuple (basic_videos, detailed_videos), both in input order,
+            ready for core.parsers.merge_video_data()
+
+        Raises:
+            Exception: If API call fails
+        """
+        try:
+            if not video_ids:
+                logger.warning("No video IDs provided to fetch")
+                return [], []
+
+            logger.info(
+                f"Fetching {len(video_ids)} videos BY ID with details "
+                f"(channel: {channel_id or 'unknown'})"
+            )
+
+            items = await self._get_video_items(video_ids, part=FULL_VIDEO_PARTS)
+
+            basic_videos = [self._parse_basic_video(item) for item in items]
+            detailed_videos = [self._parse_video_details(item) for item in items]
+
+            logger.success(
+                f"✅ Fetched {len(items)} videos with details in one pass "
+                f"(requested: {len(video_ids)})"
+            )
+
+            if len(items) < len(video_ids):
+                missing = len(video_ids) - len(items)
+                logger.warning(
+                    f"⚠️ {missing} videos not found (may be deleted/private)"
+                )
+
+            return basic_videos, detailed_videos
+
+        except YouTubeAPIError as e:
+            logger.error(f"❌ YouTube API error: {e}")
+            if e.status == 403:
+                logger.error("Quota exceeded or invalid API key!")
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error fetching videos with details: {e}")
+            raise
+
+    async def close(self):
+        """Close YouTube API client and metadata cache"""
+        await self.client.close()
+        if self.cache:
+            self.cache.close()
+
 
 # ============================================
 # Singleton instance
@@ -3,58 +3,187 @@ Unit Tests for Services
 Tests for Supabase, YouTube, Transcript, and Claude services
 """
 
+import json
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
+from config import get_settings
 from models import VideoData, ProjectData, CanalData
 from services.supabase_service import SupabaseService
 from services.youtube_service import YouTubeService
+from services.youtube_client import YouTubeAPIClient, YouTubeAPIError
 from services.transcript_service import TranscriptService
 from services.claude_service import ClaudeService
+from services.video_cache import VideoMetadataCache
+from services.project_cache import ProjectContextCache
+from services.youtube_quota import KeyPool, QuotaPriority, QuotaBudgetExceeded
+
+
+@pytest.fixture(autouse=True)
+def isolated_video_cache(tmp_path, monkeypatch):
+    """Give every test its own empty video metadata cache"""
+    monkeypatch.setattr(
+        get_settings(), "video_cache_path", str(tmp_path / "video_cache.db")
+    )
 
 
 # ============================================
 # Supabase Service Tests
 # ============================================
 
+def mock_supabase_rpc(service: SupabaseService, responses: dict) -> list:
+    """Route PostgREST RPC calls to canned responses, return the call log"""
+    import httpx
+
+    calls = []
+
+    def handler(request):
+        function = request.url.path.rsplit("/", 1)[-1]
+        calls.append(function)
+        return httpx.Response(200, json=responses[function])
+
+    service.client = httpx.AsyncClient(
+        base_url="https://supabase.test/rest/v1",
+        transport=httpx.MockTransport(handler)
+    )
+    return calls
+
+
 @pytest.mark.asyncio
 async def test_supabase_get_canal_e_videos():
     """Test fetching canal data from Supabase"""
-    with patch('services.supabase_service.create_client') as mock_client:
-        # Mock RPC response
-        mock_rpc = Mock()
-        mock_rpc.execute.return_value.data = [{
-            "youtube_channel_id": "UCtest123",
-            "videos": ["vid1", "vid2"]
-        }]
-        mock_client.return_value.rpc.return_value = mock_rpc
+    service = SupabaseService()
+    calls = mock_supabase_rpc(service, {
+        "obter_canal_e_videos": {
+            "youtube_channel_id": "UCtest123456789",
+            "videos_para_scann": "vid1,vid2"
+        }
+    })
 
-        service = SupabaseService()
-        result = await service.get_canal_e_videos(123)
+    result = await service.get_canal_e_videos(123)
 
-        assert isinstance(result, CanalData)
-        assert result.youtube_channel_id == "UCtest123"
-        assert len(result.videos) == 2
+    assert calls == ["obter_canal_e_videos"]
+    assert isinstance(result, CanalData)
+    assert result.youtube_channel_id == "UCtest123456789"
+    assert len(result.videos) == 2
 
 
 @pytest.mark.asyncio
 async def test_supabase_get_dados_projeto():
     """Test fetching project data from Supabase"""
-    with patch('services.supabase_service.create_client') as mock_client:
-        # Mock RPC response
-        mock_rpc = Mock()
-        mock_rpc.execute.return_value.data = [{
-            "nome_produto": "TestProduct",
+    service = SupabaseService()
+    mock_supabase_rpc(service, {
+        "obter_dados_projeto_por_canal": [{
+            "nome_produto_servico": "TestProduct",
             "descricao_servico": "Test description",
             "pais": "BR"
         }]
-        mock_client.return_value.rpc.return_value = mock_rpc
+    })
+
+    result = await service.get_dados_projeto(123)
+
+    assert isinstance(result, ProjectData)
+    assert result.nome_produto == "TestProduct"
+    assert result.pais == "BR"
+
+
+@pytest.mark.asyncio
+async def test_supabase_scanner_context_single_rpc_with_fallback():
+    """Test scanner context uses the combined RPC and falls back when it's missing"""
+    import httpx
+
+    service = SupabaseService()
+    calls = mock_supabase_rpc(service, {
+        "obter_contexto_scanner": {
+            "youtube_channel_id": "UCtest123456789",
+            "videos_para_scann": "vid1,vid2",
+            "nome_produto_servico": "TestProduct",
+            "descricao_servico": "Test description",
+            "pais": "BR"
+        }
+    })
+
+    canal_data, project_data = await service.get_scanner_context(123)
+
+    assert calls == ["obter_contexto_scanner"]
+    assert canal_data.videos == ["vid1", "vid2"]
+    assert project_data.nome_produto == "TestProduct"
+
+    # Combined function not deployed: PostgREST answers 404 PGRST202
+    fallback_calls = []
+
+    def handler(request):
+        function = request.url.path.rsplit("/", 1)[-1]
+        fallback_calls.append(function)
+        if function == "obter_contexto_scanner":
+            return httpx.Response(404, json={"code": "PGRST202", "message": "Could not find the function"})
+        if function == "obter_canal_e_videos":
+            return httpx.Response(200, json={"youtube_channel_id": "UCtest123456789", "videos_para_scann": "vid1"})
+        return httpx.Response(200, json=[{"nome_produto_servico": "TestProduct", "descricao_servico": "Test", "pais": "BR"}])
+
+    service = SupabaseService()
+    service.client = httpx.AsyncClient(
+        base_url="https://supabase.test/rest/v1",
+        transport=httpx.MockTransport(handler)
+    )
+
+    canal_data, project_data = await service.get_scanner_context(123)
+    await service.get_scanner_context(123)
+
+    assert canal_data.videos == ["vid1"]
+    assert project_data.nome_produto == "TestProduct"
+    # Missing function is only probed once
+    assert fallback_calls.count("obter_contexto_scanner") == 1
+    assert fallback_calls.count("obter_canal_e_videos") == 2
+    # One cache lookup per call: first misses, second hits
+    assert service.project_cache_stats()["misses"] == 1
+    assert service.project_cache_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_supabase_project_cache_hit_and_invalidation():
+    """Test cached project data skips its RPC until invalidated"""
+    service = SupabaseService()
+    calls = mock_supabase_rpc(service, {
+        "obter_contexto_scanner": {
+            "youtube_channel_id": "UCtest123456789",
+            "videos_para_scann": "vid1",
+            "nome_produto_servico": "TestProduct",
+            "descricao_servico": "Test description",
+            "pais": "BR"
+        },
+        "obter_canal_e_videos": {
+            "youtube_channel_id": "UCtest123456789",
+            "videos_para_scann": "vid2"
+        }
+    })
+
+    await service.get_scanner_context(123)
+    canal_data, project_data = await service.get_scanner_context(123)
+
+    # Queue is always fresh, project comes from cache
+    assert calls == ["obter_contexto_scanner", "obter_canal_e_videos"]
+    assert canal_data.videos == ["vid2"]
+    assert project_data.nome_produto == "TestProduct"
+    assert service.project_cache_stats()["hit_ratio"] == 0.5
+
+    assert service.invalidate_project_cache(123) == 1
+    await service.get_scanner_context(123)
+    assert calls[-1] == "obter_contexto_scanner"
+
 
-        service = SupabaseService()
-        result = await service.get_dados_projeto(123)
+def test_project_cache_lru_eviction():
+    """Test least recently used scanner is evicted first"""
+    cache = ProjectContextCache(max_entries=2, ttl=600)
+    project = ProjectData(nome_produto="P", descricao_servico="D", pais="BR")
 
-        assert isinstance(result, ProjectData)
-        assert result.nome_produto == "TestProduct"
-        assert result.pais == "BR"
+    cache.set(1, project)
+    cache.set(2, project)
+    cache.get(1)
+    cache.set(3, project)
+
+    assert cache.get(2) is None
+    assert cache.get(1) is project
+    assert cache.stats()["evictions"] == 1
 
 
 # ============================================
@@ -80,6 +209,258 @@ async def test_youtube_normalize_video_id():
     assert service._normalize_video_id(" xyz789 ") == "xyz789"
 
 
+@pytest.mark.asyncio
+async def test_youtube_get_video_details_async_client():
+    """Test video details are fetched through the async API client"""
+    service = YouTubeService()
+    service.client.list = AsyncMock(return_value={
+        "items": [{
+            "id": "abc123",
+            "snippet": {
+                "title": "Test Video",
+                "publishedAt": "2025-10-18T15:30:00Z",
+                "tags": ["test"]
+            },
+            "statistics": {"viewCount": "1000", "likeCount": "50"},
+            "contentDetails": {"duration": "PT15M42S"}
+        }]
+    })
+
+    result = await service.get_video_details(["abc123"])
+
+    service.client.list.assert_awaited_once_with(
+        "videos",
+        priority=QuotaPriority.HIGH,
+        part="snippet,statistics,contentDetails",
+        id="abc123"
+    )
+    assert len(result) == 1
+    assert result[0].duration == "15:42"
+    assert result[0].view_count == 1000
+
+
+@pytest.mark.asyncio
+async def test_youtube_batches_preserve_order_and_partial_failures():
+    """Test parallel 50-ID batches keep input order and skip failed batches"""
+    service = YouTubeService()
+    video_ids = [f"vid{i:03d}" for i in range(120)]
+
+    async def fake_list(resource, priority, part, id):
+        batch = id.split(",")
+        if "vid050" in batch:
+            raise YouTubeAPIError(500, "backendError", "Backend error")
+        # API may return items in any order
+        return {"items": [{"id": vid, "snippet": {}} for vid in reversed(batch)]}
+
+    service.client.list = AsyncMock(side_effect=fake_list)
+
+    items = await service._fetch_video_items(video_ids, part="snippet")
+
+    assert service.client.list.await_count == 3
+    assert [item["id"] for item in items] == video_ids[:50] + video_ids[100:]
+
+
+@pytest.mark.asyncio
+async def test_youtube_get_videos_enriched_single_request():
+    """Test basic dicts and VideoData come from one videos.list call"""
+    service = YouTubeService()
+    service.client.list = AsyncMock(return_value={
+        "items": [{
+            "id": "abc123",
+            "snippet": {
+                "title": "Test Video",
+                "publishedAt": "2025-10-18T15:30:00Z",
+                "thumbnails": {"default": {"url": "http://thumb/default.jpg"}}
+            },
+            "statistics": {"commentCount": "7"},
+            "contentDetails": {"duration": "PT30S"}
+        }]
+    })
+
+    basic, detailed = await service.get_videos_enriched(["abc123"])
+
+    assert service.client.list.await_count == 1
+    assert basic[0]["video_id"] == "abc123"
+    assert basic[0]["thumbnail_url"] == "http://thumb/default.jpg"
+    assert detailed[0].comment_count == 7
+    assert detailed[0].duration == "00:30"
+
+
+@pytest.mark.asyncio
+async def test_youtube_cache_skips_api_on_hit():
+    """Test cached videos skip the API and count quota saved"""
+    service = YouTubeService()
+    service.client.list = AsyncMock(return_value={
+        "items": [{
+            "id": "abc123",
+            "snippet": {"title": "Test", "publishedAt": "2025-10-18T15:30:00Z"},
+            "statistics": {"viewCount": "10"},
+            "contentDetails": {"duration": "PT1M"}
+        }]
+    })
+
+    await service.get_videos_enriched(["abc123"])
+    basic, detailed = await service.get_videos_enriched(["abc123"])
+
+    assert service.client.list.await_count == 1
+    assert detailed[0].view_count == 10
+
+    stats = service.cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["quota_units_saved"] == 1
+
+
+@pytest.mark.asyncio
+async def test_video_cache_statistics_tier_expires_first(tmp_path):
+    """Test expired statistics are reported stale while metadata stays cached"""
+    cache = VideoMetadataCache(
+        path=str(tmp_path / "tiers.db"),
+        metadata_ttl=3600,
+        statistics_ttl=0
+    )
+    await cache.store([{
+        "id": "abc123",
+        "snippet": {"title": "Test"},
+        "statistics": {"viewCount": "10"}
+    }])
+
+    fresh, stale, missing = await cache.lookup(["abc123", "zzz999"])
+    assert fresh == {}
+    assert stale["abc123"]["snippet"]["title"] == "Test"
+    assert missing == ["zzz999"]
+
+    # Snippet-only callers don't need fresh statistics
+    fresh, stale, missing = await cache.lookup(["abc123"], require_statistics=False)
+    assert "abc123" in fresh
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_youtube_client_parses_api_error():
+    """Test YouTube API error responses are mapped to YouTubeAPIError"""
+    import httpx
+
+    def handler(request):
+        return httpx.Response(403, json={
+            "error": {
+                "code": 403,
+                "message": "The request cannot be completed",
+                "errors": [{"reason": "forbidden"}]
+            }
+        })
+
+    client = YouTubeAPIClient(key_pool=KeyPool(["test-key"], daily_limit=10000))
+    client.client = httpx.AsyncClient(
+        base_url="https://youtube.test",
+        transport=httpx.MockTransport(handler)
+    )
+
+    with pytest.raises(YouTubeAPIError) as exc_info:
+        await client.list("videos", part="snippet", id="abc123")
+
+    assert exc_info.value.status == 403
+    assert exc_info.value.reason == "forbidden"
+    await client.close()
+
+
+def test_quota_timezone_fallback_matches_pacific_time():
+    """Test the no-tzdata fallback follows America/Los_Angeles across DST changes"""
+    from datetime import datetime, timedelta, timezone
+    from zoneinfo import ZoneInfo
+    from services.youtube_quota import _PacificFallback, quota_day_start
+
+    fallback = _PacificFallback()
+    pacific = ZoneInfo("America/Los_Angeles")
+
+    # Around the 2025 spring-forward and fall-back transitions
+    for start in (datetime(2025, 3, 9, 8, tzinfo=timezone.utc), datetime(2025, 11, 2, 7, tzinfo=timezone.utc)):
+        for minutes in range(0, 5 * 60, 30):
+            moment = start + timedelta(minutes=minutes)
+            expected = moment.astimezone(pacific)
+            local = moment.astimezone(fallback)
+            assert local.replace(tzinfo=None) == expected.replace(tzinfo=None)
+            assert local.utcoffset() == expected.utcoffset()
+
+    # 06:00 UTC is still the previous quota day in Pacific time
+    day_start = quota_day_start(datetime(2025, 7, 1, 6, tzinfo=timezone.utc).astimezone(fallback))
+    assert (day_start.day, day_start.utcoffset()) == (30, timedelta(hours=-7))
+
+
+@pytest.mark.asyncio
+async def test_quota_ledger_sheds_low_priority_and_stops_on_exhaustion():
+    """Test ledger charges unit costs, sheds LOW calls first and honors quotaExceeded"""
+    import httpx
+
+    pool = KeyPool(["key-a"], daily_limit=300, low_priority_reserve=0.5, normal_priority_reserve=0.1)
+    ledger = pool.ledgers["key-a"]
+
+    assert ledger.charge("search") == 100
+    assert ledger.charge("videos", QuotaPriority.LOW) == 1
+    assert ledger.remaining == 199
+
+    # 199 - 100 < 150 reserve: search is still NORMAL-affordable, comments are not
+    ledger.charge("search")
+    with pytest.raises(QuotaBudgetExceeded):
+        ledger.charge("commentThreads", QuotaPriority.LOW)
+    assert ledger.snapshot()["shed"] == {"commentThreads": 1}
+
+    # HIGH calls keep going until the API reports the quota is gone
+    def handler(request):
+        return httpx.Response(403, json={
+            "error": {"message": "Quota exceeded", "errors": [{"reason": "quotaExceeded"}]}
+        })
+
+    client = YouTubeAPIClient(key_pool=pool)
+    client.client = httpx.AsyncClient(
+        base_url="https://youtube.test",
+        transport=httpx.MockTransport(handler)
+    )
+
+    with pytest.raises(QuotaBudgetExceeded):
+        await client.list("videos", priority=QuotaPriority.HIGH, part="snippet", id="abc123")
+
+    assert ledger.exhausted
+    assert pool.snapshot()["keys_available"] == 0
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_key_pool_rotates_to_least_loaded_key_and_quarantines():
+    """Test requests go to the key with most quota left and skip quarantined keys"""
+    import httpx
+
+    pool = KeyPool(["key-aaaaaa", "key-bbbbbb"], daily_limit=1000)
+    pool.ledgers["key-aaaaaa"].charge("search")
+    used_keys = []
+
+    def handler(request):
+        key = request.url.params["key"]
+        used_keys.append(key)
+        if key == "key-bbbbbb" and len(used_keys) > 1:
+            return httpx.Response(403, json={
+                "error": {"message": "Quota exceeded", "errors": [{"reason": "quotaExceeded"}]}
+            })
+        return httpx.Response(200, json={"items": []})
+
+    client = YouTubeAPIClient(key_pool=pool)
+    client.client = httpx.AsyncClient(
+        base_url="https://youtube.test",
+        transport=httpx.MockTransport(handler)
+    )
+
+    await client.list("videos", part="snippet", id="abc123")
+    await client.list("videos", part="snippet", id="abc123")
+
+    # b had more quota left; its quotaExceeded retried the call on a
+    assert used_keys == ["key-bbbbbb", "key-bbbbbb", "key-aaaaaa"]
+    snapshot = pool.snapshot()
+    assert snapshot["keys_available"] == 1
+    assert snapshot["keys"]["...bbbbbb"]["exhausted"] is True
+    assert snapshot["keys"]["...aaaaaa"]["calls"] == {"search": 1, "videos": 1}
+    await client.close()
+
+
 # ============================================
 # Transcript Service Tests
 # ============================================
@@ -123,6 +504,83 @@ async def test_transcript_get_transcript_timeout():
         assert result == ""
 
 
+@pytest.mark.asyncio
+async def test_transcript_batch_stream_with_single_fallback():
+    """Test /transcribe-batch NDJSON results and per-video fallback for the rest"""
+    import httpx
+
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append((request.url.path, body))
+        if request.url.path == "/transcribe-batch":
+            # Stream ends before vid2 (e.g. API restarted)
+            lines = [
+                {"video_id": "vid1", "transcription": "texto 1", "contem": True, "from_cache": False},
+                {"video_id": "vid0", "transcription": "texto 0", "contem": True, "from_cache": True},
+            ]
+            return httpx.Response(200, text="".join(json.dumps(line) + "\n" for line in lines))
+        video_id = body["url"].split("v=")[1]
+        return httpx.Response(200, json={"video_id": video_id, "transcription": f"texto {video_id[-1]}"})
+
+    service = TranscriptService()
+    service.client = httpx.AsyncClient(base_url="https://transcricao.test", transport=httpx.MockTransport(handler))
+    service.api_url = "https://transcricao.test"
+
+    results = [item async for item in service.stream_batch_transcripts(["vid0", "vid1", "vid2", "vid1"])]
+
+    assert results == [("vid1", "texto 1"), ("vid0", "texto 0"), ("vid2", "texto 2")]
+    assert requests[0] == ("/transcribe-batch", {"videos": ["vid0", "vid1", "vid2"]})
+    assert [path for path, _ in requests[1:]] == ["/transcribe"]
+
+    # Older API without the endpoint: probed once, then one POST per video
+    def old_api(request: httpx.Request) -> httpx.Response:
+        requests.append((request.url.path, None))
+        if request.url.path == "/transcribe-batch":
+            return httpx.Response(404)
+        return httpx.Response(200, json={"transcription": "ok"})
+
+    requests.clear()
+    service.client = httpx.AsyncClient(base_url="https://transcricao.test", transport=httpx.MockTransport(old_api))
+    transcripts = await service.get_batch_transcripts(["a", "b"])
+    await service.get_batch_transcripts(["c", "d"])
+
+    assert transcripts == {"a": "ok", "b": "ok"}
+    assert [path for path, _ in requests].count("/transcribe-batch") == 1
+    await service.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_transcript_get_batch_transcripts_runs_chunks_concurrently():
+    """Test get_batch_transcripts sends its /transcribe-batch chunks in parallel"""
+    import asyncio
+    import httpx
+
+    in_flight = []
+    peak = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        videos = json.loads(request.content)["videos"]
+        in_flight.append(request)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.05)
+        in_flight.remove(request)
+        lines = [{"video_id": video_id, "transcription": f"texto {video_id}"} for video_id in videos]
+        return httpx.Response(200, text="".join(json.dumps(line) + "\n" for line in lines))
+
+    service = TranscriptService()
+    service.batch_size = 2
+    service.client = httpx.AsyncClient(base_url="https://transcricao.test", transport=httpx.MockTransport(handler))
+    service.api_url = "https://transcricao.test"
+
+    transcripts = await service.get_batch_transcripts(["a", "b", "c", "d"])
+
+    assert transcripts == {v: f"texto {v}" for v in ["a", "b", "c", "d"]}
+    assert max(peak) == 2
+    await service.client.aclose()
+
+
 # ============================================
 # Claude Service Tests
 # ============================================
@@ -155,14 +613,14 @@ def test_claude_format_video_for_prompt():
 @pytest.mark.asyncio
 async def test_claude_semantic_analysis_not():
     """Test Claude analysis returning NOT"""
-    with patch('services.claude_service.Anthropic') as mock_anthropic:
+    with patch('services.claude_service.AsyncAnthropic') as mock_anthropic:
         # Mock Claude response: NOT
         mock_response = Mock()
         mock_response.content = [Mock(text="NOT")]
         mock_response.usage = Mock(input_tokens=1000, output_tokens=10)
 
         mock_client = Mock()
-        mock_client.messages.create.return_value = mock_response
+        mock_client.messages.create = AsyncMock(return_value=mock_response)
         mock_anthropic.return_value = mock_client
 
         service = ClaudeService()
@@ -191,14 +649,14 @@ async def test_claude_semantic_analysis_not():
 @pytest.mark.asyncio
 async def test_claude_semantic_analysis_qualified():
     """Test Claude analysis returning qualified IDs"""
-    with patch('services.claude_service.Anthropic') as mock_anthropic:
+    with patch('services.claude_service.AsyncAnthropic') as mock_anthropic:
         # Mock Claude response: qualified IDs
         mock_response = Mock()
         mock_response.content = [Mock(text="abc123,xyz789")]
         mock_response.usage = Mock(input_tokens=1000, output_tokens=20)
 
         mock_client = Mock()
-        mock_client.messages.create.return_value = mock_response
+        mock_client.messages.create = AsyncMock(return_value=mock_response)
         mock_anthropic.return_value = mock_client
 
         service = ClaudeService()
@@ -231,3 +689,683 @@ async def test_claude_semantic_analysis_qualified():
         assert len(result) == 2
         assert "abc123" in result
         assert "xyz789" in result
+
+
+def test_claude_system_prompt_cached_prefix_and_usage():
+    """Test static instructions carry the cache breakpoint and cache tokens are tracked"""
+    from services.claude_service import STAGE1_SYSTEM_PROMPT
+
+    service = ClaudeService()
+    project = ProjectData(nome_produto="Liftlio", descricao_servico="Monitoring", pais="BR")
+
+    system = service._build_system(STAGE1_SYSTEM_PROMPT, project)
+
+    assert system[0]["text"] == STAGE1_SYSTEM_PROMPT
+    assert system[0]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in system[1]
+    assert "Liftlio" in system[1]["text"]
+
+    service._log_usage("STAGE 1", Mock(
+        input_tokens=100,
+        output_tokens=50,
+        cache_creation_input_tokens=0,
+        cache_read_input_tokens=900
+    ))
+
+    stats = service.usage_stats()
+    assert stats["cache_read_input_tokens"] == 900
+    assert stats["cache_read_ratio"] == 0.9
+
+
+def test_stage2_chunk_planner_balances_under_budget():
+    """Test Stage 2 chunks respect token/video limits and are size-balanced"""
+    from core.chunking import plan_chunks, estimate_video_tokens
+
+    videos = [
+        VideoData(
+            id=f"vid{i}",
+            title="T",
+            published_at="2025-10-18T15:30:00Z",
+            transcript="x" * (2000 if i % 3 == 0 else 200)
+        )
+        for i in range(30)
+    ]
+    budget = 3000
+
+    chunks = plan_chunks(videos, token_budget=budget, max_videos=8)
+    loads = [sum(estimate_video_tokens(v) for v in chunk) for chunk in chunks]
+
+    assert sorted(v.id for chunk in chunks for v in chunk) == sorted(v.id for v in videos)
+    assert all(len(chunk) <= 8 for chunk in chunks)
+    assert max(loads) - min(loads) <= max(estimate_video_tokens(v) for v in videos)
+    assert plan_chunks([], token_budget=budget, max_videos=8) == []
+
+
+def test_stage2_chunk_planner_opens_chunk_when_budget_exceeded():
+    """Test a video that fits in no chunk opens a new one instead of overflowing"""
+    from core.chunking import plan_chunks, estimate_video_tokens
+
+    service = ClaudeService()
+    videos = [
+        VideoData(
+            id=f"vid{i}",
+            title="T",
+            published_at="2025-10-18T15:30:00Z",
+            transcript="x" * 2000
+        )
+        for i in range(3)
+    ]
+    tokens = estimate_video_tokens(videos[0], service._format_video_full)
+    budget = int(tokens * 1.6)
+
+    chunks = plan_chunks(
+        videos,
+        token_budget=budget,
+        max_videos=8,
+        format_video=service._format_video_full
+    )
+    loads = [sum(estimate_video_tokens(v, service._format_video_full) for v in chunk) for chunk in chunks]
+
+    assert len(chunks) == 3
+    assert all(load <= budget for load in loads)
+
+    # A single oversized video still gets a chunk of its own
+    chunks = plan_chunks(videos, token_budget=tokens // 2, max_videos=8, format_video=service._format_video_full)
+    assert [len(chunk) for chunk in chunks] == [1, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_claude_full_analysis_merges_chunks_and_isolates_failures():
+    """Test Stage 2 chunks are merged and a failed chunk only skips its videos"""
+    service = ClaudeService()
+    service.stage2_chunk_max_videos = 2
+    videos = [
+        VideoData(id=f"vid{i}", title="T", published_at="2025-10-18T15:30:00Z")
+        for i in range(4)
+    ]
+
+    async def fake_stage(chunk, project, label=""):
+        if any(v.id == "vid3" for v in chunk):
+            raise RuntimeError("timeout")
+        return {v.id: "✅ APPROVED｜ ok" for v in chunk}
+
+    service._analysis_stage = fake_stage
+    project = ProjectData(nome_produto="P", descricao_servico="D", pais="BR")
+
+    result = await service.full_analysis(videos, project)
+
+    assert len(result) == 4
+    assert sum("✅ APPROVED" in r for r in result.values()) == 2
+    assert sum("⚠️ SKIPPED" in r for r in result.values()) == 2
+
+
+@pytest.mark.asyncio
+async def test_stage1_coalescer_packs_concurrent_scanners():
+    """Test concurrent Stage 1 requests for one product share a Claude call"""
+    import asyncio
+    from services.stage1_coalescer import Stage1Coalescer
+
+    calls = []
+
+    async def runner(videos, project, groups):
+        calls.append(groups)
+        # Model omits vid2: left for the pipeline to default
+        return {"vid1": "PASS", "vid3": "PRE_FILTER_REJECT: Nicho diferente"}
+
+    coalescer = Stage1Coalescer(runner=runner, window=0.05, max_videos=60)
+    project = ProjectData(nome_produto="P", descricao_servico="D", pais="BR")
+
+    def video(video_id):
+        return VideoData(id=video_id, title="T", published_at="2025-10-18T15:30:00Z")
+
+    first, second = await asyncio.gather(
+        coalescer.submit([video("vid1"), video("vid2")], project, "scanner 1"),
+        coalescer.submit([video("vid3")], project, "scanner 2")
+    )
+
+    assert len(calls) == 1
+    assert len(calls[0]) == 2
+    assert first == {"vid1": "PASS"}
+    assert second == {"vid3": "PRE_FILTER_REJECT: Nicho diferente"}
+    assert coalescer.stats()["calls_saved"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stage1_coalescer_cancellation_releases_callers():
+    """Test cancelled timer or flush tasks cancel the waiting callers instead of hanging"""
+    import asyncio
+    from services.stage1_coalescer import Stage1Coalescer
+
+    project = ProjectData(nome_produto="P", descricao_servico="D", pais="BR")
+    videos = [VideoData(id="vid1", title="T", published_at="2025-10-18T15:30:00Z")]
+    started = asyncio.Event()
+
+    async def runner(videos, project, groups):
+        started.set()
+        await asyncio.sleep(3600)
+
+    for window, wait_for_flush in ((3600, False), (0, True)):
+        coalescer = Stage1Coalescer(runner=runner, window=window, max_videos=60)
+        caller = asyncio.create_task(coalescer.submit(videos, project, "scanner 1"))
+        await asyncio.sleep(0)
+        if wait_for_flush:
+            await asyncio.wait_for(started.wait(), 1)
+        # Background tasks are referenced by the coalescer
+        assert coalescer._tasks
+        for task in list(coalescer._tasks):
+            task.cancel()
+
+        await asyncio.wait({caller}, timeout=1)
+        assert caller.cancelled()
+        await asyncio.sleep(0)
+        assert not coalescer._tasks
+
+
+@pytest.mark.asyncio
+async def test_claude_http_pool_reuses_client_and_tracks_saturation():
+    """Test HTTP backend calls share one pooled client and report queued calls"""
+    import asyncio
+    import httpx
+    from services.claude_service_http import ClaudeServiceHTTP
+
+    async def handler(request):
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"success": True, "response": "{}"})
+
+    service = ClaudeServiceHTTP(api_url="http://claude-api", max_connections=2)
+    service.client = httpx.AsyncClient(
+        base_url=service.api_url,
+        transport=httpx.MockTransport(handler)
+    )
+    client = service.client
+
+    results = await asyncio.gather(*[service._call_claude("prompt") for _ in range(4)])
+
+    stats = service.pool_stats()
+    assert results == ["{}"] * 4
+    assert service.client is client
+    assert stats["requests"] == 4
+    assert stats["peak_in_flight"] == 2
+    assert stats["requests_waited"] == 2
+    assert stats["in_flight"] == 0
+
+    await service.close()
+    assert service.pool_stats()["open"] is False
+
+
+def test_json_verdict_parser_yields_pairs_across_chunk_boundaries():
+    """Test streamed JSON verdicts are emitted as soon as each value closes"""
+    from core.parsers import JSONVerdictParser
+
+    parser = JSONVerdictParser()
+    chunks = ['```json\n{"vid', '1": "PA', 'SS", "vid2": "PRE_FILTER_REJECT: n\\u00e3o', ' vende"', ', "n": 3}\n```']
+
+    emitted = [parser.feed(chunk) for chunk in chunks]
+
+    assert emitted[2] == [("vid1", "PASS")]
+    assert emitted[3] == [("vid2", "PRE_FILTER_REJECT: não vende")]
+    assert emitted[4] == [("n", "3")]
+    assert parser.done
+
+
+@pytest.mark.asyncio
+async def test_claude_http_pre_filter_stream_and_chat_fallback():
+    """Test Stage 1 streams verdicts over SSE and falls back to /chat on 404"""
+    import httpx
+    from services.claude_service_http import ClaudeServiceHTTP
+
+    videos = [
+        VideoData(id=f"vid{i}", title="T", published_at="2025-10-18T15:30:00Z")
+        for i in range(3)
+    ]
+    project = ProjectData(nome_produto="P", descricao_servico="D", pais="BR")
+    answer = '{"vid0": "PASS", "vid1": "PRE_FILTER_REJECT: Nicho diferente"}'
+
+    def sse(request):
+        if request.url.path == "/chat/stream":
+            events = [answer[:20], answer[20:]]
+            body = "".join(f"data: {json.dumps({'type': 'text', 'text': e})}\n\n" for e in events)
+            return httpx.Response(200, text=body + "data: [DONE]\n\n")
+        return httpx.Response(500)
+
+    def no_stream(request):
+        if request.url.path == "/chat/stream":
+            return httpx.Response(404)
+        return httpx.Response(200, json={"success": True, "response": answer})
+
+    # vid2 is left out of the answer: the caller defaults it
+    expected = [
+        ("vid0", "PASS"),
+        ("vid1", "PRE_FILTER_REJECT: Nicho diferente"),
+    ]
+
+    for handler, streams in ((sse, True), (no_stream, False)):
+        service = ClaudeServiceHTTP(api_url="http://claude-api")
+        service.stream_enabled = True
+        service.client = httpx.AsyncClient(
+            base_url=service.api_url,
+            transport=httpx.MockTransport(handler)
+        )
+
+        pairs = [pair async for pair in service.pre_filter_stream(videos, project)]
+
+        assert pairs == expected
+        assert service.stream_enabled is streams
+        await service.close()
+
+
+@pytest.mark.asyncio
+async def test_claude_pre_filter_stream_yields_verdicts_while_streaming():
+    """Test the SDK backend yields Stage 1 verdicts before the answer ends"""
+    service = ClaudeService()
+    service.stage1_coalescer = None
+    videos = [
+        VideoData(id=f"vid{i}", title="T", published_at="2025-10-18T15:30:00Z")
+        for i in range(3)
+    ]
+    project = ProjectData(nome_produto="P", descricao_servico="D", pais="BR")
+    events = []
+
+    class FakeStream:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        @property
+        async def text_stream(self):
+            for text in ['{"vid0": "PASS", ', '"vid1": "PRE_FILTER_REJECT: Nicho"', "}"]:
+                events.append(("chunk", text))
+                yield text
+
+        async def get_final_message(self):
+            return Mock(usage=Mock(
+                input_tokens=10, output_tokens=5,
+                cache_creation_input_tokens=0, cache_read_input_tokens=0
+            ))
+
+    service.client = Mock()
+    service.client.messages.stream = Mock(return_value=FakeStream())
+
+    async for pair in service.pre_filter_stream(videos, project):
+        events.append(("verdict", pair))
+
+    assert events[:2] == [("chunk", '{"vid0": "PASS", '), ("verdict", ("vid0", "PASS"))]
+    assert [e[1] for e in events if e[0] == "verdict"] == [
+        ("vid0", "PASS"),
+        ("vid1", "PRE_FILTER_REJECT: Nicho"),
+    ]
+    assert service.usage_stats()["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_claude_http_full_analysis_sanitizes_verdicts():
+    """Test HTTP Stage 2 returns sanitized verdicts and an empty dict on NOT"""
+    import httpx
+    from services.claude_service_http import ClaudeServiceHTTP
+
+    videos = [
+        VideoData(id=f"vid{i}", title="T", published_at="2025-10-18T15:30:00Z", transcript="texto")
+        for i in range(2)
+    ]
+    project = ProjectData(nome_produto="P", descricao_servico="D", pais="BR")
+    answers = [
+        '{"vid0": "✅ APPROVED: Nicho igual, público igual", "vid1": "❌ REJECTED: Outro público"}',
+        '{"result": "NOT"}',
+    ]
+    prompts = []
+
+    def handler(request):
+        prompts.append(json.loads(request.content))
+        return httpx.Response(200, json={"success": True, "response": answers[len(prompts) - 1]})
+
+    service = ClaudeServiceHTTP(api_url="http://claude-api")
+    service.client = httpx.AsyncClient(
+        base_url=service.api_url,
+        transport=httpx.MockTransport(handler)
+    )
+
+    assert await service.full_analysis(videos, project) == {
+        "vid0": "✅ APPROVED｜ Nicho igual; público igual",
+        "vid1": "❌ REJECTED｜ Outro público",
+    }
+    assert await service.full_analysis(videos, project) == {}
+    assert await service.full_analysis([], project) == {}
+    assert len(prompts) == 2
+    assert "texto" in prompts[0]["message"]
+
+    await service.close()
+
+
+def test_qualifier_picks_claude_backend_from_settings(monkeypatch):
+    """Test the qualifier uses the HTTP backend only when claude_http_enabled"""
+    from core.qualifier import VideoQualifier
+    from services.claude_service_http import ClaudeServiceHTTP
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, "verdict_cache_enabled", False)
+    monkeypatch.setattr(settings, "prerank_enabled", False)
+
+    monkeypatch.setattr(settings, "claude_http_enabled", True)
+    qualifier = VideoQualifier()
+    assert isinstance(qualifier.claude, ClaudeServiceHTTP)
+    assert qualifier.pipeline.claude is qualifier.claude
+
+    monkeypatch.setattr(settings, "claude_http_enabled", False)
+    assert isinstance(VideoQualifier().claude, ClaudeService)
+
+
+# ============================================
+# Qualifier Tests
+# ============================================
+
+@pytest.mark.asyncio
+async def test_qualifier_batch_streams_in_completion_order():
+    """Test batch yields each scanner as it finishes, bounded and deduplicated"""
+    import asyncio
+    from core.qualifier import VideoQualifier
+    from models import QualificationResult
+
+    qualifier = VideoQualifier.__new__(VideoQualifier)
+    running = 0
+    peak = 0
+
+    async def fake_process(scanner_id):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05 if scanner_id == 1 else 0.01)
+        running -= 1
+        return QualificationResult(scanner_id=scanner_id)
+
+    qualifier.process = fake_process
+
+    results = [
+        result.scanner_id
+        async for result in qualifier.process_batch([1, 2, 3, 2], max_concurrent=2)
+    ]
+
+    assert sorted(results) == [1, 2, 3]
+    assert results[-1] == 1
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_pipeline_starts_stage2_before_slow_transcripts_finish():
+    """Test PASS videos flow to transcripts and Stage 2 micro-batches without barriers"""
+    import asyncio
+    from core.pipeline import QualificationPipeline
+
+    videos = [
+        VideoData(id=f"vid{i}", title="T", published_at="2025-10-18T15:30:00Z")
+        for i in range(4)
+    ]
+    project = ProjectData(nome_produto="P", descricao_servico="D", pais="BR")
+    events = []
+
+    class FakeClaude:
+        async def pre_filter_stream(self, videos, project, scanner_id=None):
+            for video in videos:
+                yield video.id, "PRE_FILTER_REJECT: Nicho" if video.id == "vid3" else "PASS"
+
+        async def full_analysis(self, videos, project):
+            events.append(("stage2", [v.id for v in videos]))
+            if any(v.id == "vid2" for v in videos):
+                raise RuntimeError("timeout")
+            return {v.id: f"✅ APPROVED｜ {v.transcript}" for v in videos}
+
+    class FakeTranscript:
+        async def get_transcript(self, video_id):
+            await asyncio.sleep(0.2 if video_id == "vid2" else 0.01)
+            events.append(("transcript", video_id))
+            return f"texto {video_id}"
+
+    pipeline = QualificationPipeline(
+        claude=FakeClaude(),
+        transcript=FakeTranscript(),
+        transcript_workers=3,
+        stage2_batch_size=2,
+        stage2_batch_wait=0.05
+    )
+
+    stage1, transcripts, stage2 = await pipeline.run(videos, project, scanner_id=1)
+
+    assert stage1["vid3"] == "PRE_FILTER_REJECT: Nicho"
+    assert set(transcripts) == {"vid0", "vid1", "vid2"}
+    # First micro-batch went to Stage 2 before the slow transcript arrived
+    assert events.index(("stage2", ["vid0", "vid1"])) < events.index(("transcript", "vid2"))
+    assert stage2["vid0"] == "✅ APPROVED｜ texto vid0"
+    assert "⚠️ SKIPPED" in stage2["vid2"]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_runs_on_http_streaming_backend():
+    """Test the pipeline streams Stage 1 over SSE and runs Stage 2 on /chat"""
+    import httpx
+    from core.pipeline import QualificationPipeline
+    from services.claude_service_http import ClaudeServiceHTTP
+
+    videos = [
+        VideoData(id=f"vid{i}", title="T", published_at="2025-10-18T15:30:00Z")
+        for i in range(3)
+    ]
+    project = ProjectData(nome_produto="P", descricao_servico="D", pais="BR")
+    stage1_answer = '{"vid0": "PASS", "vid1": "PRE_FILTER_REJECT: Nicho diferente", "vid2": "PASS"}'
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        if request.url.path == "/chat/stream":
+            events = [stage1_answer[:25], stage1_answer[25:]]
+            body = "".join(f"data: {json.dumps({'type': 'text', 'text': e})}\n\n" for e in events)
+            return httpx.Response(200, text=body + "data: [DONE]\n\n")
+        prompt = json.loads(request.content)["message"]
+        verdicts = {
+            video_id: "✅ APPROVED: Mesmo nicho"
+            for video_id in ("vid0", "vid2") if f"ID: {video_id}" in prompt
+        }
+        return httpx.Response(200, json={"success": True, "response": json.dumps(verdicts)})
+
+    class FakeTranscript:
+        async def get_transcript(self, video_id):
+            return f"texto {video_id}"
+
+    claude = ClaudeServiceHTTP(api_url="http://claude-api")
+    claude.stream_enabled = True
+    claude.client = httpx.AsyncClient(
+        base_url=claude.api_url,
+        transport=httpx.MockTransport(handler)
+    )
+    pipeline = QualificationPipeline(
+        claude=claude,
+        transcript=FakeTranscript(),
+        transcript_workers=2,
+        stage2_batch_size=5,
+        stage2_batch_wait=0.01
+    )
+
+    stage1, transcripts, stage2 = await pipeline.run(videos, project, scanner_id=1)
+
+    assert paths[0] == "/chat/stream"
+    assert "/chat" in paths
+    assert stage1["vid1"] == "PRE_FILTER_REJECT: Nicho diferente"
+    assert set(transcripts) == {"vid0", "vid2"}
+    assert stage2 == {
+        "vid0": "✅ APPROVED｜ Mesmo nicho",
+        "vid2": "✅ APPROVED｜ Mesmo nicho",
+    }
+
+    await claude.close()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_batches_queued_transcripts():
+    """Test queued PASS videos share one transcript batch request"""
+    from core.pipeline import QualificationPipeline
+
+    videos = [
+        VideoData(id=f"vid{i}", title="T", published_at="2025-10-18T15:30:00Z")
+        for i in range(3)
+    ]
+    project = ProjectData(nome_produto="P", descricao_servico="D", pais="BR")
+    batches = []
+
+    class FakeClaude:
+        async def pre_filter_stream(self, videos, project, scanner_id=None):
+            for video in videos:
+                yield video.id, "PASS"
+
+        async def full_analysis(self, videos, project):
+            return {v.id: "✅ APPROVED｜ ok" for v in videos}
+
+    class FakeTranscript:
+        async def stream_batch_transcripts(self, video_ids):
+            batches.append(list(video_ids))
+            # vid1 never comes back
+            for video_id in video_ids:
+                if video_id != "vid1":
+                    yield video_id, f"texto {video_id}"
+
+    pipeline = QualificationPipeline(
+        FakeClaude(), FakeTranscript(), 2, 5, 0.01, transcript_batch_size=10
+    )
+
+    stage1, transcripts, stage2 = await pipeline.run(videos, project)
+
+    assert batches == [["vid0", "vid1", "vid2"]]
+    assert transcripts == {"vid0": "texto vid0", "vid1": "", "vid2": "texto vid2"}
+    assert set(stage2) == {"vid0", "vid1", "vid2"}
+
+
+@pytest.mark.asyncio
+async def test_verdict_cache_skips_claude_and_transcripts_on_hit(tmp_path):
+    """Test cached verdicts are reused and a prompt version change misses"""
+    from core.pipeline import QualificationPipeline
+    from services.verdict_cache import VerdictCache
+
+    cache = VerdictCache(path=str(tmp_path / "verdicts.db"), ttl=3600)
+    videos = [
+        VideoData(id=f"vid{i}", title="T", published_at="2025-10-18T15:30:00Z")
+        for i in range(3)
+    ]
+    project = ProjectData(nome_produto="P", descricao_servico="D", pais="BR")
+    calls = {"stage1": 0, "stage2": 0, "transcripts": 0}
+
+    class FakeClaude:
+        stage1_prompt_version = "v1"
+        stage2_prompt_version = "v1"
+
+        async def pre_filter_stream(self, videos, project, scanner_id=None):
+            calls["stage1"] += len(videos)
+            for video in videos:
+                yield video.id, "PRE_FILTER_REJECT: Nicho" if video.id == "vid2" else "PASS"
+
+        async def full_analysis(self, videos, project):
+            calls["stage2"] += len(videos)
+            return {
+                v.id: "✅ APPROVED｜ ok" if v.id == "vid0" else "⚠️ SKIPPED｜ retry"
+                for v in videos
+            }
+
+    class FakeTranscript:
+        async def get_transcript(self, video_id):
+            calls["transcripts"] += 1
+            return "texto"
+
+    claude = FakeClaude()
+    pipeline = QualificationPipeline(claude, FakeTranscript(), 2, 5, 0.01, verdict_cache=cache)
+
+    first = await pipeline.run(videos, project)
+    second = await pipeline.run(videos, project)
+
+    assert first[0] == second[0]
+    assert second[2]["vid0"] == "✅ APPROVED｜ ok"
+    # Second run: Stage 1 fully cached; only SKIPPED vid1 goes back to Stage 2
+    assert calls == {"stage1": 3, "stage2": 3, "transcripts": 3}
+
+    claude.stage1_prompt_version = "v2"
+    await pipeline.run(videos, project)
+    assert calls["stage1"] == 6
+
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_verdict_cache_skips_defaulted_pass(tmp_path):
+    """Test PASS filled in for videos missing from the answer is not cached"""
+    from core.pipeline import QualificationPipeline
+    from services.verdict_cache import VerdictCache
+
+    cache = VerdictCache(path=str(tmp_path / "verdicts.db"), ttl=3600)
+    videos = [
+        VideoData(id=f"vid{i}", title="T", published_at="2025-10-18T15:30:00Z")
+        for i in range(3)
+    ]
+    project = ProjectData(nome_produto="P", descricao_servico="D", pais="BR")
+
+    # Truncated answer: vid2 missing
+    decisions = {"vid0": "PASS", "vid1": "PRE_FILTER_REJECT: Nicho"}
+
+    class FakeClaude:
+        stage1_prompt_version = "v1"
+        stage2_prompt_version = "v1"
+
+        async def pre_filter_stream(self, videos, project, scanner_id=None):
+            for video_id, decision in decisions.items():
+                yield video_id, decision
+
+        async def full_analysis(self, videos, project):
+            return {v.id: "⚠️ SKIPPED｜ retry" for v in videos}
+
+    class FakeTranscript:
+        async def get_transcript(self, video_id):
+            return "texto"
+
+    pipeline = QualificationPipeline(FakeClaude(), FakeTranscript(), 2, 5, 0.01, verdict_cache=cache)
+    stage1, transcripts, _ = await pipeline.run(videos, project)
+
+    # Defaulted PASS still routes the video to Stage 2...
+    assert stage1["vid2"] == "PASS"
+    assert "vid2" in transcripts
+    # ...but only the model's own verdicts were stored
+    cached = await cache.lookup("stage1", [v.id for v in videos], project, "v1")
+    assert set(cached) == {"vid0", "vid1"}
+
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_prerank_rejects_unrelated_videos_with_tfidf_fallback():
+    """Test the TF-IDF pre-rank drops off-topic videos and keeps related ones"""
+    from core.prerank import VideoPreRanker
+
+    ranker = VideoPreRanker(model_name="", embedding_threshold=0.15, tfidf_threshold=0.02)
+    project = ProjectData(
+        nome_produto="Liftlio",
+        descricao_servico="Monitoramento de menções de marca no YouTube para marketing orgânico B2B",
+        pais="BR"
+    )
+    videos = [
+        VideoData(
+            id="cooking",
+            title="Receita de bolo de cenoura",
+            description="Cobertura de chocolate fácil",
+            published_at="2025-10-18T15:30:00Z",
+            tags=["receita", "bolo"]
+        ),
+        VideoData(
+            id="marketing",
+            title="Marketing orgânico no YouTube",
+            description="Como monitorar menções da sua marca",
+            published_at="2025-10-18T15:30:00Z"
+        ),
+    ]
+
+    kept, rejected = await ranker.split(videos, project)
+
+    assert [v.id for v in kept] == ["marketing"]
+    assert list(rejected) == ["cooking"]
+    assert "," not in rejected["cooking"]
+    assert ranker.stats()["backend"] == "tfidf"
+    assert ranker.stats()["rejected"] == 1
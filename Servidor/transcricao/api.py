@@ -1,23 +1,46 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from main import process_video, check_video_exists
+from typing import List
+import main
+from main import check_video_exists, extract_video_id
+from local_cache import local_cache
+from transcript_engine import get_engine, close_engine
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import json
+import os
 
-app = FastAPI()
+# Limite de videos por chamada ao /transcribe-batch
+MAX_BATCH_SIZE = int(os.getenv("TRANSCRIPT_MAX_BATCH_SIZE", "200"))
 
-# Criar pool de threads para processar até 5 transcrições simultaneamente
-executor = ThreadPoolExecutor(max_workers=5)
+app = FastAPI()
 
 class VideoRequest(BaseModel):
     url: str
 
+class BatchRequest(BaseModel):
+    videos: List[str]  # URLs ou IDs
+
+@app.on_event("startup")
+async def startup():
+    # Engine criado dentro do event loop (concorrencia via TRANSCRIPT_CONCURRENCY)
+    get_engine()
+
+@app.on_event("shutdown")
+async def shutdown():
+    close_engine()
+    # Gravar upserts ainda no buffer antes de sair
+    if main.upsert_buffer:
+        await asyncio.to_thread(main.upsert_buffer.close)
+    if local_cache:
+        local_cache.close()
+
 @app.post("/process")
 async def process_video_endpoint(request: VideoRequest):
     try:
-        video_id = request.url.split("v=")[1] if "v=" in request.url else request.url.split("/")[-1]
-        
-        exists, data = check_video_exists(video_id)
+        video_id = extract_video_id(request.url)
+
+        exists, data = await asyncio.to_thread(check_video_exists, video_id)
         if exists:
             return {
                 "status": "completed",
@@ -25,12 +48,10 @@ async def process_video_endpoint(request: VideoRequest):
                 "data": data,
                 "from_cache": True
             }
-        
-        # Executar process_video em thread separada para não bloquear
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(executor, process_video, request.url)
-        return result
-        
+
+        # Cache ja consultado acima
+        return await get_engine().process_video(request.url, check_cache=False)
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -38,9 +59,7 @@ async def process_video_endpoint(request: VideoRequest):
 async def transcribe_video_endpoint(request: VideoRequest):
     """Endpoint compatível com a função SQL existente"""
     try:
-        # Executar process_video em thread separada para não bloquear
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(executor, process_video, request.url)
+        result = await get_engine().process_video(request.url)
         return {
             "transcription": result.get("transcription", ""),
             "video_id": result.get("video_id", ""),
@@ -49,3 +68,36 @@ async def transcribe_video_endpoint(request: VideoRequest):
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/transcribe-batch")
+async def transcribe_batch_endpoint(request: BatchRequest):
+    """
+    Varios videos numa chamada: resposta NDJSON, uma linha por video
+    (mesmo formato do /transcribe) assim que cada um fica pronto
+    """
+    if len(request.videos) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Maximo de {MAX_BATCH_SIZE} videos por lote")
+
+    async def stream():
+        async for result in get_engine().process_batch(request.videos):
+            line = {
+                "transcription": result.get("transcription", ""),
+                "video_id": result.get("video_id", ""),
+                "contem": result.get("contem", False),
+                "from_cache": result.get("from_cache", False)
+            }
+            if result.get("error"):
+                line["error"] = result["error"]
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.get("/stats")
+async def stats_endpoint():
+    """Concorrencia e retries do motor de transcricao, gravacoes em lote, cache local"""
+    stats = get_engine().stats()
+    if local_cache:
+        stats["local_cache"] = local_cache.stats()
+    if main.upsert_buffer:
+        stats["upsert_buffer"] = main.upsert_buffer.stats()
+    return stats
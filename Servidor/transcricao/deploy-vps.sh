@@ -13,6 +13,8 @@ echo "📦 Creating package..."
 tar -czf transcricao-deploy.tar.gz \
   api.py \
   main.py \
+  transcript_engine.py \
+  local_cache.py \
   requirements.txt \
   dockerfile \
   docker-compose.yml \
@@ -0,0 +1,303 @@
+# local_cache.py
+# Cache local de duas camadas na frente da tabela Videos_trancricao
+# Camada 1: LRU em memoria do processo; camada 2: SQLite em disco com a
+# transcricao comprimida (zlib). Ambas limitadas em bytes, com eviction LRU
+# Linhas 'sem legendas' (contem=False) guardam verificado_em e falhas para
+# o prazo do cache negativo (ver main.cache_hit)
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Configuracao (env)
+LOCAL_CACHE_ENABLED = os.getenv("LOCAL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LOCAL_CACHE_MEMORY_MB = float(os.getenv("LOCAL_CACHE_MEMORY_MB", "64"))
+LOCAL_CACHE_DISK_MB = float(os.getenv("LOCAL_CACHE_DISK_MB", "1024"))
+LOCAL_CACHE_PATH = os.getenv("LOCAL_CACHE_PATH", "cache/transcricoes.db")
+# Hit em disco so regrava acessado_em se o valor salvo for mais velho que isso
+# (ordem LRU com resolucao de alguns minutos, sem escrita a cada leitura)
+LOCAL_CACHE_TOUCH_INTERVAL = float(os.getenv("LOCAL_CACHE_TOUCH_INTERVAL", "300"))
+
+
+def row_size(row):
+    """Bytes aproximados de uma linha em memoria"""
+    return len(row.get("trancription") or "") + len(row["video_id"]) + 64
+
+
+class MemoryTier:
+    """LRU em memoria limitado por bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._rows = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def peek(self, video_id):
+        """Leitura sem contar hit/miss nem mexer na ordem LRU"""
+        return self._rows.get(video_id)
+
+    def get(self, video_id):
+        row = self._rows.get(video_id)
+        if row is None:
+            self.misses += 1
+            return None
+        self._rows.move_to_end(video_id)
+        self.hits += 1
+        return row
+
+    def put(self, row):
+        size = row_size(row)
+        if size > self.max_bytes:
+            return
+        old = self._rows.pop(row["video_id"], None)
+        if old is not None:
+            self.bytes -= row_size(old)
+        self._rows[row["video_id"]] = row
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._rows.popitem(last=False)
+            self.bytes -= row_size(evicted)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._rows),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class DiskTier:
+    """SQLite com transcricoes comprimidas, limitado por bytes (LRU por ultimo acesso)"""
+
+    def __init__(self, path, max_bytes, touch_interval=LOCAL_CACHE_TOUCH_INTERVAL):
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS transcricoes (
+                video_id TEXT PRIMARY KEY,
+                dados BLOB NOT NULL,
+                contem INTEGER NOT NULL,
+                tamanho INTEGER NOT NULL,
+                acessado_em REAL NOT NULL,
+                verificado_em REAL NOT NULL DEFAULT 0,
+                falhas INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        # Bancos criados antes do cache negativo
+        columns = {column[1] for column in self._conn.execute("PRAGMA table_info(transcricoes)")}
+        for column, definition in (("verificado_em", "REAL NOT NULL DEFAULT 0"), ("falhas", "INTEGER NOT NULL DEFAULT 0")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE transcricoes ADD COLUMN {column} {definition}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_acessado_em ON transcricoes (acessado_em)")
+        self._conn.commit()
+        self.bytes = self._conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM transcricoes").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.touches = 0
+
+    def _read(self, video_id):
+        """Linha + acessado_em salvo (ou None, None)"""
+        found = self._conn.execute(
+            "SELECT dados, contem, verificado_em, falhas, acessado_em FROM transcricoes WHERE video_id = ?",
+            (video_id,)
+        ).fetchone()
+        if found is None:
+            return None, None
+        dados, contem, verificado_em, falhas, acessado_em = found
+        return {
+            "video_id": video_id,
+            "trancription": zlib.decompress(dados).decode("utf-8"),
+            "contem": bool(contem),
+            "verificado_em": verificado_em,
+            "falhas": falhas,
+        }, acessado_em
+
+    def peek(self, video_id):
+        """Leitura sem contar hit/miss nem atualizar o acesso"""
+        return self._read(video_id)[0]
+
+    def get(self, video_id):
+        row, accessed_at = self._read(video_id)
+        if row is None:
+            self.misses += 1
+            return None
+
+        # Escrita preguicosa: so quando o acesso salvo ja esta velho
+        now = time.time()
+        if now - accessed_at >= self.touch_interval:
+            self._conn.execute("UPDATE transcricoes SET acessado_em = ? WHERE video_id = ?", (now, video_id))
+            self._conn.commit()
+            self.touches += 1
+        self.hits += 1
+        return row
+
+    def put(self, row):
+        dados = zlib.compress((row.get("trancription") or "").encode("utf-8"), 6)
+        size = len(dados) + len(row["video_id"])
+        if size > self.max_bytes:
+            return
+
+        old = self._conn.execute(
+            "SELECT tamanho FROM transcricoes WHERE video_id = ?", (row["video_id"],)
+        ).fetchone()
+        self._conn.execute(
+            """
+            INSERT INTO transcricoes (video_id, dados, contem, tamanho, acessado_em, verificado_em, falhas)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(video_id) DO UPDATE SET
+                dados = excluded.dados,
+                contem = excluded.contem,
+                tamanho = excluded.tamanho,
+                acessado_em = excluded.acessado_em,
+                verificado_em = excluded.verificado_em,
+                falhas = excluded.falhas
+            """,
+            (
+                row["video_id"], dados, int(bool(row.get("contem"))), size, time.time(),
+                row["verificado_em"], row["falhas"]
+            )
+        )
+        self.bytes += size - (old[0] if old else 0)
+        self._evict()
+        self._conn.commit()
+
+    def _evict(self):
+        """Remove os menos acessados ate caber no limite"""
+        while self.bytes > self.max_bytes:
+            oldest = self._conn.execute(
+                "SELECT video_id, tamanho FROM transcricoes ORDER BY acessado_em LIMIT 100"
+            ).fetchall()
+            if not oldest:
+                self.bytes = 0
+                return
+            for video_id, size in oldest:
+                if self.bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM transcricoes WHERE video_id = ?", (video_id,))
+                self.bytes -= size
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "touches": self.touches,
+            "entries": self._conn.execute("SELECT COUNT(*) FROM transcricoes").fetchone()[0],
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self):
+        self._conn.close()
+
+
+class LocalTranscriptCache:
+    """
+    Memoria -> disco -> (Supabase, fora daqui)
+
+    Um hit em disco sobe a linha para a memoria. Seguro entre threads
+    (as chamadas do engine rodam via asyncio.to_thread).
+    """
+
+    def __init__(self, memory_bytes, disk_bytes, path):
+        self._lock = threading.Lock()
+        self.memory = MemoryTier(memory_bytes)
+        self.disk = None
+        if disk_bytes > 0:
+            try:
+                self.disk = DiskTier(path, disk_bytes)
+            except Exception as e:
+                logger.warning(f"Cache em disco DESABILITADO ({path}): {e}")
+
+    def get(self, video_id):
+        with self._lock:
+            row = self.memory.get(video_id)
+            if row is not None:
+                return row
+            if self.disk is None:
+                return None
+            row = self.disk.get(video_id)
+            if row is not None:
+                self.memory.put(row)
+            return row
+
+    def peek(self, video_id):
+        """Leitura sem contar hit/miss (ex: falhas anteriores de um video)"""
+        with self._lock:
+            row = self.memory.peek(video_id)
+            if row is None and self.disk is not None:
+                row = self.disk.peek(video_id)
+            return row
+
+    def get_many(self, video_ids):
+        found = {}
+        for video_id in video_ids:
+            row = self.get(video_id)
+            if row is not None:
+                found[video_id] = row
+        return found
+
+    def put(self, row, checked_at=None):
+        """
+        Guarda uma linha (formato Videos_trancricao)
+
+        verificado_em/falhas vem da linha quando presentes; senao, de
+        `checked_at` (ex: created_at do Supabase) e 1 falha se contem=False
+        """
+        contem = bool(row.get("contem"))
+        row = {
+            "video_id": row["video_id"],
+            "trancription": row.get("trancription") or "",
+            "contem": contem,
+            "verificado_em": row.get("verificado_em") or checked_at or time.time(),
+            "falhas": row["falhas"] if row.get("falhas") is not None else (0 if contem else 1),
+        }
+        with self._lock:
+            self.memory.put(row)
+            if self.disk is not None:
+                try:
+                    self.disk.put(row)
+                except Exception as e:
+                    logger.warning(f"Erro ao gravar cache em disco: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory": self.memory.stats(),
+                "disk": self.disk.stats() if self.disk is not None else None,
+            }
+
+    def close(self):
+        with self._lock:
+            if self.disk is not None:
+                self.disk.close()
+                self.disk = None
+
+
+local_cache = None
+if LOCAL_CACHE_ENABLED:
+    local_cache = LocalTranscriptCache(
+        memory_bytes=int(LOCAL_CACHE_MEMORY_MB * 1024 * 1024),
+        disk_bytes=int(LOCAL_CACHE_DISK_MB * 1024 * 1024),
+        path=LOCAL_CACHE_PATH,
+    )
+    logger.info(
+        f"Cache local HABILITADO (memoria {LOCAL_CACHE_MEMORY_MB:g} MB, "
+        f"disco {LOCAL_CACHE_DISK_MB:g} MB em {LOCAL_CACHE_PATH})"
+    )
@@ -2,12 +2,16 @@
 # Atualizado: 2026-01-01 - Corrigido para youtube-transcript-api v1.x
 # Mudanca: proxies= -> proxy_config=, .get_transcript() -> .fetch()
 import os
+import re
+import atexit
 import logging
+import threading
 import time
 from random import uniform
-from youtube_transcript_api import YouTubeTranscriptApi
+from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound, TranscriptsDisabled
 from youtube_transcript_api.proxies import GenericProxyConfig
-from datetime import datetime
+from datetime import datetime, timezone
+from local_cache import local_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -63,58 +67,112 @@ except ImportError:
 except Exception as e:
     logger.error(f"Erro ao inicializar Supabase (funcionando sem cache): {e}")
 
-def get_transcript_with_retry(video_id, max_retries=3):
+# Gravacao em lote (write-behind): upserts acumulam e saem juntos ao atingir
+# SUPABASE_WRITE_BATCH_SIZE linhas ou a cada SUPABASE_WRITE_INTERVAL segundos
+# (intervalo 0 = um upsert por video, como antes)
+SUPABASE_WRITE_BATCH_SIZE = int(os.getenv("SUPABASE_WRITE_BATCH_SIZE", "50"))
+SUPABASE_WRITE_INTERVAL = float(os.getenv("SUPABASE_WRITE_INTERVAL", "2"))
+# Limite de linhas pendentes (Supabase fora do ar): acima disso as mais
+# antigas sao descartadas (continuam no cache local)
+SUPABASE_WRITE_MAX_PENDING = int(os.getenv("SUPABASE_WRITE_MAX_PENDING", "5000"))
+
+# IDs por consulta in_() (limite de tamanho da URL do PostgREST)
+CACHE_LOOKUP_CHUNK = 100
+
+# Cache negativo: video sem legendas (contem=False) responde direto do cache
+# por NEGATIVE_CACHE_TTL_HOURS (0 = sempre tentar de novo, como antes).
+# NEGATIVE_CACHE_RETRY_SCHEDULE (ex: "6,24,72,168") troca o TTL fixo por um
+# prazo por falha seguida: 1a falha vale 6h, 2a vale 24h... (ultimo se repete)
+# A contagem de falhas (e verificado_em) fica so no cache local deste host:
+# Videos_trancricao nao tem essas colunas, entao uma linha vinda do Supabase
+# conta como 1 falha a partir do created_at. Com varios hosts (ou cache
+# local desligado) o schedule volta ao primeiro prazo.
+NEGATIVE_CACHE_TTL_HOURS = float(os.getenv("NEGATIVE_CACHE_TTL_HOURS", "24"))
+NEGATIVE_CACHE_RETRY_SCHEDULE = [
+    float(hours) for hours in os.getenv("NEGATIVE_CACHE_RETRY_SCHEDULE", "").split(",") if hours.strip()
+]
+
+class NoCaptionsError(Exception):
+    """O video existe mas nao tem nenhum idioma de legenda"""
+
+# Erros que significam 'video sem legendas' (unicos que entram no cache
+# negativo). O resto (proxy, timeout, bloqueio de IP, rate limit) e
+# transitorio: sem retry aqui, tenta de novo e nao grava nada
+NO_CAPTIONS_ERRORS = (NoTranscriptFound, TranscriptsDisabled, NoCaptionsError)
+
+def is_no_captions_error(error):
+    return isinstance(error, NO_CAPTIONS_ERRORS)
+
+def fetch_transcript_once(video_id):
     """
-    Busca transcricao com retry usando nova API v1.x
+    Uma tentativa de buscar a transcricao (cadeia de fallback de idiomas)
     Usa ytt_api.fetch() ao inves de YouTubeTranscriptApi.get_transcript()
+    Chamada bloqueante: o transcript_engine a executa em thread
     """
-    for attempt in range(max_retries):
+    # Tentativa 1: Buscar em PT ou EN diretamente
+    try:
+        transcript = ytt_api.fetch(video_id, languages=["pt", "en"])
+        logger.info(f"Transcricao obtida em PT/EN para {video_id}")
+        return transcript
+    except TranscriptsDisabled:
+        raise
+    except Exception as e:
+        logger.debug(f"Fallback para outros idiomas: {e}")
+
+    # Tentativa 2: Listar todos os idiomas disponiveis
+    try:
+        transcript_list = ytt_api.list(video_id)
+    except TranscriptsDisabled:
+        raise
+    except Exception as list_error:
+        logger.warning(f"Erro ao listar transcricoes: {str(list_error)}")
+
+        # Tentativa 4: Buscar sem especificar idioma
         try:
-            # Tentativa 1: Buscar em PT ou EN diretamente
-            try:
-                transcript = ytt_api.fetch(video_id, languages=["pt", "en"])
-                logger.info(f"Transcricao obtida em PT/EN para {video_id}")
-                return transcript
-            except Exception as e:
-                logger.debug(f"Fallback para outros idiomas: {e}")
+            transcript = ytt_api.fetch(video_id)
+            logger.info("Transcricao obtida (idioma padrao)")
+            return transcript
+        except Exception as e:
+            logger.debug(f"Idioma padrao falhou: {e}")
+            # Sem a lista nao da para dizer que o video nao tem legendas:
+            # propaga o erro da listagem (transitorio)
+            raise list_error
+
+    available_languages = []
+
+    for t in transcript_list:
+        available_languages.append(t.language_code)
 
-            # Tentativa 2: Listar todos os idiomas disponiveis
+        if t.language_code in ['pt', 'pt-BR', 'en', 'en-US']:
             try:
-                transcript_list = ytt_api.list(video_id)
-                available_languages = []
-
-                for t in transcript_list:
-                    available_languages.append(t.language_code)
-
-                    if t.language_code in ['pt', 'pt-BR', 'en', 'en-US']:
-                        try:
-                            result = t.fetch()
-                            logger.info(f"Transcricao obtida em {t.language_code}")
-                            return result
-                        except:
-                            continue
-
-                logger.info(f"Idiomas disponiveis: {available_languages}")
-
-                # Tentativa 3: Usar qualquer idioma disponivel
-                if available_languages:
-                    transcript = ytt_api.fetch(video_id, languages=[available_languages[0]])
-                    logger.info(f"Transcricao obtida em {available_languages[0]}")
-                    return transcript
-                else:
-                    raise Exception("Nenhum idioma disponivel")
-
-            except Exception as list_error:
-                logger.warning(f"Erro ao listar transcricoes: {str(list_error)}")
-
-                # Tentativa 4: Buscar sem especificar idioma
-                try:
-                    transcript = ytt_api.fetch(video_id)
-                    logger.info("Transcricao obtida (idioma padrao)")
-                    return transcript
-                except:
-                    raise Exception("Nenhuma transcricao disponivel")
+                result = t.fetch()
+                logger.info(f"Transcricao obtida em {t.language_code}")
+                return result
+            except:
+                continue
 
+    logger.info(f"Idiomas disponiveis: {available_languages}")
+
+    # Tentativa 3: Usar qualquer idioma disponivel
+    if not available_languages:
+        raise NoCaptionsError(f"Nenhum idioma disponivel para {video_id}")
+
+    transcript = ytt_api.fetch(video_id, languages=[available_languages[0]])
+    logger.info(f"Transcricao obtida em {available_languages[0]}")
+    return transcript
+
+def get_transcript_with_retry(video_id, max_retries=3):
+    """
+    Busca transcricao com retry (versao sincrona)
+    A API usa transcript_engine.TranscriptEngine, que espera o backoff
+    sem ocupar uma thread
+    """
+    for attempt in range(max_retries):
+        try:
+            return fetch_transcript_once(video_id)
+        except NO_CAPTIONS_ERRORS:
+            # Sem legendas nao muda com retry
+            raise
         except Exception as e:
             logger.error(f"Tentativa {attempt + 1} falhou: {str(e)}")
             if attempt == max_retries - 1:
@@ -122,28 +180,76 @@ def get_transcript_with_retry(video_id, max_retries=3):
             time.sleep(uniform(2, 5))
             continue
 
+def extract_video_id(url):
+    return url.split("v=")[1] if "v=" in url else url.split("/")[-1]
+
 def format_timestamp(seconds):
     minutes = int(seconds) // 60
     remaining_seconds = int(seconds) % 60
     return f"{minutes:02d}:{remaining_seconds:02d}"
 
+def parse_timestamp(value):
+    """created_at do Supabase -> epoch (fracao de segundos com qualquer numero de digitos)"""
+    match = re.match(r"(\d{4}-\d\d-\d\d[T ]\d\d:\d\d:\d\d)(?:\.(\d+))?(Z|[+-]\d\d:\d\d)?$", value or "")
+    if not match:
+        return None
+    base, fraction, tz = match.groups()
+    fraction = (fraction or "0").ljust(6, "0")[:6]
+    tz = "+00:00" if tz in (None, "Z") else tz
+    return datetime.fromisoformat(f"{base.replace(' ', 'T')}.{fraction}{tz}").timestamp()
+
+def negative_ttl_hours(failures):
+    """Horas que um 'sem legendas' vale depois de `failures` falhas seguidas"""
+    if NEGATIVE_CACHE_RETRY_SCHEDULE:
+        return NEGATIVE_CACHE_RETRY_SCHEDULE[min(max(failures, 1), len(NEGATIVE_CACHE_RETRY_SCHEDULE)) - 1]
+    return NEGATIVE_CACHE_TTL_HOURS
+
+def cache_hit(cached_item):
+    """
+    Linha do cache que responde sem buscar no YouTube:
+    transcricao salva ou 'sem legendas' ainda dentro do prazo
+    """
+    if cached_item.get("contem"):
+        return bool(cached_item.get("trancription"))
+
+    if NEGATIVE_CACHE_TTL_HOURS <= 0:
+        return False
+    checked_at = cached_item.get("verificado_em") or parse_timestamp(cached_item.get("created_at"))
+    if not checked_at:
+        return False
+    return time.time() - checked_at < negative_ttl_hours(cached_item.get("falhas") or 1) * 3600
+
 def check_video_exists(video_id):
+    # Cache local (memoria/disco): sem ida ao Supabase
+    local = local_cache.get(video_id) if local_cache else None
+    if local and cache_hit(local):
+        logger.info(f"CACHE HIT (local{'' if local['contem'] else ', sem legendas'}): {video_id}")
+        return True, local
+
     if not SUPABASE_ENABLED:
         return False, None
 
+    # Gravado ha pouco mas ainda no buffer
+    pending = upsert_buffer.get(video_id) if upsert_buffer else None
+    if pending and cache_hit(pending):
+        logger.info(f"CACHE HIT (buffer): {video_id}")
+        return True, pending
+
     try:
         logger.debug(f"Verificando cache para video_id: {video_id}")
 
-        result = supabase_client.table("Videos_trancricao").select("video_id, trancription, contem").eq("video_id", video_id).order("created_at", desc=True).limit(1).execute()
+        result = supabase_client.table("Videos_trancricao").select("video_id, trancription, contem, created_at").eq("video_id", video_id).order("created_at", desc=True).limit(1).execute()
 
         if result.data and len(result.data) > 0:
             cached_item = result.data[0]
 
-            if cached_item.get("contem") and cached_item.get("trancription"):
-                logger.info(f"CACHE HIT: {video_id}")
+            if cache_hit(cached_item):
+                logger.info(f"CACHE HIT{'' if cached_item.get('contem') else ' (sem legendas)'}: {video_id}")
+                if local_cache:
+                    local_cache.put(cached_item, parse_timestamp(cached_item.get("created_at")))
                 return True, cached_item
             else:
-                logger.info(f"Cache encontrado mas vazio para {video_id}")
+                logger.info(f"Cache encontrado mas vazio ou expirado para {video_id}")
                 return False, None
 
         logger.info(f"CACHE MISS: {video_id}")
@@ -153,7 +259,184 @@ def check_video_exists(video_id):
         logger.warning(f"Erro ao verificar cache (continuando sem cache): {e}")
         return False, None
 
+def check_videos_exist(video_ids):
+    """
+    Versao em lote de check_video_exists: uma unica consulta in_()
+    Retorna dict video_id -> item do cache (transcricoes e 'sem legendas' no prazo)
+    """
+    if not video_ids:
+        return {}
+
+    hits = {}
+    seen = set()
+
+    # Cache local (memoria/disco)
+    if local_cache:
+        for video_id, local in local_cache.get_many(video_ids).items():
+            if cache_hit(local):
+                seen.add(video_id)
+                hits[video_id] = local
+
+    if not SUPABASE_ENABLED:
+        return hits
+
+    # Gravados ha pouco mas ainda no buffer
+    if upsert_buffer:
+        for video_id in video_ids:
+            if video_id in seen:
+                continue
+            pending = upsert_buffer.get(video_id)
+            if pending:
+                seen.add(video_id)
+                if cache_hit(pending):
+                    hits[video_id] = pending
+
+    try:
+        remaining = [video_id for video_id in video_ids if video_id not in seen]
+        for i in range(0, len(remaining), CACHE_LOOKUP_CHUNK):
+            chunk = remaining[i:i + CACHE_LOOKUP_CHUNK]
+            result = supabase_client.table("Videos_trancricao").select("video_id, trancription, contem, created_at").in_("video_id", chunk).order("created_at", desc=True).execute()
+
+            for cached_item in result.data or []:
+                # Mais recente primeiro: vale so a primeira linha de cada video
+                if cached_item["video_id"] in seen:
+                    continue
+                seen.add(cached_item["video_id"])
+                if cache_hit(cached_item):
+                    hits[cached_item["video_id"]] = cached_item
+                    if local_cache:
+                        local_cache.put(cached_item, parse_timestamp(cached_item.get("created_at")))
+
+        logger.info(f"CACHE LOTE: {len(hits)} hits de {len(video_ids)} videos")
+        return hits
+
+    except Exception as e:
+        logger.warning(f"Erro ao verificar cache em lote (continuando sem cache): {e}")
+        return hits
+
+class UpsertBuffer:
+    """
+    Buffer write-behind de upserts em Videos_trancricao
+
+    add() so guarda a linha (a ultima de cada video vence); uma thread
+    envia tudo num unico upsert quando o buffer chega a `batch_size`
+    linhas ou a cada `interval` segundos. Linhas de um lote que falhou
+    voltam para o buffer e saem no proximo; com mais de `max_pending`
+    linhas pendentes as mais antigas sao descartadas (contador `dropped`).
+    """
+
+    def __init__(self, batch_size, interval, max_pending=SUPABASE_WRITE_MAX_PENDING):
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.max_pending = max(1, max_pending)
+        self._rows = {}  # ordem de insercao = mais antiga primeiro
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+        # Contadores
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.failures = 0
+        self.dropped = 0
+
+    def _trim(self):
+        """Descarta as linhas mais antigas acima de max_pending (chamar com o lock)"""
+        excess = len(self._rows) - self.max_pending
+        if excess <= 0:
+            return
+        for video_id in list(self._rows)[:excess]:
+            del self._rows[video_id]
+        self.dropped += excess
+        logger.warning(f"Buffer de upserts cheio: {excess} linhas antigas descartadas")
+
+    def add(self, row):
+        with self._lock:
+            # Linha nova vai para o fim (mais recente)
+            self._rows.pop(row["video_id"], None)
+            self._rows[row["video_id"]] = row
+            self._trim()
+            full = len(self._rows) >= self.batch_size
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="supabase-upsert", daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def get(self, video_id):
+        with self._lock:
+            return self._rows.get(video_id)
+
+    def flush(self):
+        with self._lock:
+            rows, self._rows = self._rows, {}
+        if not rows:
+            return
+
+        try:
+            supabase_client.table("Videos_trancricao").upsert(list(rows.values()), on_conflict="video_id").execute()
+            self.flushes += 1
+            self.rows_flushed += len(rows)
+            logger.info(f"CACHE SAVED (lote): {len(rows)} videos")
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Erro ao salvar cache em lote ({len(rows)} videos, nova tentativa no proximo lote): {e}")
+            with self._lock:
+                # Lote volta na frente (mais antigo); linhas mais novas do
+                # mesmo video tem prioridade
+                rows.update(self._rows)
+                self._rows = rows
+                self._trim()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Para a thread e grava o que restou"""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._rows)
+        return {
+            "pending": pending,
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "failures": self.failures,
+            "dropped": self.dropped,
+        }
+
+upsert_buffer = None
+if SUPABASE_ENABLED and SUPABASE_WRITE_INTERVAL > 0:
+    upsert_buffer = UpsertBuffer(SUPABASE_WRITE_BATCH_SIZE, SUPABASE_WRITE_INTERVAL)
+    atexit.register(upsert_buffer.close)
+    logger.info(f"Gravacao em lote: {SUPABASE_WRITE_BATCH_SIZE} linhas ou {SUPABASE_WRITE_INTERVAL}s")
+
 def save_to_supabase(video_id, transcription, contem):
+    data = {
+        "video_id": video_id,
+        "trancription": transcription,
+        "contem": contem,
+        # Marca quando foi verificado (prazo do cache negativo)
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+
+    if local_cache:
+        failures = 0
+        if not contem:
+            # Falhas seguidas alimentam o NEGATIVE_CACHE_RETRY_SCHEDULE
+            previous = local_cache.peek(video_id)
+            failures = (previous.get("falhas") or 0) + 1 if previous and not previous.get("contem") else 1
+        local_cache.put({**data, "verificado_em": time.time(), "falhas": failures})
+
     if not SUPABASE_ENABLED:
         logger.debug("Cache desabilitado")
         return None
@@ -161,11 +444,10 @@ def save_to_supabase(video_id, transcription, contem):
     try:
         logger.debug(f"Salvando em cache: {video_id}")
 
-        data = {
-            "video_id": video_id,
-            "trancription": transcription,
-            "contem": contem
-        }
+        if upsert_buffer:
+            upsert_buffer.add(data)
+            logger.debug(f"CACHE BUFFERED: {video_id}")
+            return True
 
         supabase_client.table("Videos_trancricao").upsert(data, on_conflict="video_id").execute()
 
@@ -176,71 +458,89 @@ def save_to_supabase(video_id, transcription, contem):
         logger.warning(f"Erro ao salvar cache: {e}")
         return None
 
+def format_transcription(video_id, transcript):
+    formatted_segments = []
+    for segment in transcript:
+        # Nova API v1.x retorna objetos com atributos
+        if hasattr(segment, 'start'):
+            start_time = segment.start
+            text = segment.text
+        else:
+            start_time = segment["start"]
+            text = segment["text"]
+        timestamp = format_timestamp(start_time)
+        segment_text = text.strip()
+        formatted_segments.append(f"[{timestamp}] {segment_text}")
+
+    full_text = "\n\n".join(formatted_segments)
+    sep = "=" * 50
+    return f"""TRANSCRICAO DO VIDEO
+ID: {video_id}
+{sep}
+
+{full_text}
+
+{sep}"""
+
+def cached_result(video_id, existing_data):
+    return {
+        "video_id": video_id,
+        "transcription": existing_data["trancription"] or "",
+        "contem": existing_data["contem"],
+        "message": "Video ja processado anteriormente" if existing_data["contem"] else "Video sem legendas (verificado recentemente)",
+        "from_cache": True
+    }
+
+def transcribed_result(video_id, final_text):
+    return {
+        "video_id": video_id,
+        "transcription": final_text,
+        "contem": True,
+        "from_cache": False
+    }
+
+def failed_result(video_id, error):
+    if is_no_captions_error(error):
+        message = "Nenhuma transcricao disponivel em nenhum idioma"
+    else:
+        message = "Erro ao buscar transcricao (nao salvo no cache; tentar de novo)"
+    return {
+        "video_id": video_id,
+        "transcription": "",
+        "contem": False,
+        "error": str(error),
+        "message": message,
+        "from_cache": False
+    }
+
 def process_video(url):
     try:
         logger.info(f"Iniciando processamento do video: {url}")
-        video_id = url.split("v=")[1] if "v=" in url else url.split("/")[-1]
+        video_id = extract_video_id(url)
         logger.info(f"ID do video extraido: {video_id}")
 
         exists, existing_data = check_video_exists(video_id)
         if exists:
             logger.info(f"Video {video_id} retornado do CACHE")
-            return {
-                "video_id": video_id,
-                "transcription": existing_data["trancription"],
-                "contem": existing_data["contem"],
-                "message": "Video ja processado anteriormente",
-                "from_cache": True
-            }
+            return cached_result(video_id, existing_data)
 
         try:
             transcript = get_transcript_with_retry(video_id)
             logger.info(f"Transcricao obtida com sucesso para {video_id}")
 
-            formatted_segments = []
-            for segment in transcript:
-                # Nova API v1.x retorna objetos com atributos
-                if hasattr(segment, 'start'):
-                    start_time = segment.start
-                    text = segment.text
-                else:
-                    start_time = segment["start"]
-                    text = segment["text"]
-                timestamp = format_timestamp(start_time)
-                segment_text = text.strip()
-                formatted_segments.append(f"[{timestamp}] {segment_text}")
-
-            full_text = "\n\n".join(formatted_segments)
-            sep = "=" * 50
-            final_text = f"""TRANSCRICAO DO VIDEO
-ID: {video_id}
-{sep}
-
-{full_text}
-
-{sep}"""
+            final_text = format_transcription(video_id, transcript)
 
             save_to_supabase(video_id, final_text, True)
             logger.info("Transcricao salva com sucesso")
 
-            return {
-                "video_id": video_id,
-                "transcription": final_text,
-                "contem": True,
-                "from_cache": False
-            }
+            return transcribed_result(video_id, final_text)
 
         except Exception as e:
             logger.error(f"Erro ao processar transcricao: {str(e)}")
-            save_to_supabase(video_id, "", False)
-            return {
-                "video_id": video_id,
-                "transcription": "",
-                "contem": False,
-                "error": str(e),
-                "message": "Nenhuma transcricao disponivel em nenhum idioma",
-                "from_cache": False
-            }
+            # So 'sem legendas' de verdade entra no cache negativo
+            if is_no_captions_error(e):
+                save_to_supabase(video_id, "", False)
+            return failed_result(video_id, e)
 
     except Exception as e:
         logger.error(f"Erro em process_video: {str(e)}")
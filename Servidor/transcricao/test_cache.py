@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# Testes do cache de transcricoes (Supabase em lote, buffer de upserts)
+# Rodar: python -m pytest -q test_cache.py
+import os
+import time
+from datetime import datetime, timezone
+
+# Sem cache em disco/Supabase reais durante os testes
+os.environ["LOCAL_CACHE_ENABLED"] = "false"
+os.environ.pop("SUPABASE_URL", None)
+
+import pytest
+
+import main
+from local_cache import DiskTier, LocalTranscriptCache, MemoryTier, row_size
+
+
+class FakeSupabase:
+    """Imita o cliente supabase: select/in_/order/execute e upsert/execute"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.queries = []
+        self.upserts = []
+        self.fail = False
+
+    def table(self, name):
+        return self
+
+    def select(self, columns):
+        self._op = "select"
+        return self
+
+    def in_(self, column, values):
+        self._ids = list(values)
+        self.queries.append(self._ids)
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self._op = "upsert"
+        self._payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def execute(self):
+        if self._op == "upsert":
+            if self.fail:
+                raise RuntimeError("supabase fora do ar")
+            self.upserts.append(self._payload)
+            return type("Result", (), {"data": self._payload})()
+
+        found = [row for row in self.rows if row["video_id"] in self._ids]
+        found.sort(key=lambda row: row["created_at"], reverse=True)
+        return type("Result", (), {"data": found})()
+
+
+def row(video_id, contem=True, created_at="2026-10-18T10:00:00+00:00", text="texto"):
+    return {
+        "video_id": video_id,
+        "trancription": text if contem else "",
+        "contem": contem,
+        "created_at": created_at,
+    }
+
+
+def local_row(video_id, text):
+    """Linha no formato do cache local"""
+    return {"video_id": video_id, "trancription": text, "contem": True, "verificado_em": time.time(), "falhas": 0}
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    fake = FakeSupabase()
+    monkeypatch.setattr(main, "SUPABASE_ENABLED", True)
+    monkeypatch.setattr(main, "supabase_client", fake)
+    monkeypatch.setattr(main, "local_cache", None)
+    monkeypatch.setattr(main, "upsert_buffer", None)
+    return fake
+
+
+def test_check_videos_exist_chunks_and_newest_row(supabase):
+    video_ids = [f"vid{i}" for i in range(250)]
+    now = datetime.now(timezone.utc).isoformat()
+    old = "2020-01-01T00:00:00+00:00"
+    supabase.rows = [row(video_id, created_at=now) for video_id in video_ids[2:10]]
+    # Vale so a linha mais nova de cada video
+    supabase.rows += [row("vid0", created_at=now), row("vid0", contem=False, created_at=old)]
+    supabase.rows += [row("vid1", created_at=old), row("vid1", contem=False, created_at=now)]
+
+    hits = main.check_videos_exist(video_ids)
+
+    assert [len(chunk) for chunk in supabase.queries] == [100, 100, 50]
+    assert set(hits) == {f"vid{i}" for i in range(10)}
+    assert hits["vid0"]["contem"] is True
+    assert hits["vid1"]["contem"] is False
+
+
+def test_check_videos_exist_prefers_buffer_rows(supabase, monkeypatch):
+    buffer = main.UpsertBuffer(batch_size=100, interval=60)
+    monkeypatch.setattr(main, "upsert_buffer", buffer)
+    supabase.rows = [row("vid0", text="antigo"), row("vid1")]
+    buffer.add(row("vid0", text="novo"))
+
+    hits = main.check_videos_exist(["vid0", "vid1"])
+
+    assert hits["vid0"]["trancription"] == "novo"
+    assert supabase.queries == [["vid1"]]
+    buffer.close()
+
+
+def test_upsert_buffer_flushes_on_size(supabase):
+    buffer = main.UpsertBuffer(batch_size=3, interval=60)
+    for i in range(3):
+        buffer.add(row(f"vid{i}"))
+
+    assert wait_for(lambda: supabase.upserts)
+    assert [r["video_id"] for r in supabase.upserts[0]] == ["vid0", "vid1", "vid2"]
+    assert buffer.stats()["pending"] == 0
+    buffer.close()
+
+
+def test_upsert_buffer_flushes_on_interval(supabase):
+    buffer = main.UpsertBuffer(batch_size=100, interval=0.05)
+    buffer.add(row("vid0"))
+
+    assert wait_for(lambda: supabase.upserts)
+    assert buffer.stats()["rows_flushed"] == 1
+    buffer.close()
+
+
+def test_upsert_buffer_requeues_failed_rows_and_caps_pending(supabase):
+    buffer = main.UpsertBuffer(batch_size=100, interval=60, max_pending=3)
+    for i in range(5):
+        buffer.add(row(f"vid{i}"))
+
+    # Acima do limite: as mais antigas saem
+    assert buffer.stats()["dropped"] == 2
+    assert buffer.get("vid0") is None
+
+    supabase.fail = True
+    buffer.flush()
+    assert buffer.stats()["failures"] == 1
+    assert buffer.stats()["pending"] == 3
+
+    # Linha nova do mesmo video vence a que voltou do lote que falhou
+    buffer.add(row("vid2", text="novo"))
+    buffer.add(row("vid5"))
+    assert buffer.stats()["dropped"] == 3
+    assert buffer.get("vid3") is None
+
+    supabase.fail = False
+    buffer.flush()
+    flushed = {r["video_id"]: r for r in supabase.upserts[0]}
+    assert set(flushed) == {"vid2", "vid4", "vid5"}
+    assert flushed["vid2"]["trancription"] == "novo"
+    assert buffer.stats()["pending"] == 0
+    buffer.close()
+
+
+# ============================================
+# Cache local (memoria + disco)
+# ============================================
+
+def test_memory_tier_evicts_least_recent_by_bytes():
+    tier = MemoryTier(max_bytes=3 * row_size(row("vid0")))
+    for i in range(3):
+        tier.put(row(f"vid{i}"))
+    tier.get("vid0")  # vid1 passa a ser o menos recente
+    tier.put(row("vid3"))
+
+    assert tier.get("vid1") is None
+    assert tier.get("vid0") is not None
+    assert tier.bytes <= tier.max_bytes
+    assert (tier.stats()["hits"], tier.stats()["misses"]) == (2, 1)
+
+
+def test_disk_tier_evicts_least_recent_by_bytes(tmp_path):
+    tier = DiskTier(str(tmp_path / "cache.db"), max_bytes=10_000, touch_interval=0)
+    big = "x" * 20_000  # comprimido fica bem menor
+    for i in range(3):
+        tier.put(local_row(f"vid{i}", big + str(i)))
+        time.sleep(0.01)
+    size = tier.bytes // 3
+    tier.max_bytes = size * 3
+
+    tier.get("vid0")  # vid1 passa a ser o menos recente
+    tier.put(local_row("vid3", big + "3"))
+
+    assert tier.peek("vid1") is None
+    assert tier.peek("vid0")["trancription"] == big + "0"
+    assert tier.bytes <= tier.max_bytes
+    assert tier.get("vid9") is None
+    assert (tier.stats()["hits"], tier.stats()["misses"]) == (1, 1)
+    tier.close()
+
+
+def test_disk_tier_touches_access_time_lazily(tmp_path):
+    tier = DiskTier(str(tmp_path / "cache.db"), max_bytes=10_000, touch_interval=60)
+    tier.put(local_row("vid0", "texto"))
+
+    for _ in range(5):
+        tier.get("vid0")
+    assert tier.stats()["touches"] == 0
+
+    # Acesso salvo mais velho que o intervalo: regrava uma vez
+    tier._conn.execute("UPDATE transcricoes SET acessado_em = ?", (time.time() - 120,))
+    tier.get("vid0")
+    tier.get("vid0")
+    assert tier.stats()["touches"] == 1
+    assert tier.stats()["hits"] == 7
+    tier.close()
+
+
+def test_local_cache_promotes_disk_hit_to_memory(tmp_path):
+    cache = LocalTranscriptCache(memory_bytes=10_000, disk_bytes=10_000, path=str(tmp_path / "cache.db"))
+    cache.put(row("vid0"))
+    cache.memory = MemoryTier(10_000)  # memoria vazia (ex: processo reiniciado)
+
+    assert cache.get("vid0")["trancription"] == "texto"
+    assert cache.get("vid0")["trancription"] == "texto"
+    assert cache.get("vid1") is None
+
+    stats = cache.stats()
+    assert (stats["memory"]["hits"], stats["memory"]["misses"]) == (1, 2)
+    assert (stats["disk"]["hits"], stats["disk"]["misses"]) == (1, 1)
+    cache.close()
+
+
+# ============================================
+# Cache negativo (videos sem legendas)
+# ============================================
+
+def negative_row(hours_ago, falhas=None):
+    return {
+        "video_id": "vid0",
+        "trancription": "",
+        "contem": False,
+        "verificado_em": time.time() - hours_ago * 3600,
+        "falhas": falhas,
+    }
+
+
+def test_cache_hit_negative_ttl(monkeypatch):
+    monkeypatch.setattr(main, "NEGATIVE_CACHE_TTL_HOURS", 24)
+    monkeypatch.setattr(main, "NEGATIVE_CACHE_RETRY_SCHEDULE", [])
+
+    assert main.cache_hit(row("vid0"))
+    assert not main.cache_hit(row("vid0", text=""))
+    assert main.cache_hit(negative_row(23))
+    assert not main.cache_hit(negative_row(25))
+
+    # Linha do Supabase: prazo conta do created_at
+    created_at = datetime.fromtimestamp(time.time() - 3600, timezone.utc).isoformat()
+    assert main.cache_hit(row("vid0", contem=False, created_at=created_at))
+
+    monkeypatch.setattr(main, "NEGATIVE_CACHE_TTL_HOURS", 0)
+    assert not main.cache_hit(negative_row(0))
+
+
+def test_cache_hit_negative_retry_schedule(monkeypatch):
+    monkeypatch.setattr(main, "NEGATIVE_CACHE_TTL_HOURS", 24)
+    monkeypatch.setattr(main, "NEGATIVE_CACHE_RETRY_SCHEDULE", [6, 24, 72])
+
+    assert [main.negative_ttl_hours(f) for f in (0, 1, 2, 3, 10)] == [6, 6, 24, 72, 72]
+    # Sem contagem (linha do Supabase) = 1a falha
+    assert not main.cache_hit(negative_row(7))
+    assert not main.cache_hit(negative_row(7, falhas=1))
+    assert main.cache_hit(negative_row(7, falhas=2))
+    assert not main.cache_hit(negative_row(25, falhas=2))
+    assert main.cache_hit(negative_row(71, falhas=5))
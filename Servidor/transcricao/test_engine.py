@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# Testes do motor de transcricao (retry, backoff, cache negativo)
+# Rodar: python -m pytest -q test_engine.py
+import asyncio
+import os
+
+# Sem cache em disco/Supabase reais durante os testes
+os.environ["LOCAL_CACHE_ENABLED"] = "false"
+os.environ.pop("SUPABASE_URL", None)
+
+import pytest
+from youtube_transcript_api import TranscriptsDisabled
+
+import main
+import transcript_engine
+from transcript_engine import TranscriptEngine
+
+
+class FakeYouTube:
+    """Imita ytt_api: fetch/list falham com os erros configurados"""
+
+    def __init__(self, fetch_error, list_result):
+        self.fetch_error = fetch_error
+        self.list_result = list_result
+
+    def fetch(self, video_id, languages=None):
+        raise self.fetch_error
+
+    def list(self, video_id):
+        if isinstance(self.list_result, Exception):
+            raise self.list_result
+        return self.list_result
+
+
+def test_fetch_transcript_once_keeps_error_types(monkeypatch):
+    # Nenhum idioma: sem legendas
+    monkeypatch.setattr(main, "ytt_api", FakeYouTube(RuntimeError("sem pt/en"), []))
+    with pytest.raises(main.NoCaptionsError):
+        main.fetch_transcript_once("vid0")
+
+    monkeypatch.setattr(main, "ytt_api", FakeYouTube(TranscriptsDisabled("vid0"), []))
+    with pytest.raises(TranscriptsDisabled):
+        main.fetch_transcript_once("vid0")
+
+    # Proxy caiu na listagem: erro transitorio, com o tipo original
+    monkeypatch.setattr(main, "ytt_api", FakeYouTube(RuntimeError("sem pt/en"), ConnectionError("proxy")))
+    with pytest.raises(ConnectionError) as error:
+        main.fetch_transcript_once("vid0")
+    assert not main.is_no_captions_error(error.value)
+
+
+def test_backoff_releases_slot(monkeypatch):
+    events = []
+
+    def fetch(video_id):
+        events.append(video_id)
+        if video_id == "lento" and events.count("lento") == 1:
+            raise ConnectionError("rate limit")
+        return [{"start": 0, "text": video_id}]
+
+    monkeypatch.setattr(transcript_engine, "fetch_transcript_once", fetch)
+
+    async def run():
+        # Uma vaga so: o segundo video so roda se o backoff liberar a vaga
+        engine = TranscriptEngine(concurrency=1, max_retries=2, backoff_min=0.2, backoff_max=0.2)
+        try:
+            slow = asyncio.ensure_future(engine.fetch_transcript("lento"))
+            await asyncio.sleep(0.05)
+            assert engine.backing_off == 1 and engine.in_flight == 0
+            await engine.fetch_transcript("rapido")
+            await slow
+            return engine.stats()
+        finally:
+            engine.close()
+
+    stats = asyncio.run(run())
+
+    assert events == ["lento", "rapido", "lento"]
+    assert (stats["peak_in_flight"], stats["retries"], stats["fetched"]) == (1, 1, 2)
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    calls = []
+    monkeypatch.setattr(transcript_engine, "save_to_supabase", lambda *args: calls.append(args))
+    return calls
+
+
+def test_engine_caches_only_no_captions(monkeypatch, saved):
+    attempts = []
+
+    def fetch(video_id):
+        attempts.append(video_id)
+        if video_id == "semlegenda":
+            raise TranscriptsDisabled(video_id)
+        raise ConnectionError("bloqueio de IP")
+
+    monkeypatch.setattr(transcript_engine, "fetch_transcript_once", fetch)
+
+    async def run():
+        engine = TranscriptEngine(concurrency=2, max_retries=3, backoff_min=0, backoff_max=0)
+        try:
+            return (
+                await engine.process_video("semlegenda", check_cache=False),
+                await engine.process_video("bloqueado", check_cache=False),
+                engine.stats(),
+            )
+        finally:
+            engine.close()
+
+    no_captions, blocked, stats = asyncio.run(run())
+
+    # Sem legendas: uma tentativa so e entra no cache negativo
+    assert attempts.count("semlegenda") == 1
+    assert saved == [("semlegenda", "", False)]
+    assert no_captions["message"] == "Nenhuma transcricao disponivel em nenhum idioma"
+    # Erro transitorio: retries e nada gravado
+    assert attempts.count("bloqueado") == 3
+    assert blocked["contem"] is False and "error" in blocked
+    assert (stats["no_captions"], stats["failed"]) == (1, 1)
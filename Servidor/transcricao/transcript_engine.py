@@ -0,0 +1,218 @@
+# transcript_engine.py
+# Motor de transcricao orientado a asyncio
+# Cada tentativa roda em thread (youtube-transcript-api e bloqueante), mas a
+# concorrencia e limitada por um semaforo e o backoff entre tentativas e um
+# asyncio.sleep fora do semaforo: retries dormindo nao ocupam vagas do pool
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from random import uniform
+
+from main import (
+    check_video_exists,
+    check_videos_exist,
+    save_to_supabase,
+    fetch_transcript_once,
+    extract_video_id,
+    format_transcription,
+    cached_result,
+    transcribed_result,
+    failed_result,
+    is_no_captions_error,
+    NO_CAPTIONS_ERRORS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Configuracao (env)
+TRANSCRIPT_CONCURRENCY = int(os.getenv("TRANSCRIPT_CONCURRENCY", "10"))
+TRANSCRIPT_MAX_RETRIES = int(os.getenv("TRANSCRIPT_MAX_RETRIES", "3"))
+TRANSCRIPT_BACKOFF_MIN = float(os.getenv("TRANSCRIPT_BACKOFF_MIN", "2"))
+TRANSCRIPT_BACKOFF_MAX = float(os.getenv("TRANSCRIPT_BACKOFF_MAX", "5"))
+
+
+class TranscriptEngine:
+    """
+    Busca transcricoes com concorrencia limitada e backoff nao bloqueante
+
+    - `concurrency` tentativas rodam ao mesmo tempo (threads dedicadas)
+    - uma tentativa que falha libera a vaga antes de esperar o backoff
+    - consultas/gravacoes no Supabase usam o pool padrao do asyncio,
+      entao tambem nao disputam vagas com o YouTube
+    """
+
+    def __init__(
+        self,
+        concurrency=TRANSCRIPT_CONCURRENCY,
+        max_retries=TRANSCRIPT_MAX_RETRIES,
+        backoff_min=TRANSCRIPT_BACKOFF_MIN,
+        backoff_max=TRANSCRIPT_BACKOFF_MAX,
+    ):
+        # Criar dentro do event loop (asyncio.Semaphore no Python 3.9 se
+        # prende ao loop corrente na construcao)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(1, max_retries)
+        self.backoff_min = backoff_min
+        self.backoff_max = max(backoff_min, backoff_max)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix="transcript"
+        )
+        self._slots = asyncio.Semaphore(self.concurrency)
+
+        # Contadores
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.backing_off = 0
+        self.attempts = 0
+        self.retries = 0
+        self.fetched = 0
+        self.failed = 0
+        self.no_captions = 0
+
+        logger.info(
+            f"TranscriptEngine: concorrencia={self.concurrency}, "
+            f"retries={self.max_retries}, backoff={self.backoff_min}-{self.backoff_max}s"
+        )
+
+    async def _attempt(self, video_id):
+        """Uma tentativa ocupando uma vaga do pool"""
+        async with self._slots:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.attempts += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, fetch_transcript_once, video_id)
+            finally:
+                self.in_flight -= 1
+
+    async def fetch_transcript(self, video_id):
+        """
+        Busca transcricao com retry (equivalente async de get_transcript_with_retry)
+        Levanta a ultima excecao se todas as tentativas falharem
+        """
+        for attempt in range(self.max_retries):
+            try:
+                transcript = await self._attempt(video_id)
+                self.fetched += 1
+                return transcript
+            except NO_CAPTIONS_ERRORS as e:
+                # Sem legendas nao muda com retry
+                logger.info(f"Sem legendas ({video_id}): {str(e)}")
+                self.no_captions += 1
+                raise
+            except Exception as e:
+                logger.error(f"Tentativa {attempt + 1} falhou ({video_id}): {str(e)}")
+                if attempt == self.max_retries - 1:
+                    self.failed += 1
+                    raise
+
+            # Backoff fora do semaforo: a vaga ja foi liberada
+            self.retries += 1
+            self.backing_off += 1
+            try:
+                await asyncio.sleep(uniform(self.backoff_min, self.backoff_max))
+            finally:
+                self.backing_off -= 1
+
+    async def process_video(self, url, check_cache=True):
+        """Equivalente async de main.process_video"""
+        logger.info(f"Iniciando processamento do video: {url}")
+        video_id = extract_video_id(url)
+
+        if check_cache:
+            exists, existing_data = await asyncio.to_thread(check_video_exists, video_id)
+            if exists:
+                logger.info(f"Video {video_id} retornado do CACHE")
+                return cached_result(video_id, existing_data)
+
+        started = time.time()
+        try:
+            transcript = await self.fetch_transcript(video_id)
+            final_text = format_transcription(video_id, transcript)
+            logger.info(f"Transcricao obtida com sucesso para {video_id} ({time.time() - started:.1f}s)")
+
+            await asyncio.to_thread(save_to_supabase, video_id, final_text, True)
+            return transcribed_result(video_id, final_text)
+
+        except Exception as e:
+            logger.error(f"Erro ao processar transcricao: {str(e)}")
+            # So 'sem legendas' de verdade entra no cache negativo
+            if is_no_captions_error(e):
+                await asyncio.to_thread(save_to_supabase, video_id, "", False)
+            return failed_result(video_id, e)
+
+    async def process_batch(self, urls):
+        """
+        Processa varios videos (URLs ou IDs) e gera cada resultado assim que fica pronto
+
+        Hits do cache saem primeiro (uma unica consulta em lote); os misses
+        sao buscados concorrentemente, limitados pelo semaforo do engine
+        """
+        video_ids = list(dict.fromkeys(extract_video_id(url) for url in urls))
+        if not video_ids:
+            return
+
+        hits = await asyncio.to_thread(check_videos_exist, video_ids)
+        for video_id in video_ids:
+            if video_id in hits:
+                yield cached_result(video_id, hits[video_id])
+
+        misses = [video_id for video_id in video_ids if video_id not in hits]
+        if not misses:
+            return
+
+        logger.info(f"Lote: {len(hits)} do cache, {len(misses)} para transcrever")
+
+        async def process(video_id):
+            try:
+                return await self.process_video(video_id, check_cache=False)
+            except Exception as e:
+                return failed_result(video_id, e)
+
+        tasks = [asyncio.create_task(process(video_id)) for video_id in misses]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Cliente desconectou: nao continuar buscando para ninguem
+            for task in tasks:
+                task.cancel()
+
+    def stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "backing_off": self.backing_off,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "fetched": self.fetched,
+            "failed": self.failed,
+            "no_captions": self.no_captions,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+_engine = None
+
+
+def get_engine():
+    """Engine singleton (chamar de dentro do event loop)"""
+    global _engine
+    if _engine is None:
+        _engine = TranscriptEngine()
+    return _engine
+
+
+def close_engine():
+    global _engine
+    if _engine is not None:
+        _engine.close()
+        _engine = None
@@ -15,6 +15,8 @@ echo "📦 Preparando arquivos..."
 # Criar tarball com arquivos necessários
 tar -czf youtube-search-v5.tar.gz \
   youtube_search_engine.py \
+  youtube_quota.py \
+  keyword_matcher.py \
   requirements.txt \
   Dockerfile \
   docker-compose.yml \
@@ -0,0 +1,139 @@
+"""
+Keyword Matcher - Filtros de palavras-chave compilados uma vez por processo
+Substitui os loops `any(kw in text.lower() ...)` do pre-check e do filtro
+de spam por uma única regex por conjunto, aplicada a lotes inteiros
+"""
+
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+
+# Conjuntos padrão (podem ser trocados por env: KEYWORDS_<NOME>=a,b,c)
+DEFAULT_KEYWORD_SETS: Dict[str, List[str]] = {
+    # Cursos longos atraem ESTUDANTES, não COMPRADORES
+    "educational": [
+        'complete course', 'full course', 'masterclass',
+        'complete tutorial', 'full tutorial',
+        'step by step guide', 'from scratch',
+        'for beginners', 'beginner guide',
+        'everything you need to know',
+        'curso completo', 'tutorial completo'
+    ],
+    # Vídeos de 1-2h: só cursos completos explícitos no título
+    "educational_strict": [
+        'complete course', 'full course', 'masterclass', 'curso completo'
+    ],
+    # Comentários de gratidão vazia
+    "gratitude": [
+        'thank', 'thanks', 'obrigado', 'great', 'amazing', 'awesome', 'love'
+    ],
+    # Spam em comentários (links, crypto, engagement bait, golpes)
+    "spam": [
+        # Links e mentions
+        'http://', 'https://', 'www.', '@', 'bit.ly',
+        # Crypto/Investment spam
+        'bitcoin', 'btc', 'crypto', 'cryptocurrency',
+        'meme coin', 'memecoin', 'shiba', 'doge',
+        'investment opportunity', 'trading', 'forex',
+        'retirement', 'i pray that', 'multi millionaire',
+        'make money fast', 'passive income',
+        # Engagement bait
+        'click here', 'check out', 'dm me',
+        'whatsapp', 'telegram', 'signal',
+        # Scam patterns
+        'work for 42', 'lost my money', 'gained $'
+    ],
+}
+
+
+def build_trie_pattern(keywords: Iterable[str]) -> str:
+    """
+    Regex de uma trie de prefixos das palavras-chave
+
+    ['bit.ly', 'bitcoin', 'btc'] vira `b(?:it(?:\\.ly|coin)|tc)`: o motor
+    de regex testa cada caractere contra os ramos possíveis em vez de
+    tentar cada palavra inteira a cada posição (como numa alternância
+    simples `a|b|c`), o que se aproxima de um autômato Aho-Corasick.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}  # Fim de palavra
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        # Uma palavra termina aqui: o resto do ramo é opcional (já é match)
+        optional = "" in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if optional else group
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Matcher de várias palavras-chave com uma regex compilada
+
+    Mesma semântica de `any(kw in text.lower() for kw in keywords)`
+    (substring, sem diferenciar maiúsculas), mas cada texto é varrido
+    uma única vez por uma trie compilada com re.IGNORECASE, sem criar
+    uma cópia em minúsculas de cada texto.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = sorted({kw.lower() for kw in keywords if kw})
+        self._pattern: Optional[re.Pattern] = None
+        if self.keywords:
+            self._pattern = re.compile(build_trie_pattern(self.keywords), re.IGNORECASE)
+
+    def search(self, *texts: str) -> bool:
+        """True se qualquer palavra-chave aparece em algum dos textos"""
+        if self._pattern is None:
+            return False
+        return any(text and self._pattern.search(text) for text in texts)
+
+    def match_many(self, texts: List[str]) -> List[bool]:
+        """Aplica o matcher a um lote inteiro de textos"""
+        if self._pattern is None:
+            return [False] * len(texts)
+        search = self._pattern.search
+        return [bool(text) and search(text) is not None for text in texts]
+
+
+def load_keyword_sets() -> Dict[str, List[str]]:
+    """Conjuntos padrão com overrides de env (KEYWORDS_SPAM=a,b,c substitui 'spam')"""
+    keyword_sets = {}
+    for name, defaults in DEFAULT_KEYWORD_SETS.items():
+        # Vazio (ex: `KEYWORDS_SPAM=` no .env) mantém o padrão
+        override = os.getenv(f"KEYWORDS_{name.upper()}", "").strip()
+        if override:
+            keyword_sets[name] = [kw.strip() for kw in override.split(",") if kw.strip()]
+        else:
+            keyword_sets[name] = list(defaults)
+    return keyword_sets
+
+
+# Matchers compartilhados pelo processo (o engine é instanciado por request)
+_matchers: Optional[Dict[str, KeywordMatcher]] = None
+
+
+def get_keyword_matchers() -> Dict[str, KeywordMatcher]:
+    """Retorna os matchers singleton (compilados na primeira chamada)"""
+    global _matchers
+    if _matchers is None:
+        _matchers = {
+            name: KeywordMatcher(keywords)
+            for name, keywords in load_keyword_sets().items()
+        }
+        print(
+            "🔎 Filtros de palavras-chave compilados: "
+            + ", ".join(f"{name}={len(m.keywords)}" for name, m in _matchers.items())
+        )
+    return _matchers
@@ -0,0 +1,317 @@
+"""
+YouTube Quota Ledger - Budget tracking for YouTube Data API v3
+Charges each call its documented unit cost on the least-loaded key and
+sheds low-priority calls when the daily budget runs low
+"""
+
+import os
+from datetime import datetime, timedelta, tzinfo
+from enum import IntEnum
+from typing import Dict, List, Optional
+
+class _PacificFallback(tzinfo):
+    """
+    Horário do Pacífico sem base de fusos: UTC-8, UTC-7 no horário de verão
+
+    O horário de verão dos EUA vai do segundo domingo de março ao
+    primeiro domingo de novembro, sempre às 2:00 locais.
+    """
+
+    @staticmethod
+    def _dst_bounds(year: int):
+        """Início/fim locais (naive) do horário de verão: domingo entre 8-14/03 e 1-7/11, 2:00"""
+        start = datetime(year, 3, 14, 2) - timedelta(days=(datetime(year, 3, 14).weekday() + 1) % 7)
+        end = datetime(year, 11, 7, 2) - timedelta(days=(datetime(year, 11, 7).weekday() + 1) % 7)
+        return start, end
+
+    def utcoffset(self, dt: Optional[datetime]) -> timedelta:
+        return timedelta(hours=-8) + self.dst(dt)
+
+    def dst(self, dt: Optional[datetime]) -> timedelta:
+        if dt is None:
+            return timedelta(0)
+        start, end = self._dst_bounds(dt.year)
+        local = dt.replace(tzinfo=None)
+        # fold=1: segunda passagem pela hora repetida, já no horário padrão
+        if dt.fold and end - timedelta(hours=1) <= local < end:
+            return timedelta(0)
+        return timedelta(hours=1) if start <= local < end else timedelta(0)
+
+    def tzname(self, dt: Optional[datetime]) -> str:
+        return "PDT" if self.dst(dt) else "PST"
+
+    def fromutc(self, dt: datetime) -> datetime:
+        # Limites em UTC: começa às 2:00 PST e termina às 2:00 PDT
+        start, end = self._dst_bounds(dt.year)
+        utc = dt.replace(tzinfo=None)
+        if start + timedelta(hours=8) <= utc < end + timedelta(hours=7):
+            return dt + timedelta(hours=-7)
+        local = dt + timedelta(hours=-8)
+        repeated = end + timedelta(hours=7) <= utc < end + timedelta(hours=8)
+        return local.replace(fold=1) if repeated else local
+
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE: tzinfo = ZoneInfo("America/Los_Angeles")
+except Exception as e:
+    # Sem base de fusos (ex: imagem slim sem tzdata): o relógio local
+    # mudaria o dia de quota, então mantém o Pacífico pela regra fixa
+    QUOTA_TIMEZONE = _PacificFallback()
+    print(f"⚠️ America/Los_Angeles indisponível ({e}), dia de quota usa regra fixa UTC-8/UTC-7")
+
+
+# Custo documentado por chamada `<resource>.list`
+# https://developers.google.com/youtube/v3/determine_quota_cost
+QUOTA_COSTS = {
+    "search": 100,
+    "videos": 1,
+    "channels": 1,
+    "commentThreads": 1,
+}
+
+
+class QuotaPriority(IntEnum):
+    """Prioridade da chamada quando o orçamento diário fica baixo"""
+    LOW = 0      # Opcional (ex: amostras de comentários)
+    NORMAL = 1   # Trabalho regular (ex: search.list)
+    HIGH = 2     # Caminho crítico (ex: detalhes de vídeos já buscados)
+
+
+class QuotaBudgetExceeded(Exception):
+    """Chamada descartada para proteger a quota restante do dia"""
+
+
+def quota_day_start(now: Optional[datetime] = None) -> datetime:
+    """Início do dia de quota (YouTube reseta à meia-noite, horário do Pacífico)"""
+    now = now or datetime.now(QUOTA_TIMEZONE)
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_quota_reset(now: Optional[datetime] = None) -> datetime:
+    """Horário do próximo reset diário da quota"""
+    return quota_day_start(now) + timedelta(days=1)
+
+
+class QuotaLedger:
+    """
+    Ledger diário de quota de uma chave da YouTube API
+
+    Cada chamada é cobrada antes de ser enviada. Quando o restante cai
+    abaixo da reserva de uma prioridade, chamadas dessa prioridade são
+    descartadas (QuotaBudgetExceeded). Chamadas HIGH só são recusadas
+    depois que a própria API respondeu quotaExceeded.
+    """
+
+    def __init__(
+        self,
+        daily_limit: int,
+        low_priority_reserve: float = 0.3,
+        normal_priority_reserve: float = 0.05
+    ):
+        self.daily_limit = daily_limit
+        self.reserves = {
+            QuotaPriority.LOW: int(daily_limit * low_priority_reserve),
+            QuotaPriority.NORMAL: int(daily_limit * normal_priority_reserve),
+            QuotaPriority.HIGH: 0,
+        }
+        self._reset(quota_day_start())
+
+    def _reset(self, day_start: datetime):
+        """Começa um novo dia de quota"""
+        self.day_start = day_start
+        self.used = 0
+        self.exhausted = False
+        self.calls: Dict[str, int] = {}
+        self.units: Dict[str, int] = {}
+        self.shed: Dict[str, int] = {}
+
+    def _roll_day(self):
+        """Zera contadores quando o dia de quota mudou"""
+        day_start = quota_day_start()
+        if day_start != self.day_start:
+            self._reset(day_start)
+
+    @property
+    def remaining(self) -> int:
+        """Unidades restantes hoje"""
+        self._roll_day()
+        if self.exhausted:
+            return 0
+        return max(0, self.daily_limit - self.used)
+
+    def can_afford(self, resource: str, priority: QuotaPriority = QuotaPriority.NORMAL) -> bool:
+        """Verifica se a chamada cabe no orçamento da sua prioridade"""
+        remaining = self.remaining
+
+        if self.exhausted:
+            return False
+        if priority == QuotaPriority.HIGH:
+            return True
+
+        cost = QUOTA_COSTS.get(resource, 1)
+        return remaining - cost >= self.reserves[priority]
+
+    def charge(self, resource: str, priority: QuotaPriority = QuotaPriority.NORMAL) -> int:
+        """
+        Cobra uma chamada no orçamento do dia
+
+        Raises:
+            QuotaBudgetExceeded: Se a chamada foi descartada
+        """
+        cost = QUOTA_COSTS.get(resource, 1)
+
+        if not self.can_afford(resource, priority):
+            self.shed[resource] = self.shed.get(resource, 0) + 1
+            raise QuotaBudgetExceeded(
+                f"{resource}.list descartado (prioridade {priority.name}, "
+                f"{self.remaining} unidades restantes)"
+            )
+
+        self.used += cost
+        self.calls[resource] = self.calls.get(resource, 0) + 1
+        self.units[resource] = self.units.get(resource, 0) + cost
+        return cost
+
+    def mark_exhausted(self):
+        """Registra resposta quotaExceeded: recusa chamadas até o reset"""
+        self._roll_day()
+        if not self.exhausted:
+            print(
+                f"🚨 Quota do YouTube esgotada (ledger {self.used}/{self.daily_limit}); "
+                f"pausando chamadas até {next_quota_reset().isoformat()}"
+            )
+        self.exhausted = True
+
+    def snapshot(self) -> Dict:
+        """Métricas do ledger"""
+        remaining = self.remaining
+
+        return {
+            "daily_limit": self.daily_limit,
+            "used": self.used,
+            "remaining": remaining,
+            "remaining_ratio": round(remaining / self.daily_limit, 4) if self.daily_limit else 0.0,
+            "exhausted": self.exhausted,
+            "calls": dict(self.calls),
+            "units": dict(self.units),
+            "shed": dict(self.shed),
+            "resets_at": next_quota_reset().isoformat(),
+        }
+
+
+def is_quota_error(error: Exception) -> bool:
+    """Verifica se um HttpError do googleapiclient é quotaExceeded"""
+    content = getattr(error, "content", b"") or b""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", errors="ignore")
+    return getattr(getattr(error, "resp", None), "status", None) == 403 and (
+        "quotaExceeded" in content or "dailyLimitExceeded" in content
+    )
+
+
+class KeyPool:
+    """
+    Pool de chaves da YouTube API, um ledger por chave
+
+    Cada chamada vai para a chave com mais quota restante que consegue
+    pagá-la. Chaves que responderam quotaExceeded ficam em quarentena
+    até o próximo reset diário.
+    """
+
+    def __init__(
+        self,
+        api_keys: List[str],
+        daily_limit: int,
+        low_priority_reserve: float = 0.3,
+        normal_priority_reserve: float = 0.05
+    ):
+        keys = list(dict.fromkeys(key for key in api_keys if key))
+        if not keys:
+            raise ValueError("KeyPool precisa de pelo menos uma chave")
+
+        self.ledgers: Dict[str, QuotaLedger] = {
+            key: QuotaLedger(daily_limit, low_priority_reserve, normal_priority_reserve)
+            for key in keys
+        }
+        self.shed: Dict[str, int] = {}
+
+    @staticmethod
+    def key_label(api_key: str) -> str:
+        """Chave mascarada para logs e métricas"""
+        return f"...{api_key[-6:]}"
+
+    @property
+    def remaining(self) -> int:
+        """Unidades restantes somando todas as chaves"""
+        return sum(ledger.remaining for ledger in self.ledgers.values())
+
+    def acquire(self, resource: str, priority: QuotaPriority = QuotaPriority.NORMAL) -> str:
+        """
+        Escolhe a chave menos usada que pode pagar a chamada e cobra nela
+
+        Raises:
+            QuotaBudgetExceeded: Se nenhuma chave pode pagar a chamada
+        """
+        candidates = [
+            (ledger.remaining, key)
+            for key, ledger in self.ledgers.items()
+            if ledger.can_afford(resource, priority)
+        ]
+
+        if not candidates:
+            self.shed[resource] = self.shed.get(resource, 0) + 1
+            raise QuotaBudgetExceeded(
+                f"{resource}.list descartado (prioridade {priority.name}, "
+                f"{self.remaining} unidades restantes em {len(self.ledgers)} chaves)"
+            )
+
+        _, api_key = max(candidates)
+        self.ledgers[api_key].charge(resource, priority)
+        return api_key
+
+    def mark_exhausted(self, api_key: str):
+        """Coloca em quarentena uma chave que respondeu quotaExceeded"""
+        ledger = self.ledgers.get(api_key)
+        if ledger:
+            print(f"⚠️ Chave do YouTube {self.key_label(api_key)} em quarentena")
+            ledger.mark_exhausted()
+
+    def snapshot(self) -> Dict:
+        """Métricas do pool com contadores por chave"""
+        keys = {
+            self.key_label(key): ledger.snapshot()
+            for key, ledger in self.ledgers.items()
+        }
+        daily_limit = sum(ledger.daily_limit for ledger in self.ledgers.values())
+        remaining = self.remaining
+
+        return {
+            "keys_total": len(keys),
+            "keys_available": sum(1 for key in keys.values() if not key["exhausted"]),
+            "daily_limit": daily_limit,
+            "remaining": remaining,
+            "remaining_ratio": round(remaining / daily_limit, 4) if daily_limit else 0.0,
+            "shed": dict(self.shed),
+            "resets_at": next_quota_reset().isoformat(),
+            "keys": keys,
+        }
+
+
+# Pool compartilhado pelo processo (o engine é instanciado por request)
+_key_pool: Optional[KeyPool] = None
+
+
+def get_key_pool() -> KeyPool:
+    """Retorna o pool singleton (lê o .env na primeira chamada)"""
+    global _key_pool
+    if _key_pool is None:
+        extra_keys = [key.strip() for key in os.getenv("YOUTUBE_API_KEYS", "").split(",")]
+        _key_pool = KeyPool(
+            api_keys=[os.getenv("YOUTUBE_API_KEY", "")] + extra_keys,
+            daily_limit=int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000")),
+            low_priority_reserve=float(os.getenv("YOUTUBE_QUOTA_LOW_PRIORITY_RESERVE", "0.3")),
+            normal_priority_reserve=float(os.getenv("YOUTUBE_QUOTA_NORMAL_PRIORITY_RESERVE", "0.05")),
+        )
+        print(f"🔑 Pool de chaves do YouTube: {len(_key_pool.ledgers)} chave(s)")
+    return _key_pool
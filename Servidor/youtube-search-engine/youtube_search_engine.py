@@ -18,6 +18,8 @@ import re
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 import uvicorn
+from youtube_quota import QuotaPriority, get_key_pool, is_quota_error
+from keyword_matcher import get_keyword_matchers
 
 load_dotenv()
 
@@ -30,8 +32,12 @@ class SearchRequest(BaseModel):
 class YouTubeSearchEngineV5:
     def __init__(self):
         # APIs
-        self.youtube_api_key = os.getenv("YOUTUBE_API_KEY")
-        self.youtube = build('youtube', 'v3', developerKey=self.youtube_api_key)
+        self.key_pool = get_key_pool()
+        self.keyword_matchers = get_keyword_matchers()
+        self.youtube_clients = {
+            key: build('youtube', 'v3', developerKey=key)
+            for key in self.key_pool.ledgers
+        }
         self.supabase_url = os.getenv("SUPABASE_URL")
         self.supabase_key = os.getenv("SUPABASE_KEY")
         self.claude = Anthropic(api_key=os.getenv("CLAUDE_API_KEY"))
@@ -41,6 +47,23 @@ class YouTubeSearchEngineV5:
         self.MIN_COMMENTS = 10       # Reduzido de 20 para 10
         self.MIN_DURATION = 60        # Mantido 60 segundos
     
+    def youtube_execute(self, resource: str, build_request, priority: QuotaPriority = QuotaPriority.NORMAL) -> Dict:
+        """
+        Executa request da YouTube API na chave com mais quota restante
+
+        build_request recebe o client da chave escolhida. Se a chave
+        responder quotaExceeded, entra em quarentena e a chamada é
+        repetida na próxima chave disponível.
+        """
+        while True:
+            api_key = self.key_pool.acquire(resource, priority)
+            try:
+                return build_request(self.youtube_clients[api_key]).execute()
+            except HttpError as e:
+                if not is_quota_error(e):
+                    raise
+                self.key_pool.mark_exhausted(api_key)
+
     async def get_project_data(self, scanner_id: int) -> Dict:
         """Busca dados completos do projeto incluindo descrição"""
         headers = {
@@ -152,7 +175,7 @@ Gere 5 queries SIMPLES e EFETIVAS. Retorne APENAS as queries, uma por linha."""
         
         try:
             # Buscar 30 vídeos para ter mais opções
-            search_response = self.youtube.search().list(
+            search_response = self.youtube_execute('search', lambda youtube: youtube.search().list(
                 q=query,
                 part='snippet',
                 type='video',
@@ -161,7 +184,7 @@ Gere 5 queries SIMPLES e EFETIVAS. Retorne APENAS as queries, uma por linha."""
                 publishedAfter=published_after,
                 regionCode=region,  # USAR REGIÃO DINÂMICA
                 relevanceLanguage='pt' if region == 'BR' else 'en'  # IDIOMA BASEADO NA REGIÃO
-            ).execute()
+            ))
             
             for item in search_response.get('items', []):
                 video_id = item['id']['videoId']
@@ -235,10 +258,11 @@ Gere 5 queries SIMPLES e EFETIVAS. Retorne APENAS as queries, uma por linha."""
             batch = video_ids[i:i+batch_size]
             
             try:
-                videos_response = self.youtube.videos().list(
+                # HIGH: sem detalhes, as 100 unidades do search.list seriam desperdiçadas
+                videos_response = self.youtube_execute('videos', lambda youtube: youtube.videos().list(
                     part='statistics,contentDetails,snippet',
                     id=','.join(batch)
-                ).execute()
+                ), QuotaPriority.HIGH)
                 
                 for item in videos_response.get('items', []):
                     video_id = item['id']
@@ -270,10 +294,10 @@ Gere 5 queries SIMPLES e EFETIVAS. Retorne APENAS as queries, uma por linha."""
             batch = channel_ids[i:i+batch_size]
             
             try:
-                channels_response = self.youtube.channels().list(
+                channels_response = self.youtube_execute('channels', lambda youtube: youtube.channels().list(
                     part='statistics,snippet',
                     id=','.join(batch)
-                ).execute()
+                ), QuotaPriority.HIGH)
                 
                 for item in channels_response.get('items', []):
                     channel_id = item['id']
@@ -368,13 +392,14 @@ Gere 5 queries SIMPLES e EFETIVAS. Retorne APENAS as queries, uma por linha."""
     async def fetch_video_comments(self, video_id: str, max_comments: int = 20) -> List[str]:
         """Busca comentários de um vídeo"""
         try:
-            comments_response = self.youtube.commentThreads().list(
+            # LOW: comentários são os primeiros a serem cortados quando a quota fica baixa
+            comments_response = self.youtube_execute('commentThreads', lambda youtube: youtube.commentThreads().list(
                 part='snippet',
                 videoId=video_id,
                 maxResults=max_comments,
                 order='relevance',
                 textFormat='plainText'
-            ).execute()
+            ), QuotaPriority.LOW)
 
             comments = []
             for item in comments_response.get('items', []):
@@ -503,23 +528,14 @@ CRÍTICO: Extraia DINAMI CAMENTE do texto, não invente! Se não encontrar, reto
         Returns: {"should_analyze": bool, "rejection_reason": str}
         """
         duration = video['details'].get('duration_seconds', 0)
-        title = video['title'].lower()
-        description = video.get('description', '').lower()
+        title = video['title']
+        description = video.get('description', '')
         engagement_rate = video.get('engagement_rate', 0)
 
         # === RED FLAG #1: Cursos educacionais muito longos ===
         # Atraem ESTUDANTES, não COMPRADORES
-        educational_keywords = [
-            'complete course', 'full course', 'masterclass',
-            'complete tutorial', 'full tutorial',
-            'step by step guide', 'from scratch',
-            'for beginners', 'beginner guide',
-            'everything you need to know',
-            'curso completo', 'tutorial completo'
-        ]
-
         if duration > 7200:  # >2 horas
-            if any(kw in title or kw in description for kw in educational_keywords):
+            if self.keyword_matchers['educational'].search(title, description):
                 return {
                     "should_analyze": False,
                     "rejection_reason": f"Educational course (>{duration/3600:.1f}h) - attracts students, not buyers"
@@ -527,8 +543,7 @@ CRÍTICO: Extraia DINAMI CAMENTE do texto, não invente! Se não encontrar, reto
 
         if duration > 3600:  # >1 hora
             # Mais permissivo, mas filtrar cursos completos
-            strict_keywords = ['complete course', 'full course', 'masterclass', 'curso completo']
-            if any(kw in title for kw in strict_keywords):
+            if self.keyword_matchers['educational_strict'].search(title):
                 return {
                     "should_analyze": False,
                     "rejection_reason": f"Long masterclass ({duration/3600:.1f}h) - low buyer intent"
@@ -548,10 +563,12 @@ CRÍTICO: Extraia DINAMI CAMENTE do texto, não invente! Se não encontrar, reto
 
             if avg_length < 25:  # Média <25 chars
                 # Verificar se são só gratidão
-                gratitude_keywords = ['thank', 'thanks', 'obrigado', 'great', 'amazing', 'awesome', 'love']
-                gratitude_count = sum(1 for c in sample_comments[:5]
-                                    if any(kw in c.lower() for kw in gratitude_keywords)
-                                    and len(c) < 50)
+                first_comments = sample_comments[:5]
+                is_gratitude = self.keyword_matchers['gratitude'].match_many(first_comments)
+                gratitude_count = sum(
+                    1 for c, grateful in zip(first_comments, is_gratitude)
+                    if grateful and len(c) < 50
+                )
 
                 if gratitude_count >= 3:  # >=3 de 5 são gratidão curta
                     return {
@@ -597,41 +614,24 @@ CRÍTICO: Extraia DINAMI CAMENTE do texto, não invente! Se não encontrar, reto
             comments_results = await asyncio.gather(*comment_tasks)
 
             # Processar comentários em batch
-            for video, raw_comments in zip(videos_without_comments, comments_results):
-                # Pré-filtro Python: Remove spam, muito curtos, links
-                filtered = []
-                for comment in raw_comments:
-                    # Limpar texto
-                    text = comment.strip()
-
-                    # Filtros básicos
-                    if len(text) < 20:  # Muito curto
-                        continue
-
-                    # MELHORIA #1: Filtro expandido de spam (crypto, investment, engagement bait)
-                    spam_keywords = [
-                        # Links e mentions
-                        'http://', 'https://', 'www.', '@', 'bit.ly',
-                        # Crypto/Investment spam
-                        'bitcoin', 'btc', 'crypto', 'cryptocurrency',
-                        'meme coin', 'memecoin', 'shiba', 'doge',
-                        'investment opportunity', 'trading', 'forex',
-                        'retirement', 'i pray that', 'multi millionaire',
-                        'make money fast', 'passive income',
-                        # Engagement bait
-                        'click here', 'check out', 'dm me',
-                        'whatsapp', 'telegram', 'signal',
-                        # Scam patterns
-                        'work for 42', 'lost my money', 'gained $'
-                    ]
-                    if any(spam in text.lower() for spam in spam_keywords):
-                        continue
-
-                    if text.count('!') > 3 or text.count('?') > 3:  # Excesso de pontuação (spam)
-                        continue
-
-                    filtered.append(text)
-
+            # Pré-filtro Python: Remove spam, muito curtos, links
+            # MELHORIA #1: Filtro expandido de spam (crypto, investment, engagement bait)
+            # Todos os comentários de todos os vídeos passam de uma vez pelo matcher
+            candidates = [
+                (video_index, text)
+                for video_index, raw_comments in enumerate(comments_results)
+                for text in (comment.strip() for comment in raw_comments)
+                if len(text) >= 20  # Muito curto
+                and text.count('!') <= 3 and text.count('?') <= 3  # Excesso de pontuação (spam)
+            ]
+            is_spam = self.keyword_matchers['spam'].match_many([text for _, text in candidates])
+
+            filtered_by_video = [[] for _ in videos_without_comments]
+            for (video_index, text), spam in zip(candidates, is_spam):
+                if not spam:
+                    filtered_by_video[video_index].append(text)
+
+            for video, filtered in zip(videos_without_comments, filtered_by_video):
                 video['sample_comments'] = filtered[:12]  # MELHORIA #1: Aumentado de 8 para 12 comentários
 
             print(f"   ✅ Comentários buscados em paralelo!")
@@ -1205,13 +1205,18 @@ async def search_videos(request: SearchRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics")
+async def metrics():
+    """Métricas de quota da YouTube API (por chave)"""
+    return {"youtube_quota": get_key_pool().snapshot()}
+
 @app.get("/")
 async def root():
     """Root endpoint"""
     return {
         "service": "YouTube Search Engine v5",
         "version": "5.0.0",
-        "endpoints": ["/search", "/health"]
+        "endpoints": ["/search", "/health", "/metrics"]
     }
 
 async def main():
@@ -0,0 +1,45 @@
+-- =============================================
+-- Função: obter_contexto_scanner
+-- Descrição: Obtém canal, fila de vídeos e dados do projeto em uma única chamada
+--            (substitui obter_canal_e_videos + obter_dados_projeto_por_canal no Video Qualifier)
+-- Criado: 2026-10-18
+-- =============================================
+
+DROP FUNCTION IF EXISTS obter_contexto_scanner(BIGINT);
+
+CREATE OR REPLACE FUNCTION obter_contexto_scanner(canal_id bigint)
+RETURNS JSONB
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+    v_result JSONB;
+BEGIN
+    -- Validação de entrada
+    IF canal_id IS NULL THEN
+        RAISE EXCEPTION 'canal_id não pode ser NULL';
+    END IF;
+
+    SELECT jsonb_build_object(
+        'youtube_channel_id', c.channel_id,
+        'videos_para_scann', COALESCE(c.videos_para_scann, ''),
+        'nome_produto_servico', p."Project name",
+        'descricao_servico', p."description service",
+        'pais', p."País"
+    )
+    INTO v_result
+    FROM public."Canais do youtube" c
+    INNER JOIN public."Projeto" p ON c."Projeto" = p.id
+    WHERE c.id = canal_id;
+
+    -- Se não encontrar canal (ou canal sem projeto), retornar null
+    RETURN v_result;
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE LOG 'Erro em obter_contexto_scanner: %', SQLERRM;
+        RAISE;
+END;
+$$;
+
+COMMENT ON FUNCTION public.obter_contexto_scanner(BIGINT) IS
+'Obtém canal, fila de vídeos (videos_para_scann) e contexto do projeto (nome_produto_servico, descricao_servico, pais) em um único JSONB.';